@@ -10,13 +10,16 @@ applications to RNA splicing signals. Journal of Computational Biology,
 
 import sys
 import math
-from collections import defaultdict
 import os.path
 
+import msgpack
+import numpy as np
+
 
 maketrans = str.maketrans
 
-__all__ = ['score5', 'score3', 'load_matrix5', 'load_matrix3']
+__all__ = ['score5', 'score3', 'load_matrix5', 'load_matrix3',
+           'score5_many', 'score3_many', 'dense_matrix5', 'dense_matrix3']
 
 dir_path = os.path.dirname(os.path.abspath(__file__))
 
@@ -61,13 +64,10 @@ def score5(fa, matrix=None):
 
 
 def load_matrix5():
-    matrix_f = dir_path + '/data/score5_matrix.txt'
-    matrix = {}
-    with open(matrix_f, 'r') as f:
-        for line in f:
-            entry = line.split()
-            matrix[entry[0]] = float(entry[1])
-    return matrix
+    # msgpack dump of data/score5_matrix.txt, much faster to load than the text file
+    matrix_f = dir_path + '/data/matrix5.msg'
+    with open(matrix_f, 'rb') as f:
+        return msgpack.unpackb(f.read())
 
 
 def score3(fa, matrix=None):
@@ -111,19 +111,152 @@ def score3(fa, matrix=None):
 
 
 def load_matrix3():
-    matrix_f = dir_path + '/data/score3_matrix.txt'
-    matrix = defaultdict(dict)   # type: ignore
-    with open(matrix_f, 'r') as f:
-        for line in f:
-            n, m, s = line.split()
-            matrix[int(n)][int(m)] = float(s)
-    return matrix
+    # msgpack dump of data/score3_matrix.txt, much faster to load than the text file
+    matrix_f = dir_path + '/data/matrix3.msg'
+    with open(matrix_f, 'rb') as f:
+        return msgpack.unpackb(f.read(), strict_map_key=False)
+
+
+_hash_table = maketrans('ACGT', '0123')
 
 
 def hashseq(fa):
-    table = maketrans('ACGT', '0123')
-    seq = fa.translate(table)
-    return sum(int(j) * 4**(len(seq) - i - 1) for i, j in enumerate(seq))
+    '''
+    Index of a k-mer, its bases read as base-4 digits (A=0, C=1, G=2, T=3).
+    >>> hashseq('ACGT'), hashseq('TTTTTTT')
+    (27, 16383)
+    '''
+    if not fa:
+        return 0
+    return int(fa.translate(_hash_table), 4)
+
+
+# --- Batch scoring ---------------------------------------------------------
+#
+# The batch scorers encode the sequences to 2-bit codes (A=0, C=1, G=2, T=3,
+# as in hashseq), compute the k-mer indices of all sequences at once and
+# gather the scores from dense matrix arrays.
+
+_BASES = 'ACGT'
+
+# Code of each byte, 4 for anything but ACGT (either case)
+_codes = np.full(256, 4, dtype=np.uint8)
+for _i, _b in enumerate(_BASES):
+    _codes[ord(_b)] = _i
+    _codes[ord(_b.lower())] = _i
+
+_bgd_5 = np.array([bgd_5[b] for b in _BASES])
+_cons1_5 = np.array([cons1_5[b] for b in _BASES])
+_cons2_5 = np.array([cons2_5[b] for b in _BASES])
+_bgd_3 = np.array([bgd_3[b] for b in _BASES])
+_cons1_3 = np.array([cons1_3[b] for b in _BASES])
+_cons2_3 = np.array([cons2_3[b] for b in _BASES])
+
+# k-mers of the rest of a 3' splice site: (start, end, multiply or divide)
+_kmers_3 = [(0, 7, True), (7, 14, True), (14, 21, True), (4, 11, True),
+            (11, 18, True), (4, 7, False), (7, 11, False), (11, 14, False),
+            (14, 18, False)]
+
+_dense_matrices: dict = {}
+
+
+def dense_matrix5(matrix=None):
+    '''
+    Return the 5' matrix as array indexed by the hashseq of the 7-mer.
+    The array of the bundled matrix is built once.
+    '''
+    if matrix is None:
+        if 5 not in _dense_matrices:
+            _dense_matrices[5] = dense_matrix5(load_matrix5())
+        return _dense_matrices[5]
+    dense = np.full(4**7, np.nan)
+    for key, value in matrix.items():
+        dense[hashseq(key)] = value
+    return dense
+
+
+def dense_matrix3(matrix=None):
+    '''
+    Return the 3' matrix as list of arrays indexed by the hashseq of the
+    k-mers. The arrays of the bundled matrix are built once.
+    '''
+    if matrix is None:
+        if 3 not in _dense_matrices:
+            _dense_matrices[3] = dense_matrix3(load_matrix3())
+        return _dense_matrices[3]
+    dense = []
+    for i, (start, end, _) in enumerate(_kmers_3):
+        values = np.full(4**(end - start), np.nan)
+        values[list(matrix[i].keys())] = list(matrix[i].values())
+        dense.append(values)
+    return dense
+
+
+def encode(fas, length):
+    '''
+    Encode sequences of the given length to an (n, length) array of codes.
+    >>> encode(['ACgt', 'TTTA'], 4).tolist()
+    [[0, 1, 2, 3], [3, 3, 3, 0]]
+    '''
+    fas = list(fas)
+    if any(len(fa) != length for fa in fas):
+        raise ValueError('Wrong length of fa!')
+    raw = np.frombuffer(''.join(fas).encode('ascii', 'replace'), dtype=np.uint8)
+    codes = _codes[raw].reshape(len(fas), length)
+    if (codes == 4).any():
+        raise ValueError('Invalid base in fa!')
+    return codes
+
+
+def _kmer_index(codes, start, end):
+    # hashseq of codes[:, start:end] for all rows
+    powers = 4 ** np.arange(end - start - 1, -1, -1)
+    return codes[:, start:end].astype(np.int64) @ powers
+
+
+def _log2(values):
+    # Same formula as math.log(x, 2)
+    with np.errstate(divide='ignore'):
+        return np.log(values) / math.log(2)
+
+
+def score5_many(fas, matrix=None):
+    '''
+    Calculate the 5' splice site strength of many sequences at once.
+    Accepts the matrix of load_matrix5 or dense_matrix5.
+    >>> np.round(score5_many(['cagGTAAGT', 'gagGTAAGT', 'taaATAAGT']), 2).tolist()
+    [10.86, 11.08, -0.12]
+    '''
+    dense = dense_matrix5(matrix) if isinstance(matrix, dict) or matrix is None else matrix
+    codes = encode(fas, 9)
+    key0, key1 = codes[:, 3], codes[:, 4]
+    score = _cons1_5[key0] * _cons2_5[key1] / (_bgd_5[key0] * _bgd_5[key1])
+    rest = np.concatenate([codes[:, :3], codes[:, 5:]], axis=1)
+    rest_score = dense[_kmer_index(rest, 0, 7)]
+    return _log2(score * rest_score)
+
+
+def score3_many(fas, matrix=None):
+    '''
+    Calculate the 3' splice site strength of many sequences at once.
+    Accepts the matrix of load_matrix3 or dense_matrix3.
+    >>> np.round(score3_many(['ttccaaacgaacttttgtAGgga',
+    ...                       'tgtctttttctgtgtggcAGtgg',
+    ...                       'ttctctcttcagacttatAGcaa']), 2).tolist()
+    [2.89, 8.19, -0.08]
+    '''
+    dense = dense_matrix3(matrix) if isinstance(matrix, dict) or matrix is None else matrix
+    codes = encode(fas, 23)
+    key0, key1 = codes[:, 18], codes[:, 19]
+    score = _cons1_3[key0] * _cons2_3[key1] / (_bgd_3[key0] * _bgd_3[key1])
+    rest = np.concatenate([codes[:, :18], codes[:, 20:]], axis=1)
+    rest_score = np.ones(len(codes))
+    for values, (start, end, multiply) in zip(dense, _kmers_3):
+        if multiply:
+            rest_score *= values[_kmer_index(rest, start, end)]
+        else:
+            rest_score /= values[_kmer_index(rest, start, end)]
+    return _log2(score * rest_score)
 
 
 if __name__ == '__main__':
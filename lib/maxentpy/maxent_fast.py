@@ -105,7 +105,7 @@ def score3(fa, matrix=None):
 def load_matrix(d):
     matrix_f = os.path.join(dir_path, 'data/matrix%d.msg' % d)
     with open(matrix_f, 'rb') as f:
-        matrix = msgpack.unpackb(f.read(), encoding='utf-8')
+        matrix = msgpack.unpackb(f.read(), strict_map_key=False)
     return matrix
 
 
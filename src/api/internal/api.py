@@ -1,20 +1,181 @@
-from fastapi import APIRouter, HTTPException, Query
+import asyncio
+from typing import AsyncIterator, Callable, List, Optional, Set, Tuple, Union
+
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 
 from src.auto_acmg import AutoACMG
+from src.core.cache import RequestMemo
 from src.core.config import settings
+from src.core.executor import check_capacity, run_in_executor
 from src.defs.api import (
     ApiAutoACMGSeqVarData,
     ApiAutoACMGSeqVarResult,
+    BatchPredictionRequest,
+    SeqVarBatchPredictionLine,
     SeqVarPredictionResponse,
+    StrucVarBatchPredictionLine,
+    StrucVarBatchPredictionRequest,
     StrucVarPredictionResponse,
     VariantResolveResponse,
 )
-from src.defs.auto_acmg import AutoACMGSeqVarResult, AutoACMGStrucVarResult
-from src.defs.exceptions import AutoAcmgBaseException
+from src.defs.auto_acmg import (
+    AutoACMGBatchResult,
+    AutoACMGOptions,
+    AutoACMGSeqVarResult,
+    AutoACMGStrucVarResult,
+)
+from src.defs.exceptions import AutoAcmgBaseException, ServerBusyError
 from src.defs.genome_builds import GenomeRelease
 
 router = APIRouter()
 
+#: Seconds after which clients of a busy API should retry
+RETRY_AFTER = 1
+#: Media type of the streamed batch results, one JSON object per line
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _busy(e: ServerBusyError) -> HTTPException:
+    """Response for a request rejected because all workers are busy."""
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(RETRY_AFTER)})
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check whether the ``If-None-Match`` header of a request matches the ETag."""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in (tag.removeprefix("W/") for tag in tags)
+
+
+def _to_api_seqvar_result(
+    prediction: Union[AutoACMGSeqVarResult, AutoACMGStrucVarResult, None],
+) -> Optional[ApiAutoACMGSeqVarResult]:
+    """Convert AutoACMGSeqVarResult to ApiAutoACMGSeqVarResult.
+
+    Exons, cds_info and gnomad data are ignored. Returns None if the prediction is not one of a
+    sequence variant.
+    """
+    if not isinstance(prediction, AutoACMGSeqVarResult) or prediction.seqvar is None:
+        return None
+    return ApiAutoACMGSeqVarResult(
+        seqvar=prediction.seqvar,
+        data=ApiAutoACMGSeqVarData(**prediction.data.model_dump()),
+        criteria=prediction.criteria,
+        timings=prediction.timings,
+    )
+
+
+def _seqvar_batch_line(index: int, result: AutoACMGBatchResult) -> SeqVarBatchPredictionLine:
+    """Convert the result of a batch item to its line of the sequence variant batch response."""
+    line = SeqVarBatchPredictionLine(index=index, variant_name=result.variant_name)
+    if result.error is not None:
+        line.error = result.error
+    else:
+        line.prediction = _to_api_seqvar_result(result.prediction)
+        if line.prediction is None:
+            line.error = "No valid sequence variant prediction was made"
+    return line
+
+
+def _strucvar_batch_line(index: int, result: AutoACMGBatchResult) -> StrucVarBatchPredictionLine:
+    """Convert the result of a batch item to its line of the structural variant batch response."""
+    line = StrucVarBatchPredictionLine(index=index, variant_name=result.variant_name)
+    prediction = result.prediction
+    if result.error is not None:
+        line.error = result.error
+    elif not isinstance(prediction, AutoACMGStrucVarResult):
+        line.error = "No valid structural variant prediction was made"
+    else:
+        line.prediction = prediction
+    return line
+
+
+async def _predict_batch_item(
+    index: int,
+    variant_name: str,
+    genome_release: GenomeRelease,
+    memo: RequestMemo,
+    options: Optional[AutoACMGOptions],
+) -> Tuple[int, AutoACMGBatchResult]:
+    """Predict a variant of a batch on the shared thread pool, waiting for a free worker."""
+    result = await run_in_executor(
+        AutoACMG._predict_batch_item, variant_name, genome_release, memo, options, wait=True
+    )
+    return index, result
+
+
+async def _stream_batch(
+    variants: List[str],
+    genome_release: GenomeRelease,
+    to_line: Callable[[int, AutoACMGBatchResult], BaseModel],
+    options: Optional[AutoACMGOptions] = None,
+) -> AsyncIterator[str]:
+    """Predict the variants of a batch and yield an NDJSON line per variant as it completes.
+
+    At most ``AUTO_ACMG_BATCH_MAX_CONCURRENCY`` variants of the batch are in flight, so the
+    memory stays flat for large batches. Upstream responses are shared between the variants
+    through a bounded request memo. If the client disconnects, the variants still waiting for a
+    worker are dropped, while the predictions already running finish in the background.
+
+    Args:
+        variants: The names or identifiers of the variants.
+        genome_release: The genome release version.
+        to_line: Converts the index and the result of a variant to its line.
+        options: The options of the predictions.
+
+    Yields:
+        str: The JSON line of each variant, in the order of completion.
+    """
+    max_concurrency = max(1, settings.AUTO_ACMG_BATCH_MAX_CONCURRENCY)
+    memo = RequestMemo(max_entries=settings.AUTO_ACMG_BATCH_MEMO_MAX_ENTRIES)
+    queued = iter(enumerate(variants))
+    in_flight: Set[asyncio.Future] = set()
+    try:
+        while True:
+            for index, variant_name in queued:
+                in_flight.add(
+                    asyncio.ensure_future(
+                        _predict_batch_item(index, variant_name, genome_release, memo, options)
+                    )
+                )
+                if len(in_flight) >= max_concurrency:
+                    break
+            if not in_flight:
+                return
+            done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index, result = task.result()
+                yield to_line(index, result).model_dump_json() + "\n"
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+
+def _stream_batch_response(
+    request: BatchPredictionRequest,
+    to_line: Callable[[int, AutoACMGBatchResult], BaseModel],
+    options: Optional[AutoACMGOptions] = None,
+) -> StreamingResponse:
+    """Validate a batch request and stream its results.
+
+    Raises:
+        HTTPException: 400 if the genome release is invalid, 503 if all workers are busy.
+    """
+    genome_release_enum = GenomeRelease.from_string(request.genome_release)
+    if not genome_release_enum:
+        raise HTTPException(status_code=400, detail="Invalid genome release")
+    try:
+        check_capacity()
+    except ServerBusyError as e:
+        raise _busy(e)
+    return StreamingResponse(
+        _stream_batch(request.variants, genome_release_enum, to_line, options),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
+
 
 @router.get("/resolve", response_model=VariantResolveResponse)
 async def resolve_variant(
@@ -37,26 +198,34 @@ async def resolve_variant(
 
         # Try to resolve as a sequence variant first
         auto_acmg = AutoACMG(variant_name, genome_release_enum)
-        resolved_variant = auto_acmg.resolve_variant()
+        resolved_variant = await run_in_executor(auto_acmg.resolve_variant)
         if resolved_variant is None:
             raise HTTPException(status_code=400, detail="Failed to resolve the variant")
         return VariantResolveResponse(
             variant_type="sequence variant", resolved_variant=resolved_variant
         )
+    except ServerBusyError as e:
+        raise _busy(e)
     except AutoAcmgBaseException as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/predict/seqvar", response_model=SeqVarPredictionResponse)
 async def predict_seqvar(
+    response: Response,
     variant_name: str = Query(..., description="The name or identifier of the sequence variant"),
     genome_release: str = Query(default="GRCh38", description="The genome release version"),
+    if_none_match: Optional[str] = Header(default=None),
 ):
     """Predict the ACMG classification of a sequence variant.
 
+    If the prediction cache is used, the response has an ``ETag`` header and requests with a
+    matching ``If-None-Match`` header are answered with ``304 Not Modified``.
+
     Args:
         variant_name (str): The name or identifier of the sequence variant.
         genome_release (str): The genome release version.
+        if_none_match (str): The ETags of the predictions known to the client.
 
     Returns:
         SeqVarPredictionResponse: The predicted ACMG classification.
@@ -67,65 +236,114 @@ async def predict_seqvar(
             raise HTTPException(status_code=400, detail="Invalid genome release")
 
         auto_acmg = AutoACMG(variant_name, genome_release_enum)
-        prediction = auto_acmg.predict()
+        prediction = await run_in_executor(auto_acmg.predict)
 
-        if (
-            prediction is None
-            or not isinstance(prediction, AutoACMGSeqVarResult)
-            or prediction.seqvar is None
-        ):
+        api_prediction = _to_api_seqvar_result(prediction)
+        if api_prediction is None:
             raise HTTPException(
                 status_code=400, detail="No valid sequence variant prediction was made"
             )
 
-        # Convert AutoACMGSeqVarResult to ApiAutoACMGSeqVarResult
-        # Ignore exons, cds_info and gnomad data
-        api_prediction = ApiAutoACMGSeqVarResult(
-            seqvar=prediction.seqvar,
-            data=ApiAutoACMGSeqVarData(**prediction.data.model_dump()),
-            criteria=prediction.criteria,
-        )
-
+        if auto_acmg.etag:
+            if _etag_matches(if_none_match, auto_acmg.etag):
+                return Response(status_code=304, headers={"ETag": auto_acmg.etag})
+            response.headers["ETag"] = auto_acmg.etag
         return SeqVarPredictionResponse(prediction=api_prediction)
+    except ServerBusyError as e:
+        raise _busy(e)
     except AutoAcmgBaseException as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/predict/strucvar", response_model=StrucVarPredictionResponse)
 async def predict_strucvar(
+    response: Response,
     variant_name: str = Query(..., description="The name or identifier of the structural variant"),
     genome_release: str = Query(default="GRCh38", description="The genome release version"),
     duplication_tandem: bool = Query(
         default=False,
         description="The duplication is in tandem and disrupts reading frame and undergoes NMD",
     ),
+    if_none_match: Optional[str] = Header(default=None),
 ):
     """Predict the ACMG classification of a structural variant.
 
+    If the prediction cache is used, the response has an ``ETag`` header and requests with a
+    matching ``If-None-Match`` header are answered with ``304 Not Modified``.
+
     Args:
         variant_name (str): The name or identifier of the structural variant.
         genome_release (str): The genome release version.
         duplication_tandem (bool): The duplication is in tandem and disrupts reading frame and undergoes NMD.
+        if_none_match (str): The ETags of the predictions known to the client.
 
     Returns:
         StrucVarPredictionResponse: The predicted ACMG classification.
     """
     try:
-        # Set default duplication tandem if provided
-        settings.DUPLICATION_TANDEM = duplication_tandem
-
         genome_release_enum = GenomeRelease.from_string(genome_release)
         if not genome_release_enum:
             raise HTTPException(status_code=400, detail="Invalid genome release")
 
-        auto_acmg = AutoACMG(variant_name, genome_release_enum)
-        prediction = auto_acmg.predict()
+        options = AutoACMGOptions(duplication_tandem=duplication_tandem)
+        auto_acmg = AutoACMG(variant_name, genome_release_enum, options)
+        prediction = await run_in_executor(auto_acmg.predict)
 
         if prediction is None or not isinstance(prediction, AutoACMGStrucVarResult):
             raise HTTPException(
                 status_code=400, detail="No valid structural variant prediction was made"
             )
 
+        if auto_acmg.etag:
+            if _etag_matches(if_none_match, auto_acmg.etag):
+                return Response(status_code=304, headers={"ETag": auto_acmg.etag})
+            response.headers["ETag"] = auto_acmg.etag
         return StrucVarPredictionResponse(prediction=prediction)
+    except ServerBusyError as e:
+        raise _busy(e)
     except AutoAcmgBaseException as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post(
+    "/predict/seqvar/batch",
+    response_class=StreamingResponse,
+    responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}}},
+)
+async def predict_seqvar_batch(request: BatchPredictionRequest):
+    """Predict the ACMG classification of many sequence variants.
+
+    The variants are predicted concurrently. The results are streamed as newline-delimited JSON,
+    one ``SeqVarBatchPredictionLine`` per variant in the order of completion. A failing variant
+    does not abort the batch, its line carries the error instead of the prediction.
+
+    Args:
+        request (BatchPredictionRequest): The variants and the genome release version.
+
+    Returns:
+        StreamingResponse: The NDJSON stream of the results.
+    """
+    return _stream_batch_response(request, _seqvar_batch_line)
+
+
+@router.post(
+    "/predict/strucvar/batch",
+    response_class=StreamingResponse,
+    responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}}},
+)
+async def predict_strucvar_batch(request: StrucVarBatchPredictionRequest):
+    """Predict the ACMG classification of many structural variants.
+
+    The variants are predicted concurrently. The results are streamed as newline-delimited JSON,
+    one ``StrucVarBatchPredictionLine`` per variant in the order of completion. A failing variant
+    does not abort the batch, its line carries the error instead of the prediction.
+
+    Args:
+        request (StrucVarBatchPredictionRequest): The variants, the genome release version and
+            whether the duplications are in tandem.
+
+    Returns:
+        StreamingResponse: The NDJSON stream of the results.
+    """
+    options = AutoACMGOptions(duplication_tandem=request.duplication_tandem)
+    return _stream_batch_response(request, _strucvar_batch_line, options)
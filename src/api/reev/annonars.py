@@ -1,15 +1,39 @@
 """Annonars API client."""
 
-from typing import Optional, Union
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from itertools import chain
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
 
 import httpx
 from loguru import logger
-from pydantic import ValidationError
+from pydantic import BaseModel, ValidationError
 
-from src.core.cache import Cache
+from src.core.cache import Cache, get_range_cache, get_request_memo
 from src.core.config import settings
+from src.core.http import get_async_http_client, get_http_client
+from src.core.timing import record_bytes, record_cache, span, timed
 from src.defs.annonars_gene import AnnonarsGeneResponse
-from src.defs.annonars_range import AnnonarsCustomRangeResult, AnnonarsRangeResponse
+from src.defs.annonars_range import (
+    AnnonarsCustomRangeResult,
+    AnnonarsRangeResponse,
+    AnnonarsRangeResult,
+    ClinvarItem,
+    GnomadGenome,
+)
 from src.defs.annonars_variant import AnnonarsVariantResponse
 from src.defs.exceptions import AnnonarsException
 from src.defs.seqvar import SeqVar
@@ -18,66 +42,281 @@ from src.defs.strucvar import StrucVar
 #: Annonars API base URL
 ANNONARS_API_BASE_URL = settings.AUTO_ACMG_API_ANNONARS_URL or f"{settings.API_REEV_URL}/annonars"
 
+#: Maximal range size of a single range request
+MAX_RANGE_SIZE = 5000
+
+#: Type variable for the response models
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+class AnnonarsClientBase:
+    """Request building and response handling shared by the Annonars clients."""
 
-class AnnonarsClient:
     def __init__(self, *, api_base_url: Optional[str] = None):
         #: Annonars API base URL
         self.api_base_url = api_base_url or ANNONARS_API_BASE_URL
-        #: HTTPX client
-        self.client = httpx.Client()
         #: Persistent cache for API responses
         self.cache = Cache()
 
-    def _get_variant_from_range(
-        self, variant: Union[SeqVar, StrucVar], start: int, stop: int
-    ) -> AnnonarsRangeResponse:
-        """Pull all variants within a range.
+    def _range_url(self, variant: Union[SeqVar, StrucVar], start: int, stop: int) -> str:
+        """Build the URL of a range request.
 
-        Args:
-            variant (Union[SeqVar, StrucVar]): Sequence or structural variant.
-            start (int): Start position.
-            stop (int): Stop position.
-
-        Returns:
-            AnnonarsRangeResponse: Annonars response.
+        Raises:
+            AnnonarsException: If the range is too large for a single request.
         """
-        if abs(stop - start) > 5000:
+        if abs(stop - start) > MAX_RANGE_SIZE:
             raise AnnonarsException("Range is too large for a single request.")
-
-        gr = variant.genome_release.name.lower()
-        chromosome = variant.chrom
-        url = (
+        return (
             f"{self.api_base_url}/annos/range?"
-            f"genome_release={gr}"
-            f"&chromosome={chromosome}"
+            f"genome_release={variant.genome_release.name.lower()}"
+            f"&chromosome={variant.chrom}"
             f"&start={start}"
             f"&stop={stop}"
         )
-        logger.debug("GET request to: {}", url)
 
-        cached_response = self.cache.get(url)
-        if cached_response:
-            try:
-                return AnnonarsRangeResponse.model_validate(cached_response)
-            except ValidationError as e:
-                logger.exception("Validation failed for cached data: {}", e)
-                raise AnnonarsException("Cached data is invalid") from e
+    def _variant_url(self, seqvar: SeqVar) -> str:
+        """Build the URL of a variant request."""
+        return (
+            f"{self.api_base_url}/annos/variant?"
+            f"genome_release={seqvar.genome_release.name.lower()}"
+            f"&chromosome={seqvar.chrom}"
+            f"&pos={seqvar.pos}"
+            f"&reference={seqvar.delete}"
+            f"&alternative={seqvar.insert}"
+        )
+
+    def _gene_url(self, hgnc_id: str) -> str:
+        """Build the URL of a gene request."""
+        return f"{self.api_base_url}/genes/info?hgnc_id={hgnc_id}"
 
-        response = self.client.get(url)
+    @staticmethod
+    def _check_response(response: httpx.Response) -> Any:
+        """Check the response status and return the decoded JSON data.
+
+        Raises:
+            AnnonarsException: If the request failed.
+        """
         if response.status_code != 200:
             logger.error("Request failed: {}", response.text)
             raise AnnonarsException(
                 f"Request failed. Status code: {response.status_code}, Text: {response.text}"
             )
+        response.raise_for_status()
+        return response.json()
+
+    @staticmethod
+    def _validate(model: Type[ModelT], data: Any) -> ModelT:
+        """Validate the response data against the response model.
+
+        Raises:
+            AnnonarsException: If the data does not validate.
+        """
         try:
-            response.raise_for_status()
-            response_data = response.json()
-            self.cache.add(url, response_data)
-            return AnnonarsRangeResponse.model_validate(response_data)
+            return model.model_validate(data)
         except ValidationError as e:
             logger.exception("Validation failed: {}", e)
             raise AnnonarsException("Annonars returned non-validating data.") from e
 
+    def _load_cached(self, model: Type[ModelT], url: str) -> Optional[ModelT]:
+        """Load a response from the persistent cache, see :meth:`Cache.get_response`.
+
+        Raises:
+            AnnonarsException: If the cached data does not validate.
+        """
+        try:
+            result = self.cache.get_response(url, model)
+        except ValidationError as e:
+            logger.exception("Validation failed for cached data: {}", e)
+            raise AnnonarsException("Cached data is invalid") from e
+        record_cache(result is not None)
+        return result
+
+    @staticmethod
+    def _split_range(start: int, stop: int) -> Iterator[Tuple[int, int]]:
+        """Split the range into chunks that fit into a single range request."""
+        current_start = start
+        while current_start < stop:
+            current_stop = min(current_start + MAX_RANGE_SIZE - 1, stop)
+            yield current_start, current_stop
+            current_start = current_stop + 1
+
+    @staticmethod
+    def _merge_ranges(
+        results: Sequence[Union[AnnonarsRangeResult, AnnonarsCustomRangeResult]],
+    ) -> AnnonarsCustomRangeResult:
+        """Merge the chunks of a range request, given in genomic order, into one result.
+
+        The records are copied once into fresh lists, so the chunk results are left untouched. A
+        field is None only if it is None in all chunks.
+        """
+        gnomad_genomes = [r.gnomad_genomes for r in results if r.gnomad_genomes is not None]
+        clinvar = [r.clinvar for r in results if r.clinvar is not None]
+        return AnnonarsCustomRangeResult(
+            gnomad_genomes=list(chain.from_iterable(gnomad_genomes)) if gnomad_genomes else None,
+            clinvar=list(chain.from_iterable(clinvar)) if clinvar else None,
+        )
+
+    @staticmethod
+    def _gnomad_interval(item: GnomadGenome) -> Tuple[Optional[int], Optional[int]]:
+        """Return the first and last position of the reference allele of a gnomAD record."""
+        if item.pos is None:
+            return None, None
+        return item.pos, item.pos + max(len(item.refAllele or ""), 1) - 1
+
+    @staticmethod
+    def _clinvar_interval(item: ClinvarItem) -> Tuple[Optional[int], Optional[int]]:
+        """Return the first and last position of a ClinVar record, if known."""
+        if not item.records:
+            return None, None
+        location = item.records[0].sequenceLocation
+        first = location.positionVcf if location.positionVcf is not None else location.start
+        if first is None:
+            return None, None
+        last = first + max(len(location.referenceAlleleVcf or ""), 1) - 1
+        if location.stop is not None:
+            last = max(last, location.stop)
+        return first, last
+
+    @classmethod
+    def _filter_records(
+        cls,
+        result: Union[AnnonarsRangeResult, AnnonarsCustomRangeResult],
+        keep: Callable[[Optional[int], Optional[int]], bool],
+    ) -> AnnonarsCustomRangeResult:
+        """Keep the records for whose first and last position ``keep`` returns True."""
+        return AnnonarsCustomRangeResult(
+            gnomad_genomes=(
+                [g for g in result.gnomad_genomes if keep(*cls._gnomad_interval(g))]
+                if result.gnomad_genomes is not None
+                else None
+            ),
+            clinvar=(
+                [c for c in result.clinvar if keep(*cls._clinvar_interval(c))]
+                if result.clinvar is not None
+                else None
+            ),
+        )
+
+    @classmethod
+    def _clip_range(
+        cls,
+        result: Union[AnnonarsRangeResult, AnnonarsCustomRangeResult],
+        start: int,
+        stop: int,
+    ) -> AnnonarsCustomRangeResult:
+        """Keep only the records overlapping ``[start, stop]``, like a range query of Annonars.
+
+        Records without a known position are kept, as they cannot be attributed to a sub-range.
+        """
+
+        def overlaps(first: Optional[int], last: Optional[int]) -> bool:
+            return first is None or last is None or (first <= stop and last >= start)
+
+        return cls._filter_records(result, overlaps)
+
+    @classmethod
+    def _merge_bins(
+        cls, bins: Sequence[Tuple[int, AnnonarsCustomRangeResult]]
+    ) -> AnnonarsCustomRangeResult:
+        """Merge adjacent bins of the range cache, given in genomic order with their start.
+
+        A record overlapping several bins is in all of them, so it is only kept in the first:
+        later bins drop the records starting before them, and the records without a position.
+        """
+
+        def starts_within(bin_start: int) -> Callable[[Optional[int], Optional[int]], bool]:
+            return lambda first, last: first is not None and first >= bin_start
+
+        return cls._merge_ranges(
+            [
+                result if i == 0 else cls._filter_records(result, starts_within(bin_start))
+                for i, (bin_start, result) in enumerate(bins)
+            ]
+        )
+
+
+class AnnonarsClient(AnnonarsClientBase):
+    @property
+    def client(self) -> httpx.Client:
+        """Shared HTTPX client, looked up on each use as the shared clients may be replaced."""
+        return get_http_client()
+
+    def _get(self, url: str) -> Any:
+        """Perform the GET request.
+
+        Raises:
+            AnnonarsException: If the request failed.
+        """
+        with span("annonars.http"):
+            response = self.client.get(url)
+            record_bytes(len(response.content))
+            response_data = self._check_response(response)
+        return response_data
+
+    def _get_model(self, model: Type[ModelT], url: str) -> ModelT:
+        """Get a validated response, shared within an active request memo.
+
+        The response is the same object for all callers of the memo, so it must not be modified.
+
+        Raises:
+            AnnonarsException: If the request failed or the data does not validate.
+        """
+        memo = get_request_memo()
+        if memo is not None:
+            return memo.get_or_fetch((url, model), lambda: self._load_model(model, url))
+        return self._load_model(model, url)
+
+    def _load_model(self, model: Type[ModelT], url: str) -> ModelT:
+        """Load a validated response, trying the in-memory and the persistent cache first."""
+        logger.debug("GET request to: {}", url)
+        result = self.cache.get_model(url, model)
+        if result is not None:
+            record_cache(True)
+            return result
+        result = self._load_cached(model, url)
+        if result is None:
+            response_data = self._get(url)
+            result = self._validate(model, response_data)
+            self.cache.add_response(url, response_data, model)
+        self.cache.add_model(url, result)
+        return result
+
+    def _get_variant_from_range(
+        self, variant: Union[SeqVar, StrucVar], start: int, stop: int
+    ) -> AnnonarsRangeResponse:
+        """Pull all variants within a range.
+
+        Args:
+            variant (Union[SeqVar, StrucVar]): Sequence or structural variant.
+            start (int): Start position.
+            stop (int): Stop position.
+
+        Returns:
+            AnnonarsRangeResponse: Annonars response.
+        """
+        return self._get_model(AnnonarsRangeResponse, self._range_url(variant, start, stop))
+
+    def _fetch_chunks(
+        self, variant: Union[SeqVar, StrucVar], chunks: Sequence[Tuple[int, int]]
+    ) -> List[AnnonarsRangeResponse]:
+        """Fetch the range chunks concurrently and return the responses in the order of chunks."""
+        max_workers = min(len(chunks), settings.AUTO_ACMG_ANNONARS_RANGE_CONCURRENCY)
+        if max_workers <= 1:
+            return [self._get_variant_from_range(variant, *chunk) for chunk in chunks]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(
+                    copy_context().run,
+                    self._get_variant_from_range,
+                    variant,
+                    chunk_start,
+                    chunk_stop,
+                )
+                for chunk_start, chunk_stop in chunks
+            ]
+            return [future.result() for future in futures]
+
+    @timed("annonars.get_variant_from_range")
     def get_variant_from_range(
         self, variant: Union[SeqVar, StrucVar], start: int, stop: int
     ) -> AnnonarsCustomRangeResult:
@@ -88,26 +327,46 @@ class AnnonarsClient:
             start (int): Start position.
             stop (int): Stop position.
 
+        Note:
+            The chunks are fetched concurrently with up to
+            ``settings.AUTO_ACMG_ANNONARS_RANGE_CONCURRENCY`` workers and merged in genomic order.
+            If ``settings.AUTO_ACMG_USE_RANGE_CACHE`` is set, the range is answered from the bins
+            of the range cache and only the missing bins are fetched.
+
         Returns:
             AnnonarsRangeResponse: Annonars response.
         """
-        MAX_RANGE_SIZE = 5000
-        res = AnnonarsCustomRangeResult()
-        current_start = start
-        while current_start < stop:
-            current_stop = min(current_start + MAX_RANGE_SIZE - 1, stop)
-            response = self._get_variant_from_range(variant, current_start, current_stop)
-            if res.gnomad_genomes is None:
-                res.gnomad_genomes = response.result.gnomad_genomes
-            else:
-                res.gnomad_genomes.extend(response.result.gnomad_genomes or [])
-            if res.clinvar is None:
-                res.clinvar = response.result.clinvar
-            else:
-                res.clinvar.extend(response.result.clinvar or [])
-            current_start = current_stop + 1
-        return res
+        if settings.AUTO_ACMG_USE_RANGE_CACHE:
+            return self._get_variant_from_range_cache(variant, start, stop)
+        responses = self._fetch_chunks(variant, list(self._split_range(start, stop)))
+        return self._merge_ranges([response.result for response in responses])
+
+    def _get_variant_from_range_cache(
+        self, variant: Union[SeqVar, StrucVar], start: int, stop: int
+    ) -> AnnonarsCustomRangeResult:
+        """Answer a range query from the range cache, fetching the missing bins."""
+        range_cache = get_range_cache()
+        release = variant.genome_release.name.lower()
+        indices = range_cache.bin_indices(start, stop)
+        bins: Dict[int, AnnonarsCustomRangeResult] = {}
+        for index in indices:
+            cached_bin = range_cache.get(self.api_base_url, release, variant.chrom, index)
+            if cached_bin is not None:
+                bins[index] = cached_bin
+        missing = [index for index in indices if index not in bins]
+        if missing:
+            logger.debug("Fetching {} of {} range cache bins", len(missing), len(indices))
+            chunks = [range_cache.bin_interval(index) for index in missing]
+            responses = self._fetch_chunks(variant, chunks)
+            for index, chunk, response in zip(missing, chunks, responses):
+                bins[index] = self._clip_range(response.result, *chunk)
+                range_cache.add(self.api_base_url, release, variant.chrom, index, bins[index])
+        merged = self._merge_bins(
+            [(range_cache.bin_interval(index)[0], bins[index]) for index in indices]
+        )
+        return self._clip_range(merged, start, stop)
 
+    @timed("annonars.get_variant_info")
     def get_variant_info(self, seqvar: SeqVar) -> AnnonarsVariantResponse:
         """Get variant information from Annonars.
 
@@ -117,39 +376,9 @@ class AnnonarsClient:
         Returns:
             Any: Annonars response.
         """
-        url = (
-            f"{self.api_base_url}/annos/variant?"
-            f"genome_release={seqvar.genome_release.name.lower()}"
-            f"&chromosome={seqvar.chrom}"
-            f"&pos={seqvar.pos}"
-            f"&reference={seqvar.delete}"
-            f"&alternative={seqvar.insert}"
-        )
-        logger.debug("GET request to: {}", url)
-
-        cached_response = self.cache.get(url)
-        if cached_response:
-            try:
-                return AnnonarsVariantResponse.model_validate(cached_response)
-            except ValidationError as e:
-                logger.exception("Validation failed for cached data: {}", e)
-                raise AnnonarsException("Cached data is invalid") from e
-
-        response = self.client.get(url)
-        if response.status_code != 200:
-            logger.error("Request failed: {}", response.text)
-            raise AnnonarsException(
-                f"Request failed. Status code: {response.status_code}, Text: {response.text}"
-            )
-        try:
-            response.raise_for_status()
-            response_data = response.json()
-            self.cache.add(url, response_data)
-            return AnnonarsVariantResponse.model_validate(response_data)
-        except ValidationError as e:
-            logger.exception("Validation failed: {}", e)
-            raise AnnonarsException("Annonars returned non-validating data.") from e
+        return self._get_model(AnnonarsVariantResponse, self._variant_url(seqvar))
 
+    @timed("annonars.get_gene_info")
     def get_gene_info(self, hgnc_id: str) -> AnnonarsGeneResponse:
         """Get gene information from Annonars.
 
@@ -159,27 +388,113 @@ class AnnonarsClient:
         Returns:
             Any: Annonars response.
         """
-        url = f"{self.api_base_url}/genes/info?hgnc_id={hgnc_id}"
+        return self._get_model(AnnonarsGeneResponse, self._gene_url(hgnc_id))
+
+
+class AsyncAnnonarsClient(AnnonarsClientBase):
+    """Asyncio counterpart of :class:`AnnonarsClient`."""
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared HTTPX async client of the running event loop."""
+        return get_async_http_client()
+
+    async def _get(self, url: str) -> Any:
+        """Perform the GET request.
+
+        Raises:
+            AnnonarsException: If the request failed.
+        """
+        with span("annonars.http"):
+            response = await self.client.get(url)
+            record_bytes(len(response.content))
+            response_data = self._check_response(response)
+        return response_data
+
+    async def _get_model(self, model: Type[ModelT], url: str) -> ModelT:
+        """Get a validated response, see :meth:`AnnonarsClient._get_model`."""
+        memo = get_request_memo()
+        if memo is not None:
+            return await memo.get_or_fetch_async((url, model), lambda: self._load_model(model, url))
+        return await self._load_model(model, url)
+
+    async def _load_model(self, model: Type[ModelT], url: str) -> ModelT:
+        """Load a validated response, see :meth:`AnnonarsClient._load_model`."""
         logger.debug("GET request to: {}", url)
+        result = self.cache.get_model(url, model)
+        if result is not None:
+            record_cache(True)
+            return result
+        # The persistent cache does blocking file or database I/O, keep it off the event loop.
+        result = await asyncio.to_thread(self._load_cached, model, url)
+        if result is None:
+            response_data = await self._get(url)
+            result = self._validate(model, response_data)
+            await asyncio.to_thread(self.cache.add_response, url, response_data, model)
+        self.cache.add_model(url, result)
+        return result
 
-        cached_response = self.cache.get(url)
-        if cached_response:
-            try:
-                return AnnonarsGeneResponse.model_validate(cached_response)
-            except ValidationError as e:
-                logger.exception("Validation failed for cached data: {}", e)
-                raise AnnonarsException("Cached data is invalid") from e
+    async def _get_variant_from_range(
+        self, variant: Union[SeqVar, StrucVar], start: int, stop: int
+    ) -> AnnonarsRangeResponse:
+        """Pull all variants within a range, see :meth:`AnnonarsClient._get_variant_from_range`."""
+        return await self._get_model(AnnonarsRangeResponse, self._range_url(variant, start, stop))
 
-        response = self.client.get(url)
-        if response.status_code != 200:
-            logger.error("Request failed: {}", response.text)
-            raise AnnonarsException(
-                f"Request failed. Status code: {response.status_code}, Text: {response.text}"
-            )
-        try:
-            response_data = response.json()
-            self.cache.add(url, response_data)
-            return AnnonarsGeneResponse.model_validate(response_data)
-        except ValidationError as e:
-            logger.exception("Validation failed: {}", e)
-            raise AnnonarsException("Annonars returned non-validating data.") from e
+    async def _fetch_chunks(
+        self, variant: Union[SeqVar, StrucVar], chunks: Sequence[Tuple[int, int]]
+    ) -> List[AnnonarsRangeResponse]:
+        """Fetch the range chunks concurrently and return the responses in the order of chunks."""
+        semaphore = asyncio.Semaphore(max(1, settings.AUTO_ACMG_ANNONARS_RANGE_CONCURRENCY))
+
+        async def fetch_chunk(chunk: Tuple[int, int]) -> AnnonarsRangeResponse:
+            async with semaphore:
+                return await self._get_variant_from_range(variant, *chunk)
+
+        return list(await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks)))
+
+    @timed("annonars.get_variant_from_range")
+    async def get_variant_from_range(
+        self, variant: Union[SeqVar, StrucVar], start: int, stop: int
+    ) -> AnnonarsCustomRangeResult:
+        """Pull all variants within a range of any size, see
+        :meth:`AnnonarsClient.get_variant_from_range`."""
+        if settings.AUTO_ACMG_USE_RANGE_CACHE:
+            return await self._get_variant_from_range_cache(variant, start, stop)
+        responses = await self._fetch_chunks(variant, list(self._split_range(start, stop)))
+        return self._merge_ranges([response.result for response in responses])
+
+    async def _get_variant_from_range_cache(
+        self, variant: Union[SeqVar, StrucVar], start: int, stop: int
+    ) -> AnnonarsCustomRangeResult:
+        """Answer a range query from the range cache, see
+        :meth:`AnnonarsClient._get_variant_from_range_cache`."""
+        range_cache = get_range_cache()
+        release = variant.genome_release.name.lower()
+        indices = range_cache.bin_indices(start, stop)
+        bins: Dict[int, AnnonarsCustomRangeResult] = {}
+        for index in indices:
+            cached_bin = range_cache.get(self.api_base_url, release, variant.chrom, index)
+            if cached_bin is not None:
+                bins[index] = cached_bin
+        missing = [index for index in indices if index not in bins]
+        if missing:
+            logger.debug("Fetching {} of {} range cache bins", len(missing), len(indices))
+            chunks = [range_cache.bin_interval(index) for index in missing]
+            responses = await self._fetch_chunks(variant, chunks)
+            for index, chunk, response in zip(missing, chunks, responses):
+                bins[index] = self._clip_range(response.result, *chunk)
+                range_cache.add(self.api_base_url, release, variant.chrom, index, bins[index])
+        merged = self._merge_bins(
+            [(range_cache.bin_interval(index)[0], bins[index]) for index in indices]
+        )
+        return self._clip_range(merged, start, stop)
+
+    @timed("annonars.get_variant_info")
+    async def get_variant_info(self, seqvar: SeqVar) -> AnnonarsVariantResponse:
+        """Get variant information from Annonars, see :meth:`AnnonarsClient.get_variant_info`."""
+        return await self._get_model(AnnonarsVariantResponse, self._variant_url(seqvar))
+
+    @timed("annonars.get_gene_info")
+    async def get_gene_info(self, hgnc_id: str) -> AnnonarsGeneResponse:
+        """Get gene information from Annonars, see :meth:`AnnonarsClient.get_gene_info`."""
+        return await self._get_model(AnnonarsGeneResponse, self._gene_url(hgnc_id))
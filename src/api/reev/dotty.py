@@ -1,13 +1,16 @@
 """Dotty API client."""
 
-from typing import Optional
+import asyncio
+from typing import Any, Optional
 
 import httpx
 from loguru import logger
 from pydantic import ValidationError
 
-from src.core.cache import Cache
+from src.core.cache import Cache, get_request_memo
 from src.core.config import settings
+from src.core.http import get_async_http_client, get_http_client
+from src.core.timing import record_bytes, record_cache, span, timed
 from src.defs.dotty import DottySpdiResponse
 from src.defs.genome_builds import GenomeRelease
 
@@ -15,15 +18,85 @@ from src.defs.genome_builds import GenomeRelease
 DOTTI_API_BASE_URL = settings.AUTO_ACMG_API_DOTTY_URL or f"{settings.API_REEV_URL}/dotty"
 
 
-class DottyClient:
+class DottyClientBase:
+    """Request building and response handling shared by the Dotty clients."""
+
     def __init__(self, *, api_base_url: Optional[str] = None):
         #: Dotty API base URL
         self.api_base_url = api_base_url or DOTTI_API_BASE_URL
-        #: HTTPX client
-        self.client = httpx.Client()
         #: Persistent cache for API responses
         self.cache = Cache()
 
+    def _spdi_url(self, query: str, assembly: GenomeRelease) -> str:
+        """Build the URL of a SPDI conversion request."""
+        return f"{self.api_base_url}/api/v1/to-spdi?q={query}&assembly={assembly.name}"
+
+    @staticmethod
+    def _check_response(response: httpx.Response) -> Any:
+        """Check the response status and return the decoded JSON data or None on failure."""
+        if response.status_code != 200:
+            logger.error("Request failed: {}", response.text)
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    @staticmethod
+    def _validate(data: Any, *, cached: bool = False) -> DottySpdiResponse | None:
+        """Validate the response data, return None if it does not validate."""
+        if data is None:
+            return None
+        try:
+            return DottySpdiResponse.model_validate(data)
+        except ValidationError as e:
+            if cached:
+                logger.exception("Validation failed for cached data: {}", e)
+            else:
+                logger.exception("Validation failed: {}", e)
+            return None
+
+
+class DottyClient(DottyClientBase):
+    @property
+    def client(self) -> httpx.Client:
+        """Shared HTTPX client, looked up on each use as the shared clients may be replaced."""
+        return get_http_client()
+
+    def _get(self, url: str) -> Any:
+        """Perform the GET request and add the response to the persistent cache."""
+        with span("dotty.http") as request_span:
+            response = self.client.get(url)
+            record_bytes(len(response.content))
+            response_data = self._check_response(response)
+            request_span.error = response_data is None
+        if response_data is not None:
+            self.cache.add(url, response_data)
+        return response_data
+
+    def _get_spdi(self, url: str) -> DottySpdiResponse | None:
+        """Get a validated response, shared within an active request memo."""
+        memo = get_request_memo()
+        if memo is not None:
+            return memo.get_or_fetch((url, DottySpdiResponse), lambda: self._load_spdi(url))
+        return self._load_spdi(url)
+
+    def _load_spdi(self, url: str) -> DottySpdiResponse | None:
+        """Load a validated response, trying the in-memory and the persistent cache first."""
+        logger.debug("GET request to: {}", url)
+        result = self.cache.get_model(url, DottySpdiResponse)
+        if result is not None:
+            record_cache(True)
+            return result
+        cached_response = self.cache.get(url)
+        record_cache(bool(cached_response))
+        if cached_response:
+            result = self._validate(cached_response, cached=True)
+        else:
+            result = self._validate(self._get(url))
+        if result is not None:
+            self.cache.add_model(url, result)
+        return result
+
+    @timed("dotty.to_spdi")
     def to_spdi(
         self, query: str, assembly: GenomeRelease = GenomeRelease.GRCh38
     ) -> DottySpdiResponse | None:
@@ -37,29 +110,58 @@ class DottyClient:
         :return: SPDI format
         :rtype: dict | None
         """
-        url = f"{self.api_base_url}/api/v1/to-spdi?q={query}&assembly={assembly.name}"
-        logger.debug("GET request to: {}", url)
+        return self._get_spdi(self._spdi_url(query, assembly))
 
-        cached_response = self.cache.get(url)
+
+class AsyncDottyClient(DottyClientBase):
+    """Asyncio counterpart of :class:`DottyClient`."""
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared HTTPX async client of the running event loop."""
+        return get_async_http_client()
+
+    async def _get(self, url: str) -> Any:
+        """Perform the GET request and add the response to the persistent cache."""
+        with span("dotty.http") as request_span:
+            response = await self.client.get(url)
+            record_bytes(len(response.content))
+            response_data = self._check_response(response)
+            request_span.error = response_data is None
+        if response_data is not None:
+            await asyncio.to_thread(self.cache.add, url, response_data)
+        return response_data
+
+    async def _get_spdi(self, url: str) -> DottySpdiResponse | None:
+        """Get a validated response, see :meth:`DottyClient._get_spdi`."""
+        memo = get_request_memo()
+        if memo is not None:
+            return await memo.get_or_fetch_async(
+                (url, DottySpdiResponse), lambda: self._load_spdi(url)
+            )
+        return await self._load_spdi(url)
+
+    async def _load_spdi(self, url: str) -> DottySpdiResponse | None:
+        """Load a validated response, see :meth:`DottyClient._load_spdi`."""
+        logger.debug("GET request to: {}", url)
+        result = self.cache.get_model(url, DottySpdiResponse)
+        if result is not None:
+            record_cache(True)
+            return result
+        # The persistent cache does blocking file or database I/O, keep it off the event loop.
+        cached_response = await asyncio.to_thread(self.cache.get, url)
+        record_cache(bool(cached_response))
         if cached_response:
-            try:
-                return DottySpdiResponse.model_validate(cached_response)
-            except ValidationError as e:
-                logger.exception("Validation failed for cached data: {}", e)
-                return None
+            result = self._validate(cached_response, cached=True)
+        else:
+            result = self._validate(await self._get(url))
+        if result is not None:
+            self.cache.add_model(url, result)
+        return result
 
-        response = self.client.get(url)
-        if response.status_code != 200:
-            logger.error("Request failed: {}", response.text)
-            return None
-        try:
-            response.raise_for_status()
-            response_data = response.json()
-            self.cache.add(url, response_data)
-            return DottySpdiResponse.model_validate(response_data)
-        except httpx.RequestError as e:
-            logger.exception("Request failed: {}", e)
-            return None
-        except ValidationError as e:
-            logger.exception("Validation failed: {}", e)
-            return None
+    @timed("dotty.to_spdi")
+    async def to_spdi(
+        self, query: str, assembly: GenomeRelease = GenomeRelease.GRCh38
+    ) -> DottySpdiResponse | None:
+        """Converts a variant to SPDI format, see :meth:`DottyClient.to_spdi`."""
+        return await self._get_spdi(self._spdi_url(query, assembly))
@@ -1,13 +1,16 @@
 """Mehari API client."""
 
-from typing import Optional
+import asyncio
+from typing import Any, Optional, Type, TypeVar
 
 import httpx
 from loguru import logger
-from pydantic import ValidationError
+from pydantic import BaseModel, ValidationError
 
-from src.core.cache import Cache
+from src.core.cache import Cache, get_request_memo
 from src.core.config import settings
+from src.core.http import get_async_http_client, get_http_client
+from src.core.timing import record_bytes, record_cache, span, timed
 from src.defs.exceptions import MehariException
 from src.defs.genome_builds import GenomeRelease
 from src.defs.mehari import GeneTranscripts, TranscriptsSeqVar, TranscriptsStrucVar
@@ -17,27 +20,28 @@ from src.defs.strucvar import StrucVar
 #: Mehari API base URL
 MEHARI_API_BASE_URL = settings.AUTO_ACMG_API_MEHARI_URL or f"{settings.API_REEV_URL}/mehari"
 
+#: Mapping of genome releases to Mehari genome builds
+GENOME_BUILD_MAPPING = {
+    GenomeRelease.GRCh37: "GENOME_BUILD_GRCH37",
+    GenomeRelease.GRCh38: "GENOME_BUILD_GRCH38",
+}
+
+#: Type variable for the response models
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+class MehariClientBase:
+    """Request building and response handling shared by the Mehari clients."""
 
-class MehariClient:
     def __init__(self, *, api_base_url: Optional[str] = None):
         #: Mehari API base URL
         self.api_base_url = api_base_url or MEHARI_API_BASE_URL
-        #: HTTPX client
-        self.client = httpx.Client()
         #: Persistent cache for API responses
         self.cache = Cache()
 
-    def get_seqvar_transcripts(self, seqvar: SeqVar) -> TranscriptsSeqVar:
-        """
-        Get transcripts for a sequence variant.
-
-        :param seqvar: Sequence variant
-        :type seqvar: SeqVar
-        :return: Transcripts
-        :rtype: TranscriptsSeqVar
-        :raises MehariException: if the request failed
-        """
-        url = (
+    def _seqvar_url(self, seqvar: SeqVar) -> str:
+        """Build the URL of a sequence variant consequence request."""
+        return (
             f"{self.api_base_url}/seqvars/csq?"
             f"genome_release={seqvar.genome_release.name.lower()}"
             f"&chromosome={seqvar.chrom}"
@@ -45,32 +49,126 @@ class MehariClient:
             f"&reference={seqvar.delete}"
             f"&alternative={seqvar.insert}"
         )
-        logger.debug("GET request to: {}", url)
-        print("api_base_url", self.api_base_url)
 
-        cached_response = self.cache.get(url)
-        if cached_response:
-            try:
-                return TranscriptsSeqVar.model_validate(cached_response)
-            except ValidationError as e:
-                logger.exception("Validation failed for cached data: {}", e)
-                raise MehariException("Cached data is invalid") from e
+    def _strucvar_url(self, strucvar: StrucVar) -> str:
+        """Build the URL of a structural variant consequence request."""
+        return (
+            f"{self.api_base_url}/strucvars/csq?"
+            f"genome_release={strucvar.genome_release.name.lower()}"
+            f"&chromosome={strucvar.chrom}"
+            f"&start={strucvar.start}"
+            f"&stop={strucvar.stop}"
+            f"&sv_type={strucvar.sv_type.name.upper()}"
+        )
 
-        response = self.client.get(url)
+    def _gene_url(self, hgnc_id: str, genome_build: GenomeRelease) -> str:
+        """Build the URL of a gene transcripts request."""
+        return (
+            f"{self.api_base_url}/genes/txs?"
+            f"hgncId={hgnc_id}"
+            f"&genomeBuild={GENOME_BUILD_MAPPING[genome_build]}"
+        )
+
+    @staticmethod
+    def _check_response(response: httpx.Response) -> Any:
+        """Check the response status and return the decoded JSON data.
+
+        :raises MehariException: if the request failed
+        """
         if response.status_code != 200:
             logger.error("Request failed: {}", response.text)
             raise MehariException(
                 f"Request failed. Status code: {response.status_code}, Text: {response.text}"
             )
+        response.raise_for_status()
+        return response.json()
+
+    @staticmethod
+    def _validate(model: Type[ModelT], data: Any) -> ModelT:
+        """Validate the response data against the response model.
+
+        :raises MehariException: if the data does not validate
+        """
         try:
-            response.raise_for_status()
-            response_data = response.json()
-            self.cache.add(url, response_data)
-            return TranscriptsSeqVar.model_validate(response_data)
+            return model.model_validate(data)
         except ValidationError as e:
             logger.exception("Validation failed: {}", e)
             raise MehariException("Mehari API returned invalid data") from e
 
+    def _load_cached(self, model: Type[ModelT], url: str) -> Optional[ModelT]:
+        """Load a response from the persistent cache, see :meth:`Cache.get_response`.
+
+        :raises MehariException: if the cached data does not validate
+        """
+        try:
+            result = self.cache.get_response(url, model)
+        except ValidationError as e:
+            logger.exception("Validation failed for cached data: {}", e)
+            raise MehariException("Cached data is invalid") from e
+        record_cache(result is not None)
+        return result
+
+
+class MehariClient(MehariClientBase):
+    @property
+    def client(self) -> httpx.Client:
+        """Shared HTTPX client, looked up on each use as the shared clients may be replaced."""
+        return get_http_client()
+
+    def _get(self, url: str) -> Any:
+        """
+        Perform the GET request.
+
+        :raises MehariException: if the request failed
+        """
+        with span("mehari.http"):
+            response = self.client.get(url)
+            record_bytes(len(response.content))
+            response_data = self._check_response(response)
+        return response_data
+
+    def _get_model(self, model: Type[ModelT], url: str) -> ModelT:
+        """
+        Get a validated response, shared within an active request memo.
+
+        The response is the same object for all callers of the memo, so it must not be modified.
+
+        :raises MehariException: if the request failed or the data does not validate
+        """
+        memo = get_request_memo()
+        if memo is not None:
+            return memo.get_or_fetch((url, model), lambda: self._load_model(model, url))
+        return self._load_model(model, url)
+
+    def _load_model(self, model: Type[ModelT], url: str) -> ModelT:
+        """Load a validated response, trying the in-memory and the persistent cache first."""
+        logger.debug("GET request to: {}", url)
+        result = self.cache.get_model(url, model)
+        if result is not None:
+            record_cache(True)
+            return result
+        result = self._load_cached(model, url)
+        if result is None:
+            response_data = self._get(url)
+            result = self._validate(model, response_data)
+            self.cache.add_response(url, response_data, model)
+        self.cache.add_model(url, result)
+        return result
+
+    @timed("mehari.get_seqvar_transcripts")
+    def get_seqvar_transcripts(self, seqvar: SeqVar) -> TranscriptsSeqVar:
+        """
+        Get transcripts for a sequence variant.
+
+        :param seqvar: Sequence variant
+        :type seqvar: SeqVar
+        :return: Transcripts
+        :rtype: TranscriptsSeqVar
+        :raises MehariException: if the request failed
+        """
+        return self._get_model(TranscriptsSeqVar, self._seqvar_url(seqvar))
+
+    @timed("mehari.get_strucvar_transcripts")
     def get_strucvar_transcripts(self, strucvar: StrucVar) -> TranscriptsStrucVar:
         """
         Get transcripts for a structural variant.
@@ -81,41 +179,11 @@ class MehariClient:
         :rtype: TranscriptsStrucVar
         :raises MehariException: if the request failed
         """
-        url = (
-            f"{self.api_base_url}/strucvars/csq?"
-            f"genome_release={strucvar.genome_release.name.lower()}"
-            f"&chromosome={strucvar.chrom}"
-            f"&start={strucvar.start}"
-            f"&stop={strucvar.stop}"
-            f"&sv_type={strucvar.sv_type.name.upper()}"
-        )
-        logger.debug("GET request to: {}", url)
-
-        cached_response = self.cache.get(url)
-        if cached_response:
-            try:
-                return TranscriptsStrucVar.model_validate(cached_response)
-            except ValidationError as e:
-                logger.exception("Validation failed for cached data: {}", e)
-                raise MehariException("Cached data is invalid") from e
-
-        response = self.client.get(url)
-        if response.status_code != 200:
-            logger.error("Request failed: {}", response.text)
-            raise MehariException(
-                f"Request failed. Status code: {response.status_code}, Text: {response.text}"
-            )
-        try:
-            response.raise_for_status()
-            response_data = response.json()
-            self.cache.add(url, response_data)
-            return TranscriptsStrucVar.model_validate(response_data)
-        except ValidationError as e:
-            logger.exception("Validation failed: {}", e)
-            raise MehariException("Mehari API returned invalid data") from e
+        return self._get_model(TranscriptsStrucVar, self._strucvar_url(strucvar))
 
+    @timed("mehari.get_gene_transcripts")
     def get_gene_transcripts(self, hgnc_id: str, genome_build: GenomeRelease) -> GeneTranscripts:
-        """ "
+        """
         Get transcripts for a gene.
 
         :param hgnc_id: HGNC gene ID
@@ -126,36 +194,70 @@ class MehariClient:
         :rtype: GeneTranscripts
         :raises MehariException: if the request failed
         """
-        genome_build_mapping = {
-            GenomeRelease.GRCh37: "GENOME_BUILD_GRCH37",
-            GenomeRelease.GRCh38: "GENOME_BUILD_GRCH38",
-        }
-        url = (
-            f"{self.api_base_url}/genes/txs?"
-            f"hgncId={hgnc_id}"
-            f"&genomeBuild={genome_build_mapping[genome_build]}"
-        )
+        return self._get_model(GeneTranscripts, self._gene_url(hgnc_id, genome_build))
+
+
+class AsyncMehariClient(MehariClientBase):
+    """Asyncio counterpart of :class:`MehariClient`."""
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared HTTPX async client of the running event loop."""
+        return get_async_http_client()
+
+    async def _get(self, url: str) -> Any:
+        """
+        Perform the GET request.
+
+        :raises MehariException: if the request failed
+        """
+        with span("mehari.http"):
+            response = await self.client.get(url)
+            record_bytes(len(response.content))
+            response_data = self._check_response(response)
+        return response_data
+
+    async def _get_model(self, model: Type[ModelT], url: str) -> ModelT:
+        """Get a validated response, see :meth:`MehariClient._get_model`."""
+        memo = get_request_memo()
+        if memo is not None:
+            return await memo.get_or_fetch_async((url, model), lambda: self._load_model(model, url))
+        return await self._load_model(model, url)
+
+    async def _load_model(self, model: Type[ModelT], url: str) -> ModelT:
+        """Load a validated response, see :meth:`MehariClient._load_model`."""
         logger.debug("GET request to: {}", url)
+        result = self.cache.get_model(url, model)
+        if result is not None:
+            record_cache(True)
+            return result
+        # The persistent cache does blocking file or database I/O, keep it off the event loop.
+        result = await asyncio.to_thread(self._load_cached, model, url)
+        if result is None:
+            response_data = await self._get(url)
+            result = self._validate(model, response_data)
+            await asyncio.to_thread(self.cache.add_response, url, response_data, model)
+        self.cache.add_model(url, result)
+        return result
 
-        cached_response = self.cache.get(url)
-        if cached_response:
-            try:
-                return GeneTranscripts.model_validate(cached_response)
-            except ValidationError as e:
-                logger.exception("Validation failed for cached data: {}", e)
-                raise MehariException("Cached data is invalid") from e
+    @timed("mehari.get_seqvar_transcripts")
+    async def get_seqvar_transcripts(self, seqvar: SeqVar) -> TranscriptsSeqVar:
+        """
+        Get transcripts for a sequence variant, see :meth:`MehariClient.get_seqvar_transcripts`.
+        """
+        return await self._get_model(TranscriptsSeqVar, self._seqvar_url(seqvar))
 
-        response = httpx.get(url)
-        if response.status_code != 200:
-            logger.error("Request failed: {}", response.text)
-            raise MehariException(
-                f"Request failed. Status code: {response.status_code}, Text: {response.text}"
-            )
-        try:
-            response.raise_for_status()
-            response_data = response.json()
-            self.cache.add(url, response_data)
-            return GeneTranscripts.model_validate(response_data)
-        except ValidationError as e:
-            logger.exception("Validation failed: {}", e)
-            raise MehariException("Mehari API returned invalid data") from e
+    @timed("mehari.get_strucvar_transcripts")
+    async def get_strucvar_transcripts(self, strucvar: StrucVar) -> TranscriptsStrucVar:
+        """
+        Get transcripts for a structural variant, see
+        :meth:`MehariClient.get_strucvar_transcripts`.
+        """
+        return await self._get_model(TranscriptsStrucVar, self._strucvar_url(strucvar))
+
+    @timed("mehari.get_gene_transcripts")
+    async def get_gene_transcripts(
+        self, hgnc_id: str, genome_build: GenomeRelease
+    ) -> GeneTranscripts:
+        """Get transcripts for a gene, see :meth:`MehariClient.get_gene_transcripts`."""
+        return await self._get_model(GeneTranscripts, self._gene_url(hgnc_id, genome_build))
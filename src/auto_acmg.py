@@ -1,13 +1,28 @@
 """Implementations of the PVS1 algorithm."""
 
-from typing import Optional, Type, Union
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from contextvars import copy_context
+from typing import Dict, List, Optional, Sequence, Type, Union
 
 from loguru import logger
 
 from src.api.reev.annonars import AnnonarsClient
+from src.core.cache import RequestMemo, get_request_memo, request_memo
 from src.core.config import settings
+from src.core.metrics import PREDICTION_DURATION
+from src.core.prediction_cache import get_prediction_cache, predictor_fingerprint
+from src.core.timing import collect_timings, record_cache, span, timed
 from src.defs.annonars_variant import VariantResult
-from src.defs.auto_acmg import AutoACMGSeqVarResult, AutoACMGStrucVarResult, CdsInfo, GenomicStrand
+from src.defs.auto_acmg import (
+    AutoACMGBatchResult,
+    AutoACMGOptions,
+    AutoACMGSeqVarResult,
+    AutoACMGStrucVarResult,
+    CdsInfo,
+    GenomicStrand,
+)
 from src.defs.exceptions import AlgorithmError, AutoAcmgBaseException, ParseError
 from src.defs.genome_builds import GenomeRelease
 from src.defs.mehari import CdsPos, ProteinPos, TxPos
@@ -179,12 +194,14 @@ class AutoACMG:
         self,
         variant_name: str,
         genome_release: GenomeRelease = GenomeRelease.GRCh38,
+        options: Optional[AutoACMGOptions] = None,
     ):
         """Initializes the AutoACMG with the specified variant and genome release.
 
         Args:
             variant_name: The name or identifier of the variant.
             genome_release (Optional): The genome release version, such as GRCh38 or GRCh37.
+            options (Optional): The options of the prediction, defaults to the global settings.
         """
         #: Annonars client.
         self.annonars_client: AnnonarsClient = AnnonarsClient(
@@ -194,6 +211,14 @@ class AutoACMG:
         self.variant_name = variant_name
         #: The genome release version.
         self.genome_release = genome_release
+        #: The options of the prediction.
+        self.options = options or AutoACMGOptions.default()
+        #: Entity tag of the prediction, set if the prediction cache is used.
+        self.etag: Optional[str] = None
+        #: Name of the predictor class that made the prediction, set by :meth:`predict`.
+        self.predictor_name: Optional[str] = None
+        #: Whether the prediction was served from the prediction cache.
+        self.cached = False
         #: The resolved sequence variant.
         self.seqvar: Optional[SeqVar] = None
         #: The resolved structural variant.
@@ -247,6 +272,7 @@ class AutoACMG:
         except ValueError as e:
             raise AlgorithmError("Failed to convert score value to float.") from e
 
+    @timed("auto_acmg.parse_seqvar_data")
     def _parse_seqvar_data(self, seqvar: SeqVar) -> AutoACMGSeqVarResult:
         """Parses the data for the prediction.
 
@@ -373,6 +399,7 @@ class AutoACMG:
             self.seqvar_result.data.scores.misZ = gnomad_constraints.misZ
         return self.seqvar_result
 
+    @timed("auto_acmg.parse_strucvar_data")
     def _parse_strucvar_data(self, strucvar: StrucVar) -> AutoACMGStrucVarResult:
         """Parse the data for the prediction.
 
@@ -417,6 +444,7 @@ class AutoACMG:
             return VCEP_MAPPING[hgnc_id]
         return DefaultSeqVarPredictor
 
+    @timed("auto_acmg.resolve_variant")
     def resolve_variant(self) -> Union[SeqVar, StrucVar, None]:
         """Attempts to resolve the specified variant as either a sequence or structural variant.
 
@@ -456,6 +484,14 @@ class AutoACMG:
         This method first resolves the variant, then predicts the PVS1 criterion for sequence
         variants and other ACMG criteria.
 
+        Each distinct upstream resource (Annonars, Mehari, Dotty) is fetched once per prediction:
+        the lookups of the data parsing and all criteria share a request memo. Within
+        :meth:`predict_many`, the memo of the batch is used.
+
+        The stages of the prediction are timed, see :mod:`src.core.timing`. If
+        ``settings.AUTO_ACMG_ATTACH_TIMINGS`` is set, the timings of this prediction are attached to
+        the result.
+
         Note:
             The method can resolve both sequence and structural variants, but currently only
             sequence variants are supported for ACMG criteria prediction.
@@ -464,6 +500,74 @@ class AutoACMG:
             Exception: Specific exceptions are caught and logged, but generic exceptions may be
             raised if the prediction fails.
         """
+        collector = collect_timings() if settings.AUTO_ACMG_ATTACH_TIMINGS else nullcontext()
+        start = time.perf_counter()
+        try:
+            with request_memo(get_request_memo()), collector as timings:
+                with span("auto_acmg.predict"):
+                    prediction = self._predict()
+        finally:
+            PREDICTION_DURATION.observe(
+                time.perf_counter() - start,
+                (self.predictor_name or "none", "true" if self.cached else "false"),
+            )
+        if prediction is not None and timings is not None:
+            prediction.timings = timings.snapshot()
+        return prediction
+
+    def _get_cached_prediction(
+        self, variant: Union[SeqVar, StrucVar]
+    ) -> Union[AutoACMGSeqVarResult, AutoACMGStrucVarResult, None]:
+        """Return the cached prediction of the variant and set its ETag.
+
+        Predictions made by another predictor than the one now selected for the gene, or with
+        other versions of its VCEP specifications, are ignored.
+
+        Args:
+            variant: The resolved variant.
+
+        Returns:
+            The cached prediction, or None if there is no current one.
+        """
+        with span("prediction_cache.get"):
+            entry = get_prediction_cache().get(variant, self.options)
+            record_cache(entry is not None)
+        if entry is None:
+            return None
+        if entry.kind == "strucvar":
+            predictor_class: Type = DefaultStrucVarPredictor
+        else:
+            predictor_class = self._select_predictor(entry.hgnc_id)
+        if entry.predictor != predictor_fingerprint(predictor_class):
+            logger.debug("Ignoring the outdated cached prediction made by {}", entry.predictor)
+            return None
+        self.etag = entry.etag(variant)
+        self.predictor_name = predictor_class.__name__
+        self.cached = True
+        return entry.to_result(variant)
+
+    def _cache_prediction(
+        self,
+        variant: Union[SeqVar, StrucVar],
+        prediction: Union[AutoACMGSeqVarResult, AutoACMGStrucVarResult],
+        predictor_class: Type,
+        hgnc_id: str = "",
+    ) -> None:
+        """Store the prediction of the variant in the prediction cache and set its ETag.
+
+        Args:
+            variant: The resolved variant.
+            prediction: The prediction result.
+            predictor_class: The predictor that made the prediction.
+            hgnc_id: The HGNC ID of the gene the predictor was selected for.
+        """
+        entry = get_prediction_cache().put(
+            variant, self.options, prediction, predictor_fingerprint(predictor_class), hgnc_id
+        )
+        self.etag = entry.etag(variant)
+
+    def _predict(self) -> Union[AutoACMGSeqVarResult, AutoACMGStrucVarResult, None]:
+        """Predict ACMG criteria for the specified variant, see :meth:`predict`."""
         logger.info("Predicting ACMG criteria for variant: {}", self.variant_name)
         variant = self.resolve_variant()
         if not variant:
@@ -476,6 +580,12 @@ class AutoACMG:
             self.strucvar = variant
             self.strucvar_result.strucvar = self.strucvar
 
+        if settings.AUTO_ACMG_USE_PREDICTION_CACHE:
+            cached_prediction = self._get_cached_prediction(variant)
+            if cached_prediction is not None:
+                logger.info("Using the cached prediction for variant: {}", self.variant_name)
+                return cached_prediction
+
         if isinstance(self.seqvar, SeqVar):
             if not self.seqvar:
                 logger.error("Failed to resolve the sequence variant.")
@@ -486,9 +596,15 @@ class AutoACMG:
             # ====== Predict ======
             predictor_class = self._select_predictor(self.seqvar_result.data.hgnc_id)
             predictor = predictor_class(self.seqvar, self.seqvar_result)
-            seqvar_prediction = predictor.predict()
+            self.predictor_name = type(predictor).__name__
+            with span("auto_acmg.predict_criteria"):
+                seqvar_prediction = predictor.predict()
             # Debug
             logger.info("Prediction: {}", seqvar_prediction)
+            if settings.AUTO_ACMG_USE_PREDICTION_CACHE and seqvar_prediction is not None:
+                self._cache_prediction(
+                    self.seqvar, seqvar_prediction, predictor_class, seqvar_prediction.data.hgnc_id
+                )
             return seqvar_prediction
 
         elif isinstance(self.strucvar, StrucVar):
@@ -499,12 +615,106 @@ class AutoACMG:
             self._parse_strucvar_data(self.strucvar)
 
             # ====== Predict ======
-            sp = DefaultStrucVarPredictor(self.strucvar, self.strucvar_result)
-            strucvar_prediction = sp.predict()
+            sp = DefaultStrucVarPredictor(self.strucvar, self.strucvar_result, self.options)
+            self.predictor_name = type(sp).__name__
+            with span("auto_acmg.predict_criteria"):
+                strucvar_prediction = sp.predict()
             # Debug
             # logger.info("Prediction: {}", strucvar_prediction)
+            if settings.AUTO_ACMG_USE_PREDICTION_CACHE and strucvar_prediction is not None:
+                self._cache_prediction(self.strucvar, strucvar_prediction, DefaultStrucVarPredictor)
             return strucvar_prediction
 
         else:
             logger.info("Structural variants are not supported for ACMG criteria prediction yet.")
             return None
+
+    @classmethod
+    def _predict_batch_item(
+        cls,
+        variant_name: str,
+        genome_release: GenomeRelease,
+        memo: RequestMemo,
+        options: Optional[AutoACMGOptions] = None,
+    ) -> AutoACMGBatchResult:
+        """Predict a single variant of a batch, sharing upstream responses through ``memo``.
+
+        Args:
+            variant_name: The name or identifier of the variant.
+            genome_release: The genome release version.
+            memo: The request memo shared by the batch.
+            options: The options of the prediction.
+
+        Returns:
+            AutoACMGBatchResult: The prediction result or the error message.
+        """
+        with request_memo(memo):
+            try:
+                prediction = cls(variant_name, genome_release, options).predict()
+            except Exception as e:
+                logger.exception("Prediction failed for variant {}: {}", variant_name, e)
+                return AutoACMGBatchResult(variant_name=variant_name, error=str(e))
+        if prediction is None:
+            return AutoACMGBatchResult(
+                variant_name=variant_name, error="Failed to predict the variant."
+            )
+        return AutoACMGBatchResult(variant_name=variant_name, prediction=prediction)
+
+    @classmethod
+    def predict_many(
+        cls,
+        variants: Sequence[str],
+        genome_release: GenomeRelease = GenomeRelease.GRCh38,
+        *,
+        max_concurrency: Optional[int] = None,
+        options: Optional[AutoACMGOptions] = None,
+    ) -> List[AutoACMGBatchResult]:
+        """Predict ACMG criteria for many variants concurrently.
+
+        The variants are predicted on a thread pool, at most ``max_concurrency`` of them are in
+        flight at a time. Identical variants are only predicted once and identical upstream
+        requests (Annonars, Mehari, Dotty) are shared across the batch through a request memo
+        bounded by ``settings.AUTO_ACMG_BATCH_MEMO_MAX_ENTRIES``. A failing variant does not abort
+        the batch, the error is reported in its result.
+
+        Args:
+            variants: The names or identifiers of the variants.
+            genome_release: The genome release version.
+            max_concurrency: Maximal number of variants predicted at the same time. Defaults to
+                ``settings.AUTO_ACMG_BATCH_MAX_CONCURRENCY``.
+            options: The options of the predictions, defaults to the global settings.
+
+        Returns:
+            List[AutoACMGBatchResult]: The results in the order of the input variants.
+        """
+        max_workers = max(1, max_concurrency or settings.AUTO_ACMG_BATCH_MAX_CONCURRENCY)
+        unique_variants = list(dict.fromkeys(variants))
+        logger.info(
+            "Predicting {} unique variants with up to {} workers.",
+            len(unique_variants),
+            max_workers,
+        )
+        memo = RequestMemo(max_entries=settings.AUTO_ACMG_BATCH_MEMO_MAX_ENTRIES)
+        results: Dict[str, AutoACMGBatchResult] = {}
+        queued = iter(unique_variants)
+        in_flight: Dict[Future, str] = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while True:
+                for variant_name in queued:
+                    future = executor.submit(
+                        copy_context().run,
+                        cls._predict_batch_item,
+                        variant_name,
+                        genome_release,
+                        memo,
+                        options,
+                    )
+                    in_flight[future] = variant_name
+                    if len(in_flight) >= max_workers:
+                        break
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[in_flight.pop(future)] = future.result()
+        return [results[variant_name] for variant_name in variants]
@@ -1,20 +1,60 @@
+"""Comparison of AutoACMG with InterVar and GeneBe on the custom ClinGen dataset.
+
+Every variant of ``comparison_criteria_custom.csv`` is evaluated with all tools. The tools of a
+variant run concurrently and several variants are evaluated at the same time. Each finished
+variant is appended to the output right away, so the output is also the checkpoint: a rerun
+skips the variants already in it and only evaluates the missing ones. Variants for which a tool
+failed, e.g. timed out, are listed in the ``Failed Tools`` column and evaluated again by a rerun,
+which appends a new row, so the last row of a variant is its current one. Outputs ending in
+``.parquet`` are written as a directory of Parquet files (requires ``pyarrow``), all others as
+CSV::
+
+    python -m src.bench.comparison_v4 --workers 4 --output src/bench/stats.csv
+"""
+
+import argparse
 import csv
 import json
 import os
+import sys
 import time
-from typing import List, Optional
+import uuid
+from concurrent.futures import Executor, ThreadPoolExecutor, as_completed
+from contextvars import copy_context
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
 
-import httpx
-import pandas as pd
+from loguru import logger
 
 from src.auto_acmg import AutoACMG
+from src.core.cache import RequestMemo, request_memo
 from src.core.config import settings
+from src.core.http import get_http_client
 from src.defs.auto_acmg import AutoACMGPrediction, AutoACMGSeqVarResult
 from src.defs.genome_builds import GenomeRelease
 from src.defs.seqvar import SeqVar
 
 #: Path to the root directory
 path_to_root = settings.PATH_TO_ROOT
+#: Default dataset
+DEFAULT_INPUT = os.path.join(path_to_root, "src", "bench", "comparison_criteria_custom.csv")
+#: Default output
+DEFAULT_OUTPUT = os.path.join(path_to_root, "src", "bench", "stats.csv")
+#: Connection pool of the requests to InterVar and GeneBe
+HTTP_POOL = "comparison"
+#: Column listing the tools that failed for a variant
+FAILED_TOOLS = "Failed Tools"
 
 #: List of all criteria
 criteria = [
@@ -48,28 +88,40 @@ criteria = [
     "BP7",
 ]
 
+
+class ComparisonVariant(NamedTuple):
+    """A variant of the dataset."""
+
+    #: Name of the variant
+    variant: str
+    #: Criteria expected to be met
+    expected: List[str]
+    #: Comment of the dataset
+    comment: str
+
+
+#: A tool: takes a variant, returns the criteria met and the full response
+Tool = Callable[[ComparisonVariant], Tuple[List[str], Any]]
+
+
 # =========== Prepare the data ===========
-# Extract criteria from the csv file
-path = os.path.join(path_to_root, "src", "bench", "comparison_criteria_custom.csv")
-print(f"Data path: {path}")
-variants = []
-with open(path, "rt") as inputf:
-    reader = csv.DictReader(inputf)
-    for record in reader:
-        if record["variant"].startswith("#"):
-            continue
-        variants.append(
-            (
-                record["variant"],
-                record["expected_criteria"].split(";"),
-                record["comment"],
+def load_variants(path: str) -> List[ComparisonVariant]:
+    """Load the variants of the dataset, skipping the ones commented out with ``#``."""
+    variants = []
+    with open(path, "rt") as inputf:
+        reader = csv.DictReader(inputf)
+        for record in reader:
+            if record["variant"].startswith("#"):
+                continue
+            variants.append(
+                ComparisonVariant(
+                    record["variant"], record["expected_criteria"].split(";"), record["comment"]
+                )
             )
-        )
-print(f"Number of variants: {len(variants)}")
-# ========================================
+    return variants
 
 
-# =========== Helper functions ===========
+# =========== Tools ===========
 #: Extract criteria from the line
 def extract_criteria(line):
     ret = []
@@ -79,9 +131,14 @@ def extract_criteria(line):
     return ret
 
 
-#: Append a row to the DataFrame
-def append_row(df, row):
-    return pd.concat([df, pd.DataFrame([row], columns=row.index)]).reset_index(drop=True)
+def resolve_seqvar(variant: str) -> SeqVar:
+    """Resolve a variant on GRCh37 for the queries of InterVar and GeneBe."""
+    seqvar = AutoACMG(variant, GenomeRelease.GRCh37).resolve_variant()
+    if not isinstance(seqvar, SeqVar):
+        raise ValueError(f"Failed to resolve {variant} as sequence variant")
+    if not seqvar.chrom or not seqvar.pos or not seqvar.delete or not seqvar.insert:
+        raise ValueError(f"Incomplete sequence variant {seqvar}")
+    return seqvar
 
 
 def intervar_response(variant: str):
@@ -93,24 +150,14 @@ def intervar_response(variant: str):
     :return: ACMG classification
     :rtype: dict
     """
-    auto_acmg = AutoACMG(variant, GenomeRelease.GRCh37)
-    seqvar = auto_acmg.resolve_variant()
-    assert isinstance(seqvar, SeqVar)
-    chromosome = seqvar.chrom
-    position = seqvar.pos
-    reference = seqvar.delete
-    alternative = seqvar.insert
-
-    if not chromosome or not position or not reference or not alternative:
-        return
-
+    seqvar = resolve_seqvar(variant)
     url = (
         f"http://wintervar.wglab.org/api_new.php?"
-        f"queryType=position&chr={chromosome}&pos={position}"
-        f"&ref={reference}&alt={alternative}&build=hg19"
+        f"queryType=position&chr={seqvar.chrom}&pos={seqvar.pos}"
+        f"&ref={seqvar.delete}&alt={seqvar.insert}&build=hg19"
     )
-    print("Requesting:", url)
-    backend_resp = httpx.get(url)
+    logger.debug("Requesting: {}", url)
+    backend_resp = get_http_client(HTTP_POOL).get(url)
     backend_resp.raise_for_status()
     return backend_resp.json()
 
@@ -123,58 +170,29 @@ def genebe_response(variant: str):
     :return: GeneBe response
     :rtype: dict
     """
-    auto_acmg = AutoACMG(variant, GenomeRelease.GRCh37)
-    seqvar = auto_acmg.resolve_variant()
-    assert isinstance(seqvar, SeqVar)
-    chromosome = seqvar.chrom
-    position = seqvar.pos
-    reference = seqvar.delete
-    alternative = seqvar.insert
-
-    if not chromosome or not position or not reference or not alternative:
-        return
-
+    seqvar = resolve_seqvar(variant)
     url = (
         f"https://api.genebe.net/cloud/api-public/v1/variant?"
-        f"chr={chromosome}&pos={position}"
-        f"&ref={reference}&alt={alternative}&genome=hg19"
+        f"chr={seqvar.chrom}&pos={seqvar.pos}"
+        f"&ref={seqvar.delete}&alt={seqvar.insert}&genome=hg19"
     )
-    print("Requesting:", url)
-    backend_resp = httpx.get(url)
+    logger.debug("Requesting: {}", url)
+    backend_resp = get_http_client(HTTP_POOL).get(url)
     backend_resp.raise_for_status()
     return backend_resp.json()
 
 
-def eval_autoacmg(pred: Optional[AutoACMGSeqVarResult], expected: List[str]):
-    """
-    Evaluate the AutoACMG prediction.
-
-    :param pred: AutoACMG prediction
-    :param expected: expected criteria
-    :return: criteria met, true positives, false negatives, false positives
-    :rtype: tuple
-    """
-    if not pred:
-        return [], [], expected, []
+def criteria_autoacmg(pred: AutoACMGSeqVarResult) -> List[str]:
+    """Criteria met by an AutoACMG prediction."""
     crit_met: List[str] = []
     for crit in pred.criteria:
         if crit[1].prediction == AutoACMGPrediction.Applicable:
             crit_met.append(crit[1].name)
-    tp = list(set(expected) & set(crit_met))
-    fn = list(set(expected) - set(crit_met))
-    fp = list(set(crit_met) - set(expected))
-    return crit_met, tp, fn, fp
-
+    return crit_met
 
-def eval_intervar(pred, expected):
-    """
-    Evaluate the InterVar prediction.
 
-    :param pred: InterVar prediction
-    :param expected: expected criteria
-    :return: criteria met, true positives, false negatives, false positives
-    :rtype: tuple
-    """
+def criteria_intervar(pred) -> List[str]:
+    """Criteria met by an InterVar prediction."""
     crit_met = []
     for crit in pred:
         if crit in [
@@ -189,149 +207,336 @@ def eval_intervar(pred, expected):
             continue
         if pred[crit] == 1:
             crit_met.append(crit)
-    tp = list(set(expected) & set(crit_met))
-    fn = list(set(expected) - set(crit_met))
-    fp = list(set(crit_met) - set(expected))
-    return crit_met, tp, fn, fp
+    return crit_met
 
 
-def eval_genebe(resp, expected):
-    """
-    Evaluate the VarSome prediction.
+def criteria_genebe(resp) -> List[str]:
+    """Criteria met by a GeneBe prediction, none if the response has no ACMG criteria."""
+    try:
+        return extract_criteria(resp["variants"][0]["acmg_criteria"])
+    except (KeyError, IndexError, TypeError) as e:
+        logger.warning("No ACMG criteria in the GeneBe response: {}", e)
+        return []
+
+
+def run_autoacmg(variant: ComparisonVariant) -> Tuple[List[str], Any]:
+    """Predict a variant with AutoACMG."""
+    pred = AutoACMG(variant.variant, GenomeRelease.GRCh37).predict()
+    # Ensure the prediction is for Sequence Variant
+    if not isinstance(pred, AutoACMGSeqVarResult):
+        raise ValueError("No sequence variant prediction")
+    return criteria_autoacmg(pred), pred.model_dump(mode="json")
+
+
+def run_intervar(variant: ComparisonVariant) -> Tuple[List[str], Any]:
+    """Predict a variant with InterVar."""
+    resp = intervar_response(variant.variant)
+    return criteria_intervar(resp), resp
+
+
+def run_genebe(variant: ComparisonVariant) -> Tuple[List[str], Any]:
+    """Predict a variant with GeneBe."""
+    resp = genebe_response(variant.variant)
+    return criteria_genebe(resp), resp
+
+
+#: The compared tools by their column prefix
+TOOLS: Dict[str, Tool] = {
+    "AutoACMG": run_autoacmg,
+    "Intervar": run_intervar,
+    "Genebe": run_genebe,
+}
+
+
+def columns(tool_names: Sequence[str]) -> List[str]:
+    """Columns of the output for the given tools."""
+    return (
+        ["Variant", "Expected Criteria"]
+        + [
+            f"{name} {column}"
+            for name in tool_names
+            for column in (
+                "Criteria",
+                "Prediction time",
+                "True Positives",
+                "False Negatives",
+                "False Positives",
+            )
+        ]
+        + ["Comment", FAILED_TOOLS]
+        + [f"{name} Full Response" for name in tool_names]
+    )
+
+
+# =========== Evaluation ===========
+def evaluate_tool(name: str, tool: Tool, variant: ComparisonVariant) -> Dict[str, Any]:
+    """Run a tool on a variant and compare the criteria met with the expected ones.
 
-    :param resp: VarSome prediction
-    :param expected: expected criteria
-    :return: criteria met, true positives, false negatives, false positives
-    :rtype: tuple
+    Returns:
+        The columns of the tool, empty if the tool failed.
     """
-    crit_met = []
     try:
-        acmg_crit = resp["variants"][0]["acmg_criteria"]
-        crit_met = extract_criteria(acmg_crit)
+        start_time = time.perf_counter()
+        crit_met, response = tool(variant)
+        end_time = time.perf_counter()
     except Exception as e:
-        print(e)
-    tp = list(set(expected) & set(crit_met))
-    fn = list(set(expected) - set(crit_met))
-    fp = list(set(crit_met) - set(expected))
-    return crit_met, tp, fn, fp
+        logger.warning("Exception was raised for {} in {}: {}", variant.variant, name, e)
+        return {}
+    expected = set(variant.expected)
+    return {
+        f"{name} Criteria": ";".join(crit_met),
+        f"{name} Prediction time": end_time - start_time,
+        f"{name} True Positives": ";".join(sorted(expected & set(crit_met))),
+        f"{name} False Negatives": ";".join(sorted(expected - set(crit_met))),
+        f"{name} False Positives": ";".join(sorted(set(crit_met) - expected)),
+        f"{name} Full Response": json.dumps(response),
+    }
 
 
-# ========================================
+def evaluate_variant(
+    variant: ComparisonVariant, tools: Mapping[str, Tool], executor: Executor
+) -> Dict[str, Any]:
+    """Evaluate a variant with all tools concurrently.
 
+    The tools share the upstream requests of AutoACMG, e.g. to resolve the variant, through a
+    request memo.
 
-# =========== Main comparison run ===========
-#: Create a pandas DataFrame
-stats = pd.DataFrame(
-    columns=[
-        "Variant",
-        "Expected Criteria",
-        "AutoACMG Criteria",
-        "AutoACMG Prediction time",
-        "AutoACMG True Positives",
-        "AutoACMG False Negatives",
-        "AutoACMG False Positives",
-        "Intervar Criteria",
-        "Intervar Prediction time",
-        "Intervar True Positives",
-        "Intervar False Negatives",
-        "Intervar False Positives",
-        "Genebe Criteria",
-        "Genebe Prediction time",
-        "Genebe True Positives",
-        "Genebe False Negatives",
-        "Genebe False Positives",
-        "Comment",
-        "AutoACMG Full Response",
-        "Intervar Full Response",
-        "Genebe Full Response",
-    ]
-)
+    Returns:
+        The row of the variant, with the tools that failed in the ``Failed Tools`` column.
+    """
+    record: Dict[str, Any] = {column: "" for column in columns(list(tools))}
+    record.update(
+        {
+            "Variant": variant.variant,
+            "Expected Criteria": ";".join(variant.expected),
+            "Comment": variant.comment,
+        }
+    )
+    for name in tools:
+        record[f"{name} Prediction time"] = 0.0
+    with request_memo(RequestMemo()):
+        futures = [
+            executor.submit(copy_context().run, evaluate_tool, name, tool, variant)
+            for name, tool in tools.items()
+        ]
+        failed = []
+        for name, future in zip(tools, futures):
+            result = future.result()
+            if not result:
+                failed.append(name)
+            record.update(result)
+    record[FAILED_TOOLS] = ";".join(failed)
+    return record
+
+
+# =========== Output ===========
+class CsvSink:
+    """Appends rows to a CSV file, flushed after every row.
+
+    A line left incomplete by an interrupted run is dropped when the file is opened again.
+
+    Raises:
+        ValueError: If the file was written with other columns, e.g. for other tools.
+    """
 
-for i, var in enumerate(variants):
-    # # Save the stats every 50 variants
-    # if i % 50 == 0 and i > 0:
-    #     print(f"Processed {i} variants")
-    #     output_path = os.path.join(path_to_root, "src", "bench", "tmp", f"stats_{i}.csv")
-    #     stats.to_csv(output_path, index=False)
-
-    record = {
-        "Variant": var[0],
-        "Expected Criteria": ";".join(var[1]),
-        "AutoACMG Criteria": "",
-        "AutoACMG Prediction time": 0,
-        "AutoACMG True Positives": "",
-        "AutoACMG False Negatives": "",
-        "AutoACMG False Positives": "",
-        "Intervar Criteria": "",
-        "Intervar Prediction time": 0,
-        "Intervar True Positives": "",
-        "Intervar False Negatives": "",
-        "Intervar False Positives": "",
-        "Genebe Criteria": "",
-        "Genebe Prediction time": 0,
-        "Genebe True Positives": "",
-        "Genebe False Negatives": "",
-        "Genebe False Positives": "",
-        "Comment": var[2],
-        "AutoACMG Full Response": "",
-        "Intervar Full Response": "",
-        "Genebe Full Response": "",
-    }
+    def __init__(self, path: str, columns: Sequence[str]):
+        #: Path of the CSV file.
+        self.path = path
+        #: Columns of the rows.
+        self.columns = list(columns)
+        self._truncate_partial_line()
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not new_file:
+            self._check_header()
+        self._file = open(path, "a", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=self.columns)
+        if new_file:
+            self._writer.writeheader()
+            self._file.flush()
+
+    def _truncate_partial_line(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb+") as csvfile:
+            content = csvfile.read()
+            if content and not content.endswith(b"\n"):
+                csvfile.truncate(content.rfind(b"\n") + 1)
+
+    def _check_header(self) -> None:
+        with open(self.path, "rt", newline="") as csvfile:
+            header = next(csv.reader(csvfile), [])
+        if header != self.columns:
+            raise ValueError(
+                f"{self.path} was written with other columns, use another output to compare "
+                "other tools."
+            )
 
-    # AutoACMG
-    try:
-        start_time = time.time()
-        auto_acmg = AutoACMG(var[0], GenomeRelease.GRCh37)
-        pred = auto_acmg.predict()
-        end_time = time.time()
-        assert pred
-        # Ensure the prediction is for Sequence Variant
-        assert isinstance(pred, AutoACMGSeqVarResult)
-        # Evaluate the model
-        crit_met, tp, fn, fp = eval_autoacmg(pred, var[1])
-        record["AutoACMG Criteria"] = ";".join(crit_met)
-        record["AutoACMG Prediction time"] = end_time - start_time
-        record["AutoACMG True Positives"] = ";".join(tp)
-        record["AutoACMG False Negatives"] = ";".join(fn)
-        record["AutoACMG False Positives"] = ";".join(fp)
-        record["AutoACMG Full Response"] = pred.model_dump()
-    except Exception as e:
-        print(f"Exception was raised for {var[0]} in AutoACMG:\n{e}")
+    def completed(self) -> Set[str]:
+        """Variants already in the file for which no tool failed."""
+        csv.field_size_limit(sys.maxsize)
+        with open(self.path, "rt", newline="") as csvfile:
+            return {row["Variant"] for row in csv.DictReader(csvfile) if not row[FAILED_TOOLS]}
 
-    # Intervar
-    try:
-        start_time = time.time()
-        resp = intervar_response(var[0])
-        end_time = time.time()
-        crit_met, tp, fn, fp = eval_intervar(resp, var[1])
-        record["Intervar Criteria"] = ";".join(crit_met)
-        record["Intervar Prediction time"] = end_time - start_time
-        record["Intervar True Positives"] = ";".join(tp)
-        record["Intervar False Negatives"] = ";".join(fn)
-        record["Intervar False Positives"] = ";".join(fp)
-        record["Intervar Full Response"] = resp
-    except Exception as e:
-        print(f"Exception was raised for {var[0]} in InterVar:\n{e}")
+    def write(self, row: Dict[str, Any]) -> None:
+        """Append a row."""
+        self._writer.writerow(row)
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ParquetSink:
+    """Writes rows to a directory of Parquet files, one file per ``batch_size`` rows.
+
+    Each file is complete once it appears, so an interrupted run only loses the rows of the
+    unfinished batch.
+
+    Raises:
+        ImportError: If ``pyarrow`` is not installed.
+        ValueError: If the directory holds files written with other columns.
+    """
 
-    # Genebe
+    def __init__(self, path: str, columns: Sequence[str], batch_size: int = 16):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Writing Parquet requires the pyarrow package.") from e
+        self._pa = pa
+        self._pq = pq
+        #: Directory of the Parquet files.
+        self.path = path
+        #: Number of rows per file.
+        self.batch_size = batch_size
+        #: Schema of the rows, the prediction times are numbers and everything else text.
+        self.schema = pa.schema(
+            [
+                (column, pa.float64() if column.endswith("Prediction time") else pa.string())
+                for column in columns
+            ]
+        )
+        #: Rows not written yet.
+        self._rows: List[Dict[str, Any]] = []
+        os.makedirs(path, exist_ok=True)
+        for filename in self._files():
+            if pq.read_schema(filename).names != list(columns):
+                raise ValueError(
+                    f"{filename} was written with other columns, use another output to compare "
+                    "other tools."
+                )
+
+    def _files(self) -> List[str]:
+        return [entry.path for entry in os.scandir(self.path) if entry.name.endswith(".parquet")]
+
+    def completed(self) -> Set[str]:
+        """Variants already in the directory for which no tool failed."""
+        variants: Set[str] = set()
+        for filename in self._files():
+            table = self._pq.read_table(filename, columns=["Variant", FAILED_TOOLS]).to_pydict()
+            variants.update(
+                variant
+                for variant, failed in zip(table["Variant"], table[FAILED_TOOLS])
+                if not failed
+            )
+        return variants
+
+    def write(self, row: Dict[str, Any]) -> None:
+        """Add a row, writing a file when the batch is full."""
+        self._rows.append(row)
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the pending rows to a new file."""
+        if not self._rows:
+            return
+        table = self._pa.Table.from_pylist(self._rows, schema=self.schema)
+        filename = os.path.join(self.path, f"part-{time.time_ns()}-{uuid.uuid4().hex[:8]}.parquet")
+        self._pq.write_table(table, f"{filename}.tmp")
+        os.replace(f"{filename}.tmp", filename)
+        self._rows = []
+
+    def close(self) -> None:
+        self.flush()
+
+
+def open_sink(path: str, columns: Sequence[str]) -> Union[CsvSink, ParquetSink]:
+    """Open the sink of ``path``, Parquet for paths ending in ``.parquet``, CSV otherwise."""
+    if path.endswith(".parquet"):
+        return ParquetSink(path, columns)
+    return CsvSink(path, columns)
+
+
+# =========== Main comparison run ===========
+def run_comparison(
+    variants: Sequence[ComparisonVariant],
+    sink: Union[CsvSink, ParquetSink],
+    *,
+    tools: Optional[Mapping[str, Tool]] = None,
+    workers: int = 4,
+) -> int:
+    """Evaluate the variants not yet completed in ``sink`` and append their rows as they finish.
+
+    Args:
+        variants: The variants of the dataset.
+        sink: The output, also used as checkpoint.
+        tools: The tools to compare, defaults to all.
+        workers: Number of variants evaluated at the same time.
+
+    Returns:
+        The number of evaluated variants.
+    """
+    tools = TOOLS if tools is None else tools
+    completed = sink.completed()
+    seen = set(completed)
+    pending = []
+    for variant in variants:
+        if variant.variant not in seen:
+            seen.add(variant.variant)
+            pending.append(variant)
+    logger.info("Evaluating {} variants, {} were completed before.", len(pending), len(completed))
+    variant_executor = ThreadPoolExecutor(max_workers=workers)
+    tool_executor = ThreadPoolExecutor(max_workers=workers * len(tools))
     try:
-        start_time = time.time()
-        resp = genebe_response(var[0])
-        end_time = time.time()
-        crit_met, tp, fn, fp = eval_genebe(resp, var[1])
-        record["Genebe Criteria"] = ";".join(crit_met)
-        record["Genebe Prediction time"] = end_time - start_time
-        record["Genebe True Positives"] = ";".join(tp)
-        record["Genebe False Negatives"] = ";".join(fn)
-        record["Genebe False Positives"] = ";".join(fp)
-        record["Genebe Full Response"] = json.dumps(resp)
-    except Exception as e:
-        print(f"Exception was raised for {var[0]} in Genebe:\n{e}")
+        futures = [
+            variant_executor.submit(
+                copy_context().run, evaluate_variant, variant, tools, tool_executor
+            )
+            for variant in pending
+        ]
+        for i, future in enumerate(as_completed(futures), 1):
+            sink.write(future.result())
+            logger.info("Evaluated {}/{} variants.", i, len(pending))
+    finally:
+        # Do not start the remaining variants after an error or an interrupt.
+        variant_executor.shutdown(cancel_futures=True)
+        tool_executor.shutdown(cancel_futures=True)
+    return len(pending)
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--input", default=DEFAULT_INPUT, help="CSV file of the dataset")
+    parser.add_argument(
+        "--output",
+        default=DEFAULT_OUTPUT,
+        help="CSV file or .parquet directory, resumed if present",
+    )
+    parser.add_argument("--workers", type=int, default=4, help="variants evaluated at once")
+    parser.add_argument("--tool", action="append", choices=list(TOOLS), help="tools (all)")
+    args = parser.parse_args(argv)
+
+    variants = load_variants(args.input)
+    logger.info("Data path: {}, number of variants: {}", args.input, len(variants))
+    tools = {name: TOOLS[name] for name in args.tool or TOOLS}
+    sink = open_sink(args.output, columns(list(tools)))
+    try:
+        run_comparison(variants, sink, tools=tools, workers=args.workers)
+    finally:
+        sink.close()
+    logger.info("Results written to {}", args.output)
 
-    # Add the record to the stats
-    print(f"Record for {var[0]}: {record}")
-    stats = append_row(stats, pd.Series(record))
 
-# Save the final stats
-output_path = os.path.join(path_to_root, "src", "bench", "stats.csv")
-stats.to_csv(output_path, index=False)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Micro-benchmark of the MaxEntScan implementations.
+
+Prints the time per call of the k-mer hashing and of the 3' splice site score for the available
+backends. Run with ``python -m src.bench.maxent_bench``.
+"""
+
+import importlib.util
+import random
+import timeit
+from typing import Callable, List
+
+from lib.maxentpy import maxent
+
+#: Number of random splice contexts to score
+N_SEQS = 10_000
+#: Number of repetitions, the best one is reported
+REPEAT = 5
+
+
+def legacy_hashseq(fa: str) -> int:
+    """The k-mer hashing as it was before the precomputed translation table."""
+    table = str.maketrans("ACGT", "0123")
+    seq = fa.translate(table)
+    return sum(int(j) * 4 ** (len(seq) - i - 1) for i, j in enumerate(seq))
+
+
+def per_call(func: Callable[[], object], n_calls: int) -> float:
+    """Best time in microseconds per call of ``func``, which makes ``n_calls`` calls."""
+    return min(timeit.repeat(func, number=1, repeat=REPEAT)) / n_calls * 1e6
+
+
+def report(name: str, micros: float, baseline: float):
+    print(f"{name:<36} {micros:10.3f} us {baseline / micros:8.1f}x")
+
+
+def main():
+    rng = random.Random(42)
+    seqs3: List[str] = ["".join(rng.choice("ACGT") for _ in range(23)) for _ in range(N_SEQS)]
+    kmers = [seq[:7] for seq in seqs3]
+    matrix3 = maxent.load_matrix3()
+    maxent.dense_matrix3()
+
+    print(f"{'hashseq (7-mer)':<36} {'per call':>13} {'speedup':>9}")
+    baseline = per_call(lambda: [legacy_hashseq(kmer) for kmer in kmers], len(kmers))
+    report("legacy pure Python", baseline, baseline)
+    report(
+        "table-driven pure Python",
+        per_call(lambda: [maxent.hashseq(kmer) for kmer in kmers], len(kmers)),
+        baseline,
+    )
+    compiled = importlib.util.find_spec("lib.maxentpy._hashseq") is not None
+    if compiled:
+        from lib.maxentpy import maxent_fast
+
+        report(
+            "compiled",
+            per_call(lambda: [maxent_fast.hashseq(kmer) for kmer in kmers], len(kmers)),
+            baseline,
+        )
+    else:
+        print("compiled                             (extension not built)")
+
+    print()
+    print(f"{'score3':<36} {'per call':>13} {'speedup':>9}")
+    original_hashseq = maxent.hashseq
+    maxent.hashseq = legacy_hashseq
+    try:
+        baseline = per_call(lambda: [maxent.score3(seq, matrix3) for seq in seqs3], N_SEQS)
+    finally:
+        maxent.hashseq = original_hashseq
+    report("legacy pure Python", baseline, baseline)
+    report(
+        "table-driven pure Python",
+        per_call(lambda: [maxent.score3(seq, matrix3) for seq in seqs3], N_SEQS),
+        baseline,
+    )
+    if compiled:
+        report(
+            "compiled",
+            per_call(lambda: [maxent_fast.score3(seq, matrix3) for seq in seqs3], N_SEQS),
+            baseline,
+        )
+    report(
+        "NumPy batch (score3_many)",
+        per_call(lambda: maxent.score3_many(seqs3), N_SEQS),
+        baseline,
+    )
+
+
+if __name__ == "__main__":
+    main()
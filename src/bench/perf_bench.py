@@ -0,0 +1,350 @@
+"""Offline performance benchmark of the predictions.
+
+The variants of the end-to-end tests are predicted with the upstream responses replayed from a
+fixture store (see :mod:`src.bench.replay`), so the results do not depend on the network. Each
+mode reports the throughput, the latency percentiles of the single predictions, the memory
+allocated while predicting and the time spent per criterion and per stage, as JSON:
+
+- ``single``: the variants one after another,
+- ``batch``: all variants with :meth:`AutoACMG.predict_many`,
+- ``concurrent``: independent predictions on a thread pool, like concurrent API requests.
+
+SeqRepo is read from ``AUTO_ACMG_SEQREPO_DATA_DIR`` as usual. Record the fixture store once with
+access to the services, then run the benchmark offline::
+
+    python -m src.bench.perf_bench --record
+    python -m src.bench.perf_bench --output perf.json
+"""
+
+import argparse
+import csv
+import json
+import os
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from src.auto_acmg import AutoACMG
+from src.bench.replay import FixtureStore, RecordingTransport, ReplayTransport
+from src.core.config import settings
+from src.core.http import set_http_transport
+from src.core.timing import Span, add_span_listener, collect_timings
+from src.defs.genome_builds import GenomeRelease
+
+#: Version of the format of the results, bump it on incompatible changes
+RESULTS_VERSION = 1
+#: Default corpus, the variants of the end-to-end tests
+DEFAULT_CORPUS = os.path.join(settings.PATH_TO_ROOT, "tests", "assets", "e2e", "variants.csv")
+#: Default fixture store
+DEFAULT_STORE = os.path.join(settings.PATH_TO_ROOT, "tests", "assets", "bench", "upstream")
+#: Benchmark modes
+MODES = ("single", "batch", "concurrent")
+
+#: Variant names and genome releases of a corpus
+Corpus = List[Tuple[str, GenomeRelease]]
+
+
+def load_corpus(path: str) -> Corpus:
+    """Load the variants of a CSV file in the format of the end-to-end tests.
+
+    Rows without a variant are section headings and skipped. Unlike the end-to-end tests,
+    variants commented out with ``#`` are included, they only lack reliable expectations.
+    """
+    corpus = []
+    with open(path, "rt") as inputf:
+        for record in csv.DictReader(inputf):
+            if not record["variant_name"]:
+                continue
+            corpus.append((record["variant_name"], GenomeRelease[record["genome_release"]]))
+    return corpus
+
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """The ``q``-th percentile of ``values``, interpolated linearly, None if there are none."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+class LatencyRecorder:
+    """Collects the wall time of the single predictions, from their ``auto_acmg.predict`` spans."""
+
+    def __init__(self):
+        #: Lock guarding the latencies.
+        self._lock = threading.Lock()
+        #: Latencies in seconds, None while not recording.
+        self._latencies: Optional[List[float]] = None
+        add_span_listener(self._on_span)
+
+    def _on_span(self, span: Span, seconds: float) -> None:
+        if span.name != "auto_acmg.predict":
+            return
+        with self._lock:
+            if self._latencies is not None:
+                self._latencies.append(seconds)
+
+    def start(self) -> None:
+        """Start recording."""
+        with self._lock:
+            self._latencies = []
+
+    def stop(self) -> List[float]:
+        """Stop recording and return the recorded latencies."""
+        with self._lock:
+            latencies, self._latencies = self._latencies or [], None
+        return latencies
+
+
+#: Latencies of the predictions of the current benchmark run
+_recorder = LatencyRecorder()
+
+
+def _predict(variant: Tuple[str, GenomeRelease]) -> bool:
+    """Predict a variant, return whether a prediction was made."""
+    variant_name, genome_release = variant
+    try:
+        return AutoACMG(variant_name, genome_release).predict() is not None
+    except Exception as e:
+        logger.warning("Prediction of {} failed: {}", variant_name, e)
+        return False
+
+
+def run_single(corpus: Corpus, workers: int) -> int:
+    """Predict the variants one after another, return the number of failures."""
+    return sum(not _predict(variant) for variant in corpus)
+
+
+def run_batch(corpus: Corpus, workers: int) -> int:
+    """Predict the variants of each genome release as a batch, return the number of failures."""
+    failures = 0
+    for genome_release in dict.fromkeys(release for _, release in corpus):
+        names = [name for name, release in corpus if release == genome_release]
+        results = AutoACMG.predict_many(names, genome_release, max_concurrency=workers)
+        failures += sum(result.prediction is None for result in results)
+    return failures
+
+
+def run_concurrent(corpus: Corpus, workers: int) -> int:
+    """Predict the variants independently on a thread pool, return the number of failures."""
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(copy_context().run, _predict, variant) for variant in corpus]
+        return sum(not future.result() for future in futures)
+
+
+#: Runners of the benchmark modes
+RUNNERS: Dict[str, Callable[[Corpus, int], int]] = {
+    "single": run_single,
+    "batch": run_batch,
+    "concurrent": run_concurrent,
+}
+
+
+def measure_allocations(run: Callable[[Corpus, int], int], corpus: Corpus, workers: int) -> dict:
+    """Memory allocated by a run, traced in an extra, untimed run."""
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        run(corpus, workers)
+        current, peak = tracemalloc.get_traced_memory()
+        blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    finally:
+        tracemalloc.stop()
+    return {
+        "peak_bytes": peak - before,
+        "retained_bytes": current - before,
+        "retained_blocks": blocks,
+    }
+
+
+def measure_mode(
+    mode: str,
+    corpus: Corpus,
+    *,
+    repeat: int,
+    workers: int,
+    allocations: bool,
+) -> Dict[str, Any]:
+    """Run a benchmark mode ``repeat`` times and summarise the results."""
+    run = RUNNERS[mode]
+    walls: List[float] = []
+    latencies: List[float] = []
+    failures = 0
+    with collect_timings() as timings:
+        for _ in range(repeat):
+            _recorder.start()
+            start = time.perf_counter()
+            failures += run(corpus, workers)
+            walls.append(time.perf_counter() - start)
+            latencies += _recorder.stop()
+    stages = timings.snapshot()
+    predictions = len(corpus) * repeat
+    wall = sum(walls)
+    result: Dict[str, Any] = {
+        "predictions": predictions,
+        "failures": failures,
+        "wall_seconds": wall,
+        "throughput_per_second": predictions / wall if wall else None,
+        "latency_seconds": {
+            "mean": sum(latencies) / len(latencies) if latencies else None,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies, default=None),
+        },
+        "criteria": {
+            name[len("criteria.") :]: {
+                "calls": timing.calls,
+                "seconds": timing.seconds,
+                "mean_seconds": timing.seconds / timing.calls if timing.calls else None,
+            }
+            for name, timing in sorted(stages.items())
+            if name.startswith("criteria.")
+        },
+        "stages": {name: timing.model_dump() for name, timing in sorted(stages.items())},
+    }
+    if allocations:
+        result["allocations"] = measure_allocations(run, corpus, workers)
+    return result
+
+
+def run_benchmark(
+    corpus: Corpus,
+    store: FixtureStore,
+    *,
+    modes: Sequence[str] = MODES,
+    repeat: int = 3,
+    workers: int = 8,
+    latency: float = 0.0,
+    allocations: bool = True,
+) -> Dict[str, Any]:
+    """Run the benchmark modes with the responses replayed from ``store``.
+
+    The persistent and the prediction cache are disabled, so every prediction runs the whole
+    pipeline. One untimed prediction of every variant warms the process up first.
+
+    Args:
+        corpus: The variants to predict.
+        store: The fixture store with the recorded upstream responses.
+        modes: The benchmark modes to run.
+        repeat: Number of timed runs of each mode.
+        workers: Number of concurrent predictions in the batch and concurrent modes.
+        latency: Simulated round trip time of the upstream requests in seconds.
+        allocations: Whether to trace the memory allocations in an extra run of each mode.
+
+    Returns:
+        The results, see the module documentation.
+    """
+    recorded = store.load()
+    transport = ReplayTransport(store, latency=latency)
+    saved = (settings.AUTO_ACMG_USE_CACHE, settings.AUTO_ACMG_USE_PREDICTION_CACHE)
+    settings.AUTO_ACMG_USE_CACHE = False
+    settings.AUTO_ACMG_USE_PREDICTION_CACHE = False
+    set_http_transport(transport)
+    try:
+        run_single(corpus, workers)
+        results = {
+            mode: measure_mode(
+                mode, corpus, repeat=repeat, workers=workers, allocations=allocations
+            )
+            for mode in modes
+        }
+    finally:
+        set_http_transport(None)
+        settings.AUTO_ACMG_USE_CACHE, settings.AUTO_ACMG_USE_PREDICTION_CACHE = saved
+    return {
+        "version": RESULTS_VERSION,
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "variants": len(corpus),
+            "repeat": repeat,
+            "workers": workers,
+            "latency_seconds": latency,
+            "recorded_responses": recorded,
+            "replayed_requests": transport.replayed,
+            "missing_requests": transport.missing,
+            "settings": {
+                "AUTO_ACMG_PARALLEL_CRITERIA": settings.AUTO_ACMG_PARALLEL_CRITERIA,
+                "AUTO_ACMG_USE_RANGE_CACHE": settings.AUTO_ACMG_USE_RANGE_CACHE,
+                "AUTO_ACMG_USE_TRACK_INDEX": settings.AUTO_ACMG_USE_TRACK_INDEX,
+                "AUTO_ACMG_MAXENT_BACKEND": settings.AUTO_ACMG_MAXENT_BACKEND,
+            },
+        },
+        "modes": results,
+    }
+
+
+def record(corpus: Corpus, store: FixtureStore) -> None:
+    """Predict every variant against the live services and record their responses."""
+    saved = (settings.AUTO_ACMG_USE_CACHE, settings.AUTO_ACMG_USE_PREDICTION_CACHE)
+    settings.AUTO_ACMG_USE_CACHE = False
+    settings.AUTO_ACMG_USE_PREDICTION_CACHE = False
+    set_http_transport(RecordingTransport(store))
+    try:
+        failures = run_single(corpus, 1)
+    finally:
+        set_http_transport(None)
+        settings.AUTO_ACMG_USE_CACHE, settings.AUTO_ACMG_USE_PREDICTION_CACHE = saved
+    print(f"Recorded {store.load()} responses to {store.path}, {failures} predictions failed.")
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="CSV file with the variants")
+    parser.add_argument("--store", default=DEFAULT_STORE, help="directory of the fixture store")
+    parser.add_argument("--record", action="store_true", help="record the fixture store")
+    parser.add_argument("--mode", action="append", choices=MODES, help="modes to run (all)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per mode")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent predictions")
+    parser.add_argument(
+        "--latency-ms", type=float, default=0.0, help="simulated upstream round trip time"
+    )
+    parser.add_argument(
+        "--no-allocations", action="store_true", help="do not trace the memory allocations"
+    )
+    parser.add_argument("--output", help="JSON file of the results (standard output)")
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.corpus)
+    store = FixtureStore(args.store)
+    if args.record:
+        record(corpus, store)
+        return
+    results = run_benchmark(
+        corpus,
+        store,
+        modes=args.mode or MODES,
+        repeat=args.repeat,
+        workers=args.workers,
+        latency=args.latency_ms / 1000,
+        allocations=not args.no_allocations,
+    )
+    if results["meta"]["missing_requests"]:
+        logger.warning(
+            "{} upstream requests were not recorded, record the fixture store again.",
+            results["meta"]["missing_requests"],
+        )
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as outputf:
+            outputf.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
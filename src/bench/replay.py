@@ -0,0 +1,154 @@
+"""Recording and replay of the upstream responses for offline benchmarks.
+
+Responses of Annonars, Mehari and Dotty are stored in a fixture store, a directory with one JSON
+file per request. The requests are keyed by their path and query, so a store recorded against the
+REEV proxy replays for the same ``API_REEV_URL`` and service URLs whatever host serves them.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+from loguru import logger
+
+#: Headers describing the encoding of a response body on the wire
+_ENCODING_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+
+def request_key(url: httpx.URL) -> str:
+    """Key of a request in the fixture store: its path and query."""
+    query = url.query.decode()
+    return f"{url.path}?{query}" if query else url.path
+
+
+class FixtureStore:
+    """Directory of recorded upstream responses.
+
+    Each response is stored as ``{"key": ..., "status": ..., "body": ...}`` in a file named by
+    the SHA-256 hash of its key.
+    """
+
+    def __init__(self, path: str):
+        #: Directory of the store.
+        self.path = path
+        #: Lock guarding the loaded responses.
+        self._lock = threading.Lock()
+        #: Responses by key as (status code, body), loaded by :meth:`load`.
+        self._responses: Dict[str, Tuple[int, bytes]] = {}
+
+    def _filename(self, key: str) -> str:
+        return os.path.join(self.path, f"{hashlib.sha256(key.encode()).hexdigest()}.json")
+
+    def load(self) -> int:
+        """Load all recorded responses into memory and return their number."""
+        responses: Dict[str, Tuple[int, bytes]] = {}
+        if os.path.isdir(self.path):
+            for entry in os.scandir(self.path):
+                if not entry.name.endswith(".json"):
+                    continue
+                with open(entry.path, "r") as fixture:
+                    record = json.load(fixture)
+                responses[record["key"]] = (record["status"], json.dumps(record["body"]).encode())
+        with self._lock:
+            self._responses = responses
+        return len(responses)
+
+    def get(self, key: str) -> Optional[Tuple[int, bytes]]:
+        """Return the status code and the body of a loaded response, if recorded."""
+        with self._lock:
+            return self._responses.get(key)
+
+    def put(self, key: str, status: int, body: Any) -> None:
+        """Store a response, replacing a previous recording of the request."""
+        os.makedirs(self.path, exist_ok=True)
+        fd, tmp_filename = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as fixture:
+                json.dump({"key": key, "status": status, "body": body}, fixture, sort_keys=True)
+            os.replace(tmp_filename, self._filename(key))
+        except BaseException:
+            os.unlink(tmp_filename)
+            raise
+        with self._lock:
+            self._responses[key] = (status, json.dumps(body).encode())
+
+
+class RecordingTransport(httpx.BaseTransport):
+    """Transport sending the requests over the network and recording the JSON responses."""
+
+    def __init__(self, store: FixtureStore, transport: Optional[httpx.BaseTransport] = None):
+        #: Store of the recorded responses.
+        self.store = store
+        #: Transport performing the requests.
+        self.transport = transport or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        response = self.transport.handle_request(request)
+        content = response.read()
+        try:
+            body = json.loads(content)
+        except ValueError:
+            logger.warning("Not recording the non-JSON response of {}", request.url)
+        else:
+            self.store.put(request_key(request.url), response.status_code, body)
+        # The content is decoded already, so the encoding headers no longer apply to it.
+        headers = [
+            (name, value)
+            for name, value in response.headers.multi_items()
+            if name.lower() not in _ENCODING_HEADERS
+        ]
+        return httpx.Response(
+            response.status_code, headers=headers, content=content, request=request
+        )
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class ReplayTransport(httpx.BaseTransport):
+    """Transport answering the requests from the fixture store.
+
+    Requests that were not recorded are answered with ``404 Not Found`` and counted, so
+    incomplete stores show up in the results instead of reaching the network.
+
+    Args:
+        store: The loaded fixture store.
+        latency: Seconds to wait before each response, to model the round trip to the services.
+    """
+
+    def __init__(self, store: FixtureStore, latency: float = 0.0):
+        #: Store of the recorded responses.
+        self.store = store
+        #: Simulated round trip time in seconds.
+        self.latency = latency
+        #: Lock guarding the counters.
+        self._lock = threading.Lock()
+        #: Number of replayed requests.
+        self.replayed = 0
+        #: Number of requests that were not recorded.
+        self.missing = 0
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if self.latency > 0:
+            time.sleep(self.latency)
+        recorded = self.store.get(request_key(request.url))
+        with self._lock:
+            if recorded is None:
+                self.missing += 1
+            else:
+                self.replayed += 1
+        if recorded is None:
+            logger.debug("No recorded response for {}", request.url)
+            return httpx.Response(404, text="Not recorded", request=request)
+        status, content = recorded
+        return httpx.Response(
+            status,
+            headers={"content-type": "application/json"},
+            content=content,
+            request=request,
+        )
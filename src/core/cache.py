@@ -1,44 +1,854 @@
+import asyncio
+import functools
 import hashlib
 import json
 import os
-from typing import Optional
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import Future, wait
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Iterator,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+)
 
 from loguru import logger
+from pydantic import BaseModel
 
 from src.core.config import settings
+from src.core.metrics import record_cache_access
+
+#: Type variable for the cached response models
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+#: Start of the first line of the persistent entries stamped with a schema version
+SCHEMA_VERSION_PREFIX = b"#schema-version "
+
+
+@functools.lru_cache(maxsize=None)
+def schema_version(model: Type[BaseModel]) -> str:
+    """Version of the schema of a response model, a hash of its JSON schema.
+
+    The version changes with the fields, types and defaults of the model and its nested models.
+    Custom validators are not part of the JSON schema.
+    """
+    schema = json.dumps(model.model_json_schema(), sort_keys=True)
+    return hashlib.sha256(schema.encode()).hexdigest()[:16]
+
+
+def _stamp(data: bytes, model: Type[BaseModel]) -> bytes:
+    """Prefix JSON data with a line holding the schema version of ``model``."""
+    return SCHEMA_VERSION_PREFIX + schema_version(model).encode() + b"\n" + data
+
+
+def _unstamp(data: bytes) -> Tuple[Optional[str], bytes]:
+    """Split stamped data into the schema version and the JSON data.
+
+    The version is None for data without a stamp, e.g. written by older versions.
+    """
+    if not data.startswith(SCHEMA_VERSION_PREFIX):
+        return None, data
+    header, _, payload = data.partition(b"\n")
+    return header[len(SCHEMA_VERSION_PREFIX) :].decode(), payload
+
+
+class CacheBackend(ABC):
+    """Storage backend of the persistent cache.
+
+    Values are stored as bytes under string keys, :meth:`get` and :meth:`put` store
+    JSON-serialisable objects. Implementations must make ``put_bytes`` atomic, so readers never see
+    partially written values. Entries older than ``ttl`` seconds are not returned, and the oldest
+    entries are evicted once the cache holds more than ``max_entries`` entries or ``max_bytes``
+    bytes. A limit of 0 disables it.
+    """
+
+    #: Number of writes between two checks of the size limits.
+    EVICTION_INTERVAL = 100
+
+    def __init__(
+        self, cache_dir: str, *, ttl: float = 0.0, max_entries: int = 0, max_bytes: int = 0
+    ):
+        #: Directory of the cache data.
+        self.cache_dir = cache_dir
+        #: Time in seconds after which entries expire.
+        self.ttl = ttl
+        #: Maximal number of entries.
+        self.max_entries = max_entries
+        #: Maximal size of all entries in bytes.
+        self.max_bytes = max_bytes
+        #: Number of writes since the backend was created.
+        self._writes = 0
+        #: Lock guarding the write counter.
+        self._writes_lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @abstractmethod
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        """Return the data stored under ``key`` or None."""
+
+    @abstractmethod
+    def put_bytes(self, key: str, data: bytes) -> None:
+        """Store ``data`` under ``key``, replacing any previous data."""
+
+    @abstractmethod
+    def update_bytes(self, key: str, data: bytes) -> None:
+        """Replace the data of the entry under ``key``, keeping its creation time.
+
+        Nothing is stored if there is no such entry, e.g. because it was evicted meanwhile.
+        """
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the value stored under ``key`` or None."""
+        data = self.get_bytes(key)
+        return None if data is None else json.loads(data)
+
+    def put(self, key: str, value: Any) -> None:
+        """Store ``value`` under ``key``, replacing any previous value."""
+        self.put_bytes(key, json.dumps(value).encode())
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Delete the value stored under ``key``, if any."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Delete all values."""
+
+    @abstractmethod
+    def evict(self) -> None:
+        """Delete the expired entries and the oldest entries exceeding the size limits."""
+
+    def _expired(self, created: float) -> bool:
+        """Check whether an entry created at the given time has expired."""
+        return self.ttl > 0 and time.time() - created > self.ttl
+
+    def _maybe_evict(self) -> None:
+        """Run the eviction on the first and then on every ``EVICTION_INTERVAL``-th write."""
+        if not (self.ttl or self.max_entries or self.max_bytes):
+            return
+        with self._writes_lock:
+            due = self._writes % self.EVICTION_INTERVAL == 0
+            self._writes += 1
+        if due:
+            self.evict()
+
+
+class FileCacheBackend(CacheBackend):
+    """Cache backend storing one JSON file per key, named by the MD5 hash of the key.
+
+    The modification time of a file is its creation time, the oldest files are evicted first.
+    Scanning the directory is linear in the number of files, so it is not repeated on a schedule:
+    the backend scans once on the first write, adds the size of its own writes to the result and
+    only scans again once a size limit is exceeded by ``EVICTION_SLACK``, or once per ``ttl`` to
+    delete expired files. Writes of other processes are only seen by the next scan.
+    """
+
+    #: Fraction by which the size limits may be exceeded before the directory is scanned, so that a
+    #: full cache is not scanned on every write.
+    EVICTION_SLACK = 0.1
+
+    def __init__(
+        self, cache_dir: str, *, ttl: float = 0.0, max_entries: int = 0, max_bytes: int = 0
+    ):
+        super().__init__(cache_dir, ttl=ttl, max_entries=max_entries, max_bytes=max_bytes)
+        #: Number and size of the files as of the last scan plus the writes since, or None
+        #: before the first scan.
+        self._usage: Optional[Tuple[int, int]] = None
+        #: Time of the last scan.
+        self._scanned = 0.0
+        #: Lock held by the thread scanning the directory.
+        self._scan_lock = threading.Lock()
+
+    def _get_cache_filename(self, key: str) -> str:
+        """Generate a cache filename based on the MD5 hash of the key."""
+        key_hash = hashlib.md5(key.encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{key_hash}.json")
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        cache_filename = self._get_cache_filename(key)
+        try:
+            if self._expired(os.path.getmtime(cache_filename)):
+                return None
+            with open(cache_filename, "rb") as cache_file:
+                logger.debug("Loading cached response from: {}", cache_filename)
+                return cache_file.read()
+        except FileNotFoundError:
+            return None
+
+    def put_bytes(self, key: str, data: bytes) -> None:
+        cache_filename = self._get_cache_filename(key)
+        logger.debug("Caching response to: {}", cache_filename)
+        # Write to a temporary file and rename it, so that readers never see partial files.
+        fd, tmp_filename = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as cache_file:
+                cache_file.write(data)
+            os.replace(tmp_filename, cache_filename)
+        except BaseException:
+            os.unlink(tmp_filename)
+            raise
+        self._track_write(len(data))
+
+    def update_bytes(self, key: str, data: bytes) -> None:
+        cache_filename = self._get_cache_filename(key)
+        try:
+            created = os.path.getmtime(cache_filename)
+        except FileNotFoundError:
+            return
+        fd, tmp_filename = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as cache_file:
+                cache_file.write(data)
+            os.utime(tmp_filename, (created, created))
+            os.replace(tmp_filename, cache_filename)
+        except BaseException:
+            os.unlink(tmp_filename)
+            raise
+
+    def delete(self, key: str) -> None:
+        try:
+            os.unlink(self._get_cache_filename(key))
+        except FileNotFoundError:
+            pass
+
+    def clear(self) -> None:
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".json"):
+                    try:
+                        os.unlink(entry.path)
+                    except FileNotFoundError:
+                        pass
+
+    def _over_limit(self, entries: int, size: int) -> bool:
+        """Check whether the given usage exceeds a size limit by more than the slack."""
+        return bool(
+            (self.max_entries and entries > self.max_entries * (1 + self.EVICTION_SLACK))
+            or (self.max_bytes and size > self.max_bytes * (1 + self.EVICTION_SLACK))
+        )
+
+    def _track_write(self, size: int) -> None:
+        """Add a write of ``size`` bytes to the usage and scan if a limit is exceeded."""
+        if not (self.ttl or self.max_entries or self.max_bytes):
+            return
+        with self._writes_lock:
+            if self._usage is not None:
+                # Replaced files are counted twice, the next scan corrects that.
+                self._usage = (self._usage[0] + 1, self._usage[1] + size)
+            usage = self._usage
+        due = (
+            usage is None
+            or self._over_limit(*usage)
+            or bool(self.ttl and time.time() - self._scanned > self.ttl)
+        )
+        # A scan running in another thread sees this write as well.
+        if due and self._scan_lock.acquire(blocking=False):
+            try:
+                self.evict()
+            finally:
+                self._scan_lock.release()
+
+    def evict(self) -> None:
+        scanned = time.time()
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".json"):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort(reverse=True)
+        kept_entries = kept_bytes = 0
+        for mtime, size, path in entries:
+            if (
+                self._expired(mtime)
+                or (self.max_entries and kept_entries >= self.max_entries)
+                or (self.max_bytes and kept_bytes + size > self.max_bytes)
+            ):
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+            else:
+                kept_entries += 1
+                kept_bytes += size
+        with self._writes_lock:
+            self._usage = (kept_entries, kept_bytes)
+            self._scanned = scanned
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """Cache backend storing zlib-compressed JSON values in a single SQLite database.
+
+    The database runs in WAL mode, so multiple processes can read while one writes. Connections
+    are opened per thread and re-opened after a fork.
+    """
+
+    #: Name of the database file in the cache directory.
+    DB_FILENAME = "cache.sqlite3"
+
+    def __init__(
+        self,
+        cache_dir: str,
+        *,
+        ttl: float = 0.0,
+        max_entries: int = 0,
+        max_bytes: int = 0,
+        timeout: float = 30.0,
+    ):
+        super().__init__(cache_dir, ttl=ttl, max_entries=max_entries, max_bytes=max_bytes)
+        #: Path of the database file.
+        self.path = os.path.join(cache_dir, self.DB_FILENAME)
+        #: Seconds to wait for a lock held by another connection.
+        self.timeout = timeout
+        #: Per-thread connections.
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+                "created REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_created ON cache (created)")
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return the connection of the current thread and process."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        row = (
+            self._connection()
+            .execute("SELECT value, created FROM cache WHERE key = ?", (key,))
+            .fetchone()
+        )
+        if row is None or self._expired(row[1]):
+            return None
+        logger.debug("Loading cached response for: {}", key)
+        return zlib.decompress(row[0])
+
+    def put_bytes(self, key: str, data: bytes) -> None:
+        logger.debug("Caching response for: {}", key)
+        blob = zlib.compress(data)
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, created) VALUES (?, ?, ?, ?)",
+                (key, blob, len(blob), time.time()),
+            )
+        self._maybe_evict()
+
+    def update_bytes(self, key: str, data: bytes) -> None:
+        blob = zlib.compress(data)
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE cache SET value = ?, size = ? WHERE key = ?", (blob, len(blob), key)
+            )
+
+    def delete(self, key: str) -> None:
+        with self._connection() as conn:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._connection() as conn:
+            conn.execute("DELETE FROM cache")
+
+    def evict(self) -> None:
+        with self._connection() as conn:
+            if self.ttl > 0:
+                conn.execute("DELETE FROM cache WHERE created < ?", (time.time() - self.ttl,))
+            if self.max_entries or self.max_bytes:
+                conn.execute(
+                    "DELETE FROM cache WHERE key IN ("
+                    " SELECT key FROM ("
+                    "  SELECT key,"
+                    "   ROW_NUMBER() OVER (ORDER BY created DESC) AS entries,"
+                    "   SUM(size) OVER (ORDER BY created DESC) AS bytes"
+                    "  FROM cache"
+                    " ) WHERE (? > 0 AND entries > ?) OR (? > 0 AND bytes > ?)"
+                    ")",
+                    (self.max_entries, self.max_entries, self.max_bytes, self.max_bytes),
+                )
+
+
+#: Cache backend implementations by name.
+CACHE_BACKENDS: Dict[str, Type[CacheBackend]] = {
+    "file": FileCacheBackend,
+    "sqlite": SQLiteCacheBackend,
+}
+
+#: Process-wide cache backends by name and cache directory.
+_cache_backends: Dict[Tuple[str, str], CacheBackend] = {}
+#: Lock guarding the creation of cache backends.
+_cache_backends_lock = threading.Lock()
+
+
+def get_cache_backend(name: str, cache_dir: str, *, ttl: Optional[float] = None) -> CacheBackend:
+    """Return the process-wide cache backend ``name`` storing its data in ``cache_dir``.
+
+    The expiry and size limits are taken from the settings, ``ttl`` replaces
+    ``AUTO_ACMG_CACHE_TTL`` when the backend is created.
+
+    Raises:
+        ValueError: If the backend name is unknown.
+    """
+    if name not in CACHE_BACKENDS:
+        raise ValueError(f"Unknown cache backend: {name}")
+    with _cache_backends_lock:
+        backend = _cache_backends.get((name, cache_dir))
+        if backend is None:
+            backend = CACHE_BACKENDS[name](
+                cache_dir,
+                ttl=settings.AUTO_ACMG_CACHE_TTL if ttl is None else ttl,
+                max_entries=settings.AUTO_ACMG_CACHE_MAX_ENTRIES,
+                max_bytes=settings.AUTO_ACMG_CACHE_MAX_BYTES,
+            )
+            _cache_backends[(name, cache_dir)] = backend
+        return backend
+
+
+class MemoryCache:
+    """Thread-safe, in-memory LRU cache with expiry and entry and size limits.
+
+    The size of an entry is given by the caller. Entries older than ``ttl`` seconds are not
+    returned, and the least recently used entries are evicted once the cache holds more than
+    ``max_entries`` entries or ``max_bytes`` bytes. A limit of 0 disables it.
+    """
+
+    def __init__(self, *, max_entries: int = 0, max_bytes: int = 0, ttl: float = 0.0):
+        #: Maximal number of entries.
+        self.max_entries = max_entries
+        #: Maximal size of all entries in bytes.
+        self.max_bytes = max_bytes
+        #: Time in seconds after which entries expire.
+        self.ttl = ttl
+        #: Lock guarding the entries.
+        self._lock = threading.Lock()
+        #: Entries as (value, size, creation time) in least recently used order.
+        self._entries: OrderedDict[Hashable, Tuple[Any, int, float]] = OrderedDict()
+        #: Size of all entries in bytes.
+        self._bytes = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the value stored under ``key`` or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, size, created = entry
+            if self.ttl > 0 and time.monotonic() - created > self.ttl:
+                del self._entries[key]
+                self._bytes -= size
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any, size: int = 0) -> None:
+        """Store ``value`` of ``size`` bytes under ``key``, evicting the least recently used."""
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size, time.monotonic())
+            self._bytes += size
+            while self._entries and (
+                (self.max_entries and len(self._entries) > self.max_entries)
+                or (self.max_bytes and self._bytes > self.max_bytes)
+            ):
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def delete(self, key: Hashable) -> None:
+        """Remove the entry stored under ``key``, if any."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[1]
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+#: Process-wide in-memory tier of the cache, created on first use.
+_memory_cache: Optional[MemoryCache] = None
+#: Lock guarding the creation of the in-memory tier.
+_memory_cache_lock = threading.Lock()
+
+
+def get_memory_cache() -> MemoryCache:
+    """Return the process-wide in-memory tier, configured from the settings on first use."""
+    global _memory_cache
+    with _memory_cache_lock:
+        if _memory_cache is None:
+            _memory_cache = MemoryCache(
+                max_entries=settings.AUTO_ACMG_MEMORY_CACHE_MAX_ENTRIES,
+                max_bytes=settings.AUTO_ACMG_MEMORY_CACHE_MAX_BYTES,
+                ttl=settings.AUTO_ACMG_MEMORY_CACHE_TTL,
+            )
+        return _memory_cache
 
 
 class Cache:
-    """Cache class to store the results of the API calls."""
+    """Cache class to store the results of the API calls.
+
+    The cache has two tiers: an in-memory LRU tier holding validated response models and the
+    persistent tier holding the raw JSON responses. Responses stored with :meth:`add_response`
+    are stamped with the schema version of their response model, see :meth:`get_response`.
+    """
 
     def __init__(self):
-        """Set up the cache directory and settings."""
+        """Set up the cache tiers and settings."""
         self.use_cache = settings.AUTO_ACMG_USE_CACHE
         self.cache_dir = settings.AUTO_ACMG_CACHE_DIR
-        if not os.path.exists(self.cache_dir):
-            os.makedirs(self.cache_dir)
-
-    def _get_cache_filename(self, url: str) -> str:
-        """Generate a cache filename based on the MD5 hash of the URL."""
-        url_hash = hashlib.md5(url.encode()).hexdigest()
-        return os.path.join(self.cache_dir, f"{url_hash}.json")
+        #: Storage backend, only set up if the cache is used.
+        self.backend: Optional[CacheBackend] = None
+        #: In-memory tier, only set up if the cache is used.
+        self.memory: Optional[MemoryCache] = None
+        if self.use_cache:
+            self.backend = get_cache_backend(settings.AUTO_ACMG_CACHE_BACKEND, self.cache_dir)
+            if settings.AUTO_ACMG_MEMORY_CACHE_MAX_ENTRIES > 0:
+                self.memory = get_memory_cache()
 
     def get(self, url: str) -> Optional[dict]:
         """Check if a cached response exists and return it."""
-        if not self.use_cache:
+        if self.backend is None:
             return None
-        cache_filename = self._get_cache_filename(url)
-        if os.path.exists(cache_filename):
-            logger.debug("Loading cached response from: {}", cache_filename)
-            with open(cache_filename, "r") as cache_file:
-                return json.load(cache_file)
-        return None
+        data = self.backend.get_bytes(url)
+        record_cache_access("persistent", data is not None)
+        return None if data is None else json.loads(_unstamp(data)[1])
 
     def add(self, url: str, response_data: dict) -> None:
         """Cache the response data."""
-        if not self.use_cache:
+        if self.backend is None:
             return
-        cache_filename = self._get_cache_filename(url)
-        logger.debug("Caching response to: {}", cache_filename)
-        with open(cache_filename, "w") as cache_file:
-            json.dump(response_data, cache_file)
+        self.backend.put(url, response_data)
+
+    def get_response(self, url: str, model: Type[ModelT]) -> Optional[ModelT]:
+        """Return the cached response as validated response model, if present.
+
+        Responses stamped with the schema version of ``model`` validated against it when they
+        were stored. They are parsed straight from the JSON data by the compiled validator of
+        pydantic, without decoding the JSON into Python objects first. Other responses, written by
+        older versions or for a changed model, are decoded and validated in full, and stamped
+        with the current schema version afterwards. Stamping keeps the creation time of the
+        entry, so it expires as if it had not been read.
+
+        Raises:
+            ValidationError: If the cached response does not validate.
+        """
+        if self.backend is None:
+            return None
+        data = self.backend.get_bytes(url)
+        record_cache_access("persistent", data is not None)
+        if data is None:
+            return None
+        version, payload = _unstamp(data)
+        if version == schema_version(model):
+            return model.model_validate_json(payload)
+        logger.debug("Schema version changed for cached response of: {}", url)
+        result = model.model_validate(json.loads(payload))
+        self.backend.update_bytes(url, _stamp(payload, model))
+        return result
+
+    def add_response(self, url: str, response_data: Any, model: Type[BaseModel]) -> None:
+        """Cache response data that validated against ``model``, stamped with its schema version."""
+        if self.backend is None:
+            return
+        self.backend.put_bytes(url, _stamp(json.dumps(response_data).encode(), model))
+
+    def get_model(self, url: str, model: Type[ModelT]) -> Optional[ModelT]:
+        """Return a copy of the validated response model from the in-memory tier, if present.
+
+        The tier is shared by all predictions of the process, so every caller gets its own deep
+        copy and may modify it.
+        """
+        if self.memory is None:
+            return None
+        value = self.memory.get((url, model))
+        record_cache_access("memory", value is not None)
+        return None if value is None else value.model_copy(deep=True)
+
+    def add_model(self, url: str, value: BaseModel) -> None:
+        """Add a copy of a validated response model to the in-memory tier.
+
+        Later changes of ``value`` by the caller do not reach the tier. The size of the model is
+        only measured, by serialising it, if the tier is size-bounded.
+        """
+        if self.memory is None:
+            return
+        size = len(value.model_dump_json()) if self.memory.max_bytes else 0
+        self.memory.put((url, type(value)), value.model_copy(deep=True), size)
+
+
+async def _wait_done(future: Future) -> None:
+    """Wait until ``future`` is done, leaving its result and its cancellation to its owner."""
+    loop = asyncio.get_running_loop()
+    waiter = loop.create_future()
+
+    def set_done() -> None:
+        if not waiter.done():
+            waiter.set_result(None)
+
+    def wake(_: Future) -> None:
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(set_done)
+
+    future.add_done_callback(wake)
+    await waiter
+
+
+class RequestMemo:
+    """In-memory memo of upstream responses, shared by all clients within a prediction or batch.
+
+    Identical requests issued concurrently are coalesced: the first caller performs the request
+    while the others wait for its result, be they threads or asyncio tasks. Failed requests are
+    not memoised, so every waiter receives the exception and later callers try again. The
+    memoised values are shared by identity between all callers, who must treat them as read-only.
+
+    Args:
+        max_entries: Maximal number of completed responses kept, the least recently used are
+            dropped first. 0 keeps all responses, which suits a single prediction; long-running
+            batches should be bounded so their memory stays flat.
+    """
+
+    def __init__(self, max_entries: int = 0):
+        #: Lock guarding the memo state.
+        self._lock = threading.Lock()
+        #: Maximal number of completed responses (0 for no limit).
+        self.max_entries = max_entries
+        #: Completed responses by key, least recently used first.
+        self._results: OrderedDict[Hashable, Any] = OrderedDict()
+        #: Requests currently in flight by key.
+        self._pending: Dict[Hashable, Future] = {}
+
+    def _claim(self, key: Hashable) -> Tuple[Future, bool]:
+        """Return the future of the request for ``key`` and whether the caller has to perform it.
+
+        The future is already done if the response is memoised.
+        """
+        owner = False
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                future: Future = Future()
+                future.set_result(self._results[key])
+            elif key in self._pending:
+                future = self._pending[key]
+            else:
+                owner = True
+                future = Future()
+                self._pending[key] = future
+        # Requests coalesced with one in flight count as hits.
+        record_cache_access("memo", not owner)
+        return future, owner
+
+    def _complete(self, key: Hashable, future: Future, result: Any) -> None:
+        """Memoise the result of the request for ``key`` and pass it to the waiting callers."""
+        with self._lock:
+            self._results[key] = result
+            del self._pending[key]
+            if self.max_entries > 0:
+                while len(self._results) > self.max_entries:
+                    self._results.popitem(last=False)
+        future.set_result(result)
+
+    def _abandon(self, key: Hashable, future: Future, error: Optional[BaseException]) -> None:
+        """Drop the request for ``key``, failing the waiting callers with ``error``.
+
+        Without an error, the request was cancelled and the waiting callers perform it again.
+        """
+        with self._lock:
+            del self._pending[key]
+        if error is None:
+            future.cancel()
+        else:
+            future.set_exception(error)
+
+    def get_or_fetch(self, key: Hashable, fetch: Callable[[], Any]) -> Any:
+        """Return the memoised value for ``key``, calling ``fetch`` at most once concurrently.
+
+        Args:
+            key: The request key, usually the URL and the response model.
+            fetch: Callable that performs the request.
+
+        Returns:
+            Any: The (possibly shared) result of ``fetch``.
+        """
+        while True:
+            future, owner = self._claim(key)
+            if owner:
+                break
+            wait([future])
+            if not future.cancelled():
+                return future.result()
+
+        try:
+            result = fetch()
+        except BaseException as e:
+            self._abandon(key, future, e)
+            raise
+        self._complete(key, future, result)
+        return result
+
+    async def get_or_fetch_async(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Asyncio counterpart of :meth:`get_or_fetch`, awaiting ``fetch`` at most once at a time.
+
+        Requests are coalesced with the ones in flight of both synchronous and asyncio callers.
+        Cancelling a waiting caller leaves the request in flight; if the caller performing it is
+        cancelled, the next waiting caller performs it again.
+
+        Args:
+            key: The request key, usually the URL and the response model.
+            fetch: Coroutine function that performs the request.
+
+        Returns:
+            Any: The (possibly shared) result of ``fetch``.
+        """
+        while True:
+            future, owner = self._claim(key)
+            if owner:
+                break
+            if not future.done():
+                await _wait_done(future)
+            if not future.cancelled():
+                return future.result()
+
+        try:
+            result = await fetch()
+        except asyncio.CancelledError:
+            self._abandon(key, future, None)
+            raise
+        except BaseException as e:
+            self._abandon(key, future, e)
+            raise
+        self._complete(key, future, result)
+        return result
+
+
+#: Request memo active in the current context, if any.
+_request_memo: ContextVar[Optional[RequestMemo]] = ContextVar("request_memo", default=None)
+
+
+def get_request_memo() -> Optional[RequestMemo]:
+    """Return the request memo active in the current context, if any."""
+    return _request_memo.get()
+
+
+@contextmanager
+def request_memo(memo: Optional[RequestMemo] = None) -> Iterator[RequestMemo]:
+    """Activate a request memo for the current context.
+
+    Args:
+        memo: The memo to activate. A new one is created if not given.
+
+    Yields:
+        RequestMemo: The active memo.
+    """
+    memo = memo or RequestMemo()
+    token = _request_memo.set(memo)
+    try:
+        yield memo
+    finally:
+        _request_memo.reset(token)
+
+
+#: Key of a range cache bin: service base URL, genome release, chromosome and bin index.
+RangeBinKey = Tuple[str, str, str, int]
+
+
+class RangeCache:
+    """In-memory cache of range query results, stored per genomic bin.
+
+    A chromosome is divided into aligned bins of ``bin_size`` base pairs, bin ``i`` covering the
+    1-based positions ``[i * bin_size + 1, (i + 1) * bin_size]``. Bins are keyed by the base URL of
+    the service answering the query, genome release, chromosome and bin index, so any range can be
+    answered from the bins it overlaps and only the missing bins have to be fetched. The least
+    recently used bins are evicted once more than ``max_bins`` bins are stored.
+    """
+
+    def __init__(self, bin_size: int, max_bins: int):
+        #: Size of a bin in base pairs.
+        self.bin_size = bin_size
+        #: Maximal number of stored bins.
+        self.max_bins = max_bins
+        #: Lock guarding the bins.
+        self._lock = threading.Lock()
+        #: Stored bins in least recently used order.
+        self._bins: OrderedDict[RangeBinKey, Any] = OrderedDict()
+
+    def bin_indices(self, start: int, stop: int) -> range:
+        """Return the indices of the bins overlapping the 1-based range ``[start, stop]``."""
+        start = max(start, 1)
+        if stop < start:
+            return range(0)
+        return range((start - 1) // self.bin_size, (stop - 1) // self.bin_size + 1)
+
+    def bin_interval(self, index: int) -> Tuple[int, int]:
+        """Return the 1-based, inclusive interval covered by the bin ``index``."""
+        return index * self.bin_size + 1, (index + 1) * self.bin_size
+
+    def get(self, source: str, release: str, chrom: str, index: int) -> Optional[Any]:
+        """Return the stored bin or None if it is not cached."""
+        key = (source, release, chrom, index)
+        with self._lock:
+            value = self._bins.get(key)
+            if value is not None:
+                self._bins.move_to_end(key)
+        record_cache_access("range", value is not None)
+        return value
+
+    def add(self, source: str, release: str, chrom: str, index: int, value: Any) -> None:
+        """Store a bin, evicting the least recently used bins if the cache is full."""
+        key = (source, release, chrom, index)
+        with self._lock:
+            self._bins[key] = value
+            self._bins.move_to_end(key)
+            while len(self._bins) > self.max_bins:
+                self._bins.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all bins."""
+        with self._lock:
+            self._bins.clear()
+
+
+#: Process-wide range cache, created on first use.
+_range_cache: Optional[RangeCache] = None
+#: Lock guarding the creation of the range cache.
+_range_cache_lock = threading.Lock()
+
+
+def get_range_cache() -> RangeCache:
+    """Return the process-wide range cache, configured from the settings on first use."""
+    global _range_cache
+    with _range_cache_lock:
+        if _range_cache is None:
+            _range_cache = RangeCache(
+                bin_size=settings.AUTO_ACMG_RANGE_CACHE_BIN_SIZE,
+                max_bins=settings.AUTO_ACMG_RANGE_CACHE_MAX_BINS,
+            )
+        return _range_cache
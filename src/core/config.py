@@ -1,5 +1,7 @@
 import os
+from typing import Literal
 
+from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -22,6 +24,81 @@ class Settings(BaseSettings):
     AUTO_ACMG_CACHE_DIR: str = os.path.join(
         os.path.abspath(os.path.join(__file__, "..", "..", "..")), "cache"
     )
+    #: Storage backend of the persistent cache: one JSON file per response or a SQLite database
+    AUTO_ACMG_CACHE_BACKEND: Literal["file", "sqlite"] = "file"
+    #: Time in seconds after which persistent cache entries expire (0 to keep them forever)
+    AUTO_ACMG_CACHE_TTL: float = 0.0
+    #: Maximal number of entries of the persistent cache (0 for no limit)
+    AUTO_ACMG_CACHE_MAX_ENTRIES: int = 0
+    #: Maximal size of the persistent cache in bytes (0 for no limit)
+    AUTO_ACMG_CACHE_MAX_BYTES: int = 10 * 1024**3
+    #: Maximal number of validated responses kept in memory (0 to disable the in-memory tier)
+    AUTO_ACMG_MEMORY_CACHE_MAX_ENTRIES: int = 1024
+    #: Maximal size of the in-memory tier in bytes of serialised JSON (0 for no limit)
+    AUTO_ACMG_MEMORY_CACHE_MAX_BYTES: int = 0
+    #: Time in seconds after which in-memory entries expire (0 to keep them until evicted)
+    AUTO_ACMG_MEMORY_CACHE_TTL: float = 0.0
+    #: Whether to cache whole predictions
+    AUTO_ACMG_USE_PREDICTION_CACHE: bool = False
+    #: Time in seconds after which cached predictions expire (0 to keep them until evicted)
+    AUTO_ACMG_PREDICTION_CACHE_TTL: float = 24 * 3600.0
+    #: Maximal number of predictions kept in memory
+    AUTO_ACMG_PREDICTION_CACHE_MAX_ENTRIES: int = 10_000
+    #: Version of the upstream data, change it to invalidate the cached predictions on updates
+    AUTO_ACMG_DATA_VERSION: str = ""
+
+    #: Maximal number of variants predicted concurrently in a batch
+    AUTO_ACMG_BATCH_MAX_CONCURRENCY: int = 8
+    #: Maximal number of upstream responses shared within a batch (0 for no limit)
+    AUTO_ACMG_BATCH_MEMO_MAX_ENTRIES: int = 4096
+    #: Whether to evaluate the criteria of a sequence variant concurrently
+    AUTO_ACMG_PARALLEL_CRITERIA: bool = False
+    #: Maximal number of criteria of a sequence variant evaluated concurrently
+    AUTO_ACMG_CRITERIA_MAX_CONCURRENCY: int = 8
+
+    #: Implementation of MaxEntScan: compiled if its extension is built, pure Python otherwise
+    AUTO_ACMG_MAXENT_BACKEND: Literal["auto", "compiled", "python"] = "auto"
+
+    #: Whether to attach the time spent per stage to the prediction results
+    AUTO_ACMG_ATTACH_TIMINGS: bool = False
+
+    # === API worker settings ===
+
+    #: Maximal number of predictions run concurrently by an API worker process
+    AUTO_ACMG_API_MAX_WORKERS: int = 8
+    #: Maximal number of API requests waiting for a free worker, further requests are rejected
+    AUTO_ACMG_API_MAX_QUEUE: int = 64
+    #: Time in seconds an API request waits for a free worker before it is rejected (0 for no limit)
+    AUTO_ACMG_API_QUEUE_TIMEOUT: float = 60.0
+    #: Whether to record the API request metrics and serve them on ``/metrics``
+    AUTO_ACMG_ENABLE_METRICS: bool = True
+
+    # === HTTP connection pool settings ===
+
+    #: Maximal number of connections in the shared HTTP connection pool
+    AUTO_ACMG_HTTP_MAX_CONNECTIONS: int = 100
+    #: Maximal number of idle keep-alive connections in the shared HTTP connection pool
+    AUTO_ACMG_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    #: Time in seconds after which idle keep-alive connections are closed
+    AUTO_ACMG_HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    #: Timeout in seconds for requests to the upstream services
+    AUTO_ACMG_HTTP_TIMEOUT: float = 5.0
+    #: Whether to use HTTP/2 for the upstream services (requires the ``h2`` package)
+    AUTO_ACMG_HTTP2: bool = False
+
+    #: Maximal number of range chunks fetched concurrently from Annonars for a single range query
+    AUTO_ACMG_ANNONARS_RANGE_CONCURRENCY: int = 4
+    #: Maximal number of alternative alleles looked up concurrently in Annonars for PS1/PM5
+    AUTO_ACMG_ANNONARS_VARIANT_CONCURRENCY: int = 4
+    #: Whether to answer Annonars range queries from the in-memory range cache
+    AUTO_ACMG_USE_RANGE_CACHE: bool = False
+    #: Size in base pairs of the genomic bins of the range cache, at most the Annonars range limit
+    AUTO_ACMG_RANGE_CACHE_BIN_SIZE: int = Field(default=5000, gt=0, le=5000)
+    #: Maximal number of bins kept in the range cache
+    AUTO_ACMG_RANGE_CACHE_MAX_BINS: int = 1000
+
+    #: Whether to load the bundled UniProt and RepeatMasker tracks into memory instead of tabix
+    AUTO_ACMG_USE_TRACK_INDEX: bool = False
 
     # === API settings ===
 
@@ -55,6 +132,7 @@ class Settings(BaseSettings):
     # ==== Temporary settings ===
 
     #: Flag to indicate if the duplication is in tandem AND disrupts reading frame AND undergoes NMD
+    #: (used by ``AutoACMGOptions.default``, the API passes it per request instead)
     DUPLICATION_TANDEM: bool = False
 
     #: Path to the root directory
@@ -0,0 +1,145 @@
+"""Bounded offloading of the synchronous predictions from the event loop of the API."""
+
+import asyncio
+import functools
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Callable, MutableMapping, Optional, TypeVar
+
+from loguru import logger
+
+from src.core.config import settings
+from src.defs.exceptions import ServerBusyError
+
+T = TypeVar("T")
+
+#: Lock guarding the executor and the admission counter.
+_lock = threading.Lock()
+#: Shared thread pool running the predictions.
+_executor: Optional[ThreadPoolExecutor] = None
+#: Worker slots by event loop. Semaphores are bound to the loop they are used in.
+_slots: MutableMapping[asyncio.AbstractEventLoop, asyncio.Semaphore] = weakref.WeakKeyDictionary()
+#: Number of calls running or waiting for a worker slot.
+_pending = 0
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the shared thread pool, created with ``AUTO_ACMG_API_MAX_WORKERS`` threads."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max(1, settings.AUTO_ACMG_API_MAX_WORKERS),
+                thread_name_prefix="auto-acmg",
+            )
+        return _executor
+
+
+def _get_slots() -> asyncio.Semaphore:
+    """Return the worker slots of the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        slots = _slots.get(loop)
+        if slots is None:
+            slots = asyncio.Semaphore(max(1, settings.AUTO_ACMG_API_MAX_WORKERS))
+            _slots[loop] = slots
+        return slots
+
+
+def _is_full() -> bool:
+    """Whether the running and queued calls reached the limit. Must be called under the lock."""
+    max_workers = max(1, settings.AUTO_ACMG_API_MAX_WORKERS)
+    return _pending >= max_workers + max(0, settings.AUTO_ACMG_API_MAX_QUEUE)
+
+
+def pending_calls() -> int:
+    """Number of calls running or waiting for a worker."""
+    return _pending
+
+
+def check_capacity() -> None:
+    """Check that a new call would be admitted, e.g. before starting to stream a batch.
+
+    Raises:
+        ServerBusyError: If the queue is full.
+    """
+    with _lock:
+        if _is_full():
+            logger.warning("Rejecting a request, {} calls are running or queued.", _pending)
+            raise ServerBusyError("Too many requests are waiting, try again later.")
+
+
+async def run_in_executor(func: Callable[..., T], *args, wait: bool = False) -> T:
+    """Run ``func(*args)`` on the shared thread pool without blocking the event loop.
+
+    At most ``AUTO_ACMG_API_MAX_WORKERS`` calls run at the same time. Up to
+    ``AUTO_ACMG_API_MAX_QUEUE`` further calls wait for a worker, each for at most
+    ``AUTO_ACMG_API_QUEUE_TIMEOUT`` seconds. Calls beyond that are rejected right away, so an
+    overloaded worker process sheds load instead of piling up requests. The context variables of
+    the caller are visible to ``func``. A call that started keeps its worker until it finished,
+    even if the caller is cancelled, as the thread cannot be interrupted.
+
+    Args:
+        func: The function to run.
+        args: The arguments of ``func``.
+        wait: Never reject the call but wait for a worker as long as it takes. Used for the items
+            of an admitted batch, which bounds its own concurrency. The call still counts towards
+            the queue, so single requests are rejected while batches keep the workers busy.
+
+    Raises:
+        ServerBusyError: If the queue is full or no worker became free in time.
+    """
+    global _pending
+    with _lock:
+        if not wait and _is_full():
+            logger.warning("Rejecting a call, {} calls are running or queued.", _pending)
+            raise ServerBusyError("Too many requests are waiting, try again later.")
+        _pending += 1
+    try:
+        slots = _get_slots()
+        timeout = None if wait else settings.AUTO_ACMG_API_QUEUE_TIMEOUT or None
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout)
+        except asyncio.TimeoutError:
+            raise ServerBusyError("Timed out waiting for a free worker, try again later.")
+    except BaseException:
+        _release(None)
+        raise
+    try:
+        call = functools.partial(copy_context().run, func, *args)
+        future = asyncio.get_running_loop().run_in_executor(get_executor(), call)
+    except BaseException:
+        _release(slots)
+        raise
+    future.add_done_callback(functools.partial(_on_call_done, slots))
+    # A started call cannot be interrupted, so it keeps its worker until it finishes even if the
+    # caller is cancelled.
+    return await asyncio.shield(future)
+
+
+def _release(slots: Optional[asyncio.Semaphore]) -> None:
+    """Give back the worker slot, if one was taken, and the place in the queue of a call."""
+    global _pending
+    if slots is not None:
+        slots.release()
+    with _lock:
+        _pending -= 1
+
+
+def _on_call_done(slots: asyncio.Semaphore, future: asyncio.Future) -> None:
+    """Release the worker of a call once its thread finished."""
+    if not future.cancelled():
+        # Retrieve the exception, the caller may have gone away and never will.
+        future.exception()
+    _release(slots)
+
+
+def shutdown_executor() -> None:
+    """Shut the shared thread pool down, cancelling the calls that did not start yet."""
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,128 @@
+"""Process-wide registry of shared HTTP clients for the upstream services."""
+
+import asyncio
+import importlib.util
+import threading
+import weakref
+from typing import Dict, MutableMapping, Optional
+
+import httpx
+from loguru import logger
+
+from src.core.config import settings
+
+#: Name of the default connection pool.
+DEFAULT_POOL = "reev"
+
+#: Lock guarding the client registry.
+_lock = threading.Lock()
+#: Shared synchronous clients by pool name.
+_clients: Dict[str, httpx.Client] = {}
+#: Shared asynchronous clients by event loop and pool name. Async clients are bound to the event
+#: loop they are used in, so they are registered per loop and dropped together with the loop.
+_async_clients: MutableMapping[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]] = (
+    weakref.WeakKeyDictionary()
+)
+#: Transport of the synchronous clients instead of the network, e.g. to replay recorded responses.
+_transport: Optional[httpx.BaseTransport] = None
+
+
+def _use_http2() -> bool:
+    """Return whether HTTP/2 is enabled and available."""
+    if not settings.AUTO_ACMG_HTTP2:
+        return False
+    if importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP/2 is enabled, but the 'h2' package is missing. Using HTTP/1.1.")
+        return False
+    return True
+
+
+def _limits() -> httpx.Limits:
+    """Connection pool limits from the settings."""
+    return httpx.Limits(
+        max_connections=settings.AUTO_ACMG_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.AUTO_ACMG_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.AUTO_ACMG_HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+def get_http_client(pool: str = DEFAULT_POOL) -> httpx.Client:
+    """Return the shared synchronous HTTP client of the given connection pool.
+
+    The client is created on first use and reused by all API clients of the process, so
+    connections to the upstream services are kept alive across requests and variants.
+
+    Args:
+        pool: Name of the connection pool.
+
+    Returns:
+        httpx.Client: The shared client.
+    """
+    with _lock:
+        client = _clients.get(pool)
+        if client is None or client.is_closed:
+            client = httpx.Client(
+                limits=_limits(),
+                timeout=settings.AUTO_ACMG_HTTP_TIMEOUT,
+                http2=_use_http2(),
+                transport=_transport,
+            )
+            _clients[pool] = client
+        return client
+
+
+def get_async_http_client(pool: str = DEFAULT_POOL) -> httpx.AsyncClient:
+    """Return the shared asynchronous HTTP client of the given connection pool.
+
+    Must be called from within a running event loop, the client is shared by all API clients
+    running in that loop.
+
+    Args:
+        pool: Name of the connection pool.
+
+    Returns:
+        httpx.AsyncClient: The shared client.
+    """
+    loop = asyncio.get_running_loop()
+    with _lock:
+        loop_clients = _async_clients.setdefault(loop, {})
+        client = loop_clients.get(pool)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=_limits(), timeout=settings.AUTO_ACMG_HTTP_TIMEOUT, http2=_use_http2()
+            )
+            loop_clients[pool] = client
+        return client
+
+
+def set_http_transport(transport: Optional[httpx.BaseTransport]) -> None:
+    """Send the requests of the shared synchronous clients through ``transport``.
+
+    The current clients are closed, so API clients created afterwards use the transport. Used by
+    the benchmarks to replay recorded upstream responses.
+
+    Args:
+        transport: The transport, None to use the network again.
+    """
+    global _transport
+    close_http_clients()
+    with _lock:
+        _transport = transport
+
+
+def close_http_clients() -> None:
+    """Close all shared synchronous HTTP clients."""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
+
+
+async def aclose_http_clients() -> None:
+    """Close the shared asynchronous HTTP clients of the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = list(_async_clients.pop(loop, {}).values())
+    for client in clients:
+        await client.aclose()
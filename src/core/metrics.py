@@ -0,0 +1,350 @@
+"""Operational metrics of the API in the Prometheus text format.
+
+The metrics are kept per process, so with several worker processes each one has to be scraped, or
+the workers have to be run behind a single process. Recording a value takes a lock and a few
+dictionary lookups; everything derived, like the cache hit ratios and the stage totals of
+:mod:`src.core.timing`, is computed when the metrics are scraped.
+"""
+
+import bisect
+import threading
+import time
+from typing import Awaitable, Callable, Dict, List, MutableMapping, Sequence, Tuple
+
+from src.core.executor import pending_calls
+from src.core.timing import Span, add_span_listener, get_timings
+
+#: Content type of the Prometheus text format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+#: Upper bounds of the latency buckets in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+#: Label values of a metric
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    """Escape a label value."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """Format label names and values as ``{name="value",...}``, empty without labels."""
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return f"{{{pairs}}}"
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value, integral values without a fraction."""
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+class Metric:
+    """Base class of the metrics, a family of samples with the same labels."""
+
+    #: Prometheus metric type
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        #: Name of the metric.
+        self.name = name
+        #: Help text of the metric.
+        self.documentation = documentation
+        #: Names of the labels.
+        self.label_names = tuple(label_names)
+        #: Lock guarding the samples.
+        self._lock = threading.Lock()
+
+    def _header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+
+    def render(self) -> List[str]:
+        """Return the lines of the metric in the text format."""
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        """Drop all samples."""
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Monotonically increasing value per label values."""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        #: Values by label values.
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        """Increase the value of ``labels`` by ``amount``."""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def values(self) -> Dict[Labels, float]:
+        """Return a copy of the values by label values."""
+        with self._lock:
+            return dict(self._values)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> List[str]:
+        return self._header() + [
+            f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+            for labels, value in sorted(self.values().items())
+        ]
+
+
+class Gauge(Counter):
+    """Value per label values that can go up and down."""
+
+    type = "gauge"
+
+    def dec(self, labels: Labels = (), amount: float = 1.0) -> None:
+        """Decrease the value of ``labels`` by ``amount``."""
+        self.inc(labels, -amount)
+
+    def set(self, labels: Labels, value: float) -> None:
+        """Set the value of ``labels``."""
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets per label values."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, label_names)
+        #: Upper bounds of the buckets, without the implicit ``+Inf`` bucket.
+        self.buckets = tuple(sorted(buckets))
+        #: Per label values: the (non-cumulative) bucket counts, including ``+Inf``, and the sum.
+        self._values: Dict[Labels, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        """Add an observation of ``labels``."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = {
+                labels: (list(counts), total[0]) for labels, (counts, total) in self._values.items()
+            }
+        lines = self._header()
+        label_names = self.label_names + ("le",)
+        for labels, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(label_names, labels + (le,))} {cumulative}"
+                )
+            formatted = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{formatted} {_format_value(total)}")
+            lines.append(f"{self.name}_count{formatted} {cumulative}")
+        return lines
+
+
+#: Latency of the API requests.
+HTTP_REQUEST_DURATION = Histogram(
+    "auto_acmg_http_request_duration_seconds",
+    "Latency of the API requests, until the response is sent completely.",
+    ("method", "endpoint", "status"),
+)
+#: API requests in progress.
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "auto_acmg_http_requests_in_progress", "API requests in progress.", ("method",)
+)
+#: Latency of the predictions by predictor.
+PREDICTION_DURATION = Histogram(
+    "auto_acmg_prediction_duration_seconds",
+    "Latency of the predictions by predictor class and whether they were served from the cache.",
+    ("predictor", "cached"),
+)
+#: Latency of the requests to the upstream services.
+UPSTREAM_REQUEST_DURATION = Histogram(
+    "auto_acmg_upstream_request_duration_seconds",
+    "Latency of the requests to the upstream services.",
+    ("service",),
+)
+#: Requests to the upstream services by outcome.
+UPSTREAM_REQUESTS = Counter(
+    "auto_acmg_upstream_requests_total",
+    "Requests to the upstream services by outcome (ok or error).",
+    ("service", "outcome"),
+)
+#: Payload bytes received from the upstream services.
+UPSTREAM_RESPONSE_BYTES = Counter(
+    "auto_acmg_upstream_response_bytes_total",
+    "Payload bytes received from the upstream services.",
+    ("service",),
+)
+#: Cache lookups by tier and result.
+CACHE_REQUESTS = Counter(
+    "auto_acmg_cache_requests_total",
+    "Cache lookups by tier (memory, persistent, memo, range, prediction) and result (hit or miss).",
+    ("tier", "result"),
+)
+
+#: Metrics recorded as they happen, in the order of the output.
+METRICS: List[Metric] = [
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS_IN_PROGRESS,
+    PREDICTION_DURATION,
+    UPSTREAM_REQUEST_DURATION,
+    UPSTREAM_REQUESTS,
+    UPSTREAM_RESPONSE_BYTES,
+    CACHE_REQUESTS,
+]
+
+
+def record_cache_access(tier: str, hit: bool) -> None:
+    """Count a lookup of the cache ``tier``."""
+    CACHE_REQUESTS.inc((tier, "hit" if hit else "miss"))
+
+
+def _observe_upstream_request(span: Span, seconds: float) -> None:
+    """Record the spans of the upstream requests, named ``"<service>.http"``."""
+    if not span.name.endswith(".http"):
+        return
+    service = span.name[: -len(".http")]
+    UPSTREAM_REQUEST_DURATION.observe(seconds, (service,))
+    UPSTREAM_REQUESTS.inc((service, "error" if span.error else "ok"))
+    if span.bytes:
+        UPSTREAM_RESPONSE_BYTES.inc((service,), span.bytes)
+
+
+add_span_listener(_observe_upstream_request)
+
+
+def _render_derived() -> List[str]:
+    """Render the metrics computed at scrape time."""
+    lines = []
+    predictions = Gauge(
+        "auto_acmg_predictions_in_progress",
+        "Predictions running or waiting for a worker of the API thread pool.",
+    )
+    predictions.set((), pending_calls())
+    lines += predictions.render()
+
+    ratios = Gauge(
+        "auto_acmg_cache_hit_ratio",
+        "Share of the cache lookups that were hits, by tier.",
+        ("tier",),
+    )
+    lookups: Dict[str, Dict[str, float]] = {}
+    for (tier, result), count in CACHE_REQUESTS.values().items():
+        lookups.setdefault(tier, {})[result] = count
+    for tier, counts in lookups.items():
+        total = counts.get("hit", 0.0) + counts.get("miss", 0.0)
+        if total:
+            ratios.set((tier,), counts.get("hit", 0.0) / total)
+    lines += ratios.render()
+
+    stage_seconds = Counter(
+        "auto_acmg_stage_seconds_total", "Wall time spent in the prediction stages.", ("stage",)
+    )
+    stage_calls = Counter(
+        "auto_acmg_stage_calls_total", "Calls of the prediction stages.", ("stage",)
+    )
+    stage_errors = Counter(
+        "auto_acmg_stage_errors_total", "Failed calls of the prediction stages.", ("stage",)
+    )
+    for stage, timing in get_timings().items():
+        stage_seconds.inc((stage,), timing.seconds)
+        stage_calls.inc((stage,), timing.calls)
+        stage_errors.inc((stage,), timing.errors)
+    for metric in (stage_seconds, stage_calls, stage_errors):
+        lines += metric.render()
+    return lines
+
+
+def render_metrics() -> str:
+    """Return all metrics in the Prometheus text format."""
+    lines: List[str] = []
+    for metric in METRICS:
+        lines += metric.render()
+    lines += _render_derived()
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics() -> None:
+    """Drop all recorded values, e.g. between tests."""
+    for metric in METRICS:
+        metric.reset()
+
+
+#: ASGI callables
+Scope = MutableMapping
+Receive = Callable[[], Awaitable[MutableMapping]]
+Send = Callable[[MutableMapping], Awaitable[None]]
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording the latency and the number of in-flight API requests.
+
+    Requests are labelled with the path template of their route, e.g.
+    ``/api/v1/predict/seqvar``, so the number of label values stays bounded. Requests that match
+    no route are labelled ``unmatched``.
+    """
+
+    def __init__(self, app: Callable[[Scope, Receive, Send], Awaitable[None]]):
+        #: The wrapped application.
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        status = 500
+
+        async def send_with_status(message: MutableMapping) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        # The route is only known once the request was routed, so the requests in progress are
+        # counted by method.
+        HTTP_REQUESTS_IN_PROGRESS.inc((method,))
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            seconds = time.perf_counter() - start
+            HTTP_REQUESTS_IN_PROGRESS.dec((method,))
+            HTTP_REQUEST_DURATION.observe(seconds, (method, self._endpoint(scope), str(status)))
+
+    @staticmethod
+    def _endpoint(scope: Scope) -> str:
+        """Path template of the route of a request, ``unmatched`` if it was not routed."""
+        route = scope.get("route")
+        return getattr(route, "path", None) or "unmatched"
@@ -0,0 +1,225 @@
+"""Cache of whole predictions, so repeated predictions of a variant skip the pipeline.
+
+Entries are keyed by the normalised variant, its genome release, the prediction options and the
+version of the upstream data (``AUTO_ACMG_DATA_VERSION``). Each entry records the predictor that
+made it together with the versions of its VCEP specifications, so entries of predictors that were
+remapped or whose specifications were updated are treated as misses. The entity tags (ETags) of
+the predictions are derived from their content, the API uses them for conditional requests.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+from typing import List, Optional, Type, Union
+
+from loguru import logger
+from pydantic import BaseModel
+
+from src.core.cache import CacheBackend, MemoryCache, get_cache_backend
+from src.core.config import settings
+from src.core.metrics import record_cache_access
+from src.defs.auto_acmg import AutoACMGOptions, AutoACMGSeqVarResult, AutoACMGStrucVarResult
+from src.defs.seqvar import SeqVar
+from src.defs.strucvar import StrucVar
+
+#: Version of the format of the entries, bump it on incompatible changes of the result models.
+PREDICTION_CACHE_VERSION = 1
+
+
+class CachedPrediction(BaseModel):
+    """Entry of the prediction cache."""
+
+    #: Kind of the prediction, "seqvar" or "strucvar"
+    kind: str
+    #: Predictor and the versions of its VCEP specifications, see :func:`predictor_fingerprint`
+    predictor: str
+    #: HGNC ID of the gene the predictor was selected for
+    hgnc_id: str = ""
+    #: SHA-256 digest of the prediction
+    digest: str
+    #: The prediction as JSON
+    prediction: str
+
+    def to_result(
+        self, variant: Union[SeqVar, StrucVar]
+    ) -> Union[AutoACMGSeqVarResult, AutoACMGStrucVarResult]:
+        """Return a fresh copy of the cached prediction for ``variant``.
+
+        The same variant may be requested under different names, so the variant of the result is
+        replaced by ``variant``, which carries the name of the current request.
+        """
+        if self.kind == "strucvar":
+            strucvar_result = AutoACMGStrucVarResult.model_validate_json(self.prediction)
+            if isinstance(variant, StrucVar):
+                strucvar_result.strucvar = variant
+            return strucvar_result
+        seqvar_result = AutoACMGSeqVarResult.model_validate_json(self.prediction)
+        if isinstance(variant, SeqVar):
+            seqvar_result.seqvar = variant
+        return seqvar_result
+
+    def etag(self, variant: Union[SeqVar, StrucVar]) -> str:
+        """Strong entity tag of the prediction for ``variant``, including the quotes."""
+        tag = hashlib.sha256(f"{self.digest}\n{variant.user_repr}".encode()).hexdigest()
+        return f'"{tag[:32]}"'
+
+
+def predictor_fingerprint(predictor_class: Type) -> str:
+    """Name of a predictor with the versions of the VCEP specifications of its module.
+
+    The specifications are the ``SPEC`` or ``SPECs`` of the module defining the predictor, e.g.
+    ``"VHLPredictor[GN078:1.0.0]"``.
+    """
+    module = sys.modules.get(predictor_class.__module__)
+    specs: List = list(getattr(module, "SPECs", None) or [])
+    if getattr(module, "SPEC", None) is not None:
+        specs.append(getattr(module, "SPEC"))
+    versions = ",".join(f"{spec.identifier}:{spec.version}" for spec in specs)
+    return f"{predictor_class.__name__}[{versions}]"
+
+
+def variant_key(variant: Union[SeqVar, StrucVar]) -> str:
+    """Normalised representation of a resolved variant, independent of how it was named."""
+    if isinstance(variant, StrucVar):
+        return (
+            f"{variant.genome_release.name}-{variant.chrom}-{variant.start}-{variant.stop}"
+            f"-{variant.sv_type.name}"
+        )
+    return (
+        f"{variant.genome_release.name}-{variant.chrom}-{variant.pos}-{variant.delete}"
+        f"-{variant.insert}"
+    )
+
+
+class PredictionCache:
+    """Two-tier cache of predictions.
+
+    The in-memory tier holds the serialised entries of the process. The persistent tier is used if
+    ``AUTO_ACMG_USE_CACHE`` is set and stores the entries next to the cached upstream responses,
+    in the configured backend, so they are shared between worker processes and restarts.
+    """
+
+    def __init__(self):
+        #: In-memory tier.
+        self.memory = MemoryCache(
+            max_entries=settings.AUTO_ACMG_PREDICTION_CACHE_MAX_ENTRIES,
+            ttl=settings.AUTO_ACMG_PREDICTION_CACHE_TTL,
+        )
+        #: Persistent tier, only set up if the cache is used.
+        self.backend: Optional[CacheBackend] = None
+        if settings.AUTO_ACMG_USE_CACHE:
+            self.backend = get_cache_backend(
+                settings.AUTO_ACMG_CACHE_BACKEND,
+                os.path.join(settings.AUTO_ACMG_CACHE_DIR, "predictions"),
+                ttl=settings.AUTO_ACMG_PREDICTION_CACHE_TTL,
+            )
+
+    @staticmethod
+    def key(variant: Union[SeqVar, StrucVar], options: AutoACMGOptions) -> str:
+        """Cache key of the prediction of ``variant`` with ``options``."""
+        return json.dumps(
+            [
+                PREDICTION_CACHE_VERSION,
+                settings.AUTO_ACMG_DATA_VERSION,
+                variant_key(variant),
+                options.model_dump(mode="json"),
+            ],
+            sort_keys=True,
+        )
+
+    def get(
+        self, variant: Union[SeqVar, StrucVar], options: AutoACMGOptions
+    ) -> Optional[CachedPrediction]:
+        """Return the cached entry of the prediction, if any.
+
+        The caller has to check that the predictor of the entry is still current.
+        """
+        key = self.key(variant, options)
+        entry = self.memory.get(key)
+        if entry is None and self.backend is not None:
+            value = self.backend.get(key)
+            if value is not None:
+                entry = CachedPrediction.model_validate(value)
+                self.memory.put(key, entry)
+        record_cache_access("prediction", entry is not None)
+        return entry
+
+    def put(
+        self,
+        variant: Union[SeqVar, StrucVar],
+        options: AutoACMGOptions,
+        prediction: Union[AutoACMGSeqVarResult, AutoACMGStrucVarResult],
+        predictor: str,
+        hgnc_id: str = "",
+    ) -> CachedPrediction:
+        """Store a prediction and return its entry.
+
+        Args:
+            variant: The resolved variant.
+            options: The options of the prediction.
+            prediction: The prediction result.
+            predictor: The fingerprint of the predictor, see :func:`predictor_fingerprint`.
+            hgnc_id: The HGNC ID of the gene the predictor was selected for.
+        """
+        prediction_json = prediction.model_dump_json()
+        entry = CachedPrediction(
+            kind="strucvar" if isinstance(prediction, AutoACMGStrucVarResult) else "seqvar",
+            predictor=predictor,
+            hgnc_id=hgnc_id,
+            digest=hashlib.sha256(prediction_json.encode()).hexdigest(),
+            prediction=prediction_json,
+        )
+        key = self.key(variant, options)
+        self.memory.put(key, entry)
+        if self.backend is not None:
+            self.backend.put(key, entry.model_dump(mode="json"))
+        return entry
+
+    def invalidate(
+        self,
+        variant: Optional[Union[SeqVar, StrucVar]] = None,
+        options: Optional[AutoACMGOptions] = None,
+    ) -> None:
+        """Drop the cached prediction of ``variant`` with ``options``, or all predictions.
+
+        Args:
+            variant: The resolved variant, all predictions are dropped if not given.
+            options: The options of the prediction, defaults to :meth:`AutoACMGOptions.default`.
+        """
+        if variant is None:
+            logger.info("Invalidating all cached predictions.")
+            self.memory.clear()
+            if self.backend is not None:
+                self.backend.clear()
+            return
+        key = self.key(variant, options or AutoACMGOptions.default())
+        self.memory.delete(key)
+        if self.backend is not None:
+            self.backend.delete(key)
+
+
+#: Process-wide prediction cache, created on first use.
+_prediction_cache: Optional[PredictionCache] = None
+#: Lock guarding the creation of the prediction cache.
+_prediction_cache_lock = threading.Lock()
+
+
+def get_prediction_cache() -> PredictionCache:
+    """Return the process-wide prediction cache, configured from the settings on first use."""
+    global _prediction_cache
+    with _prediction_cache_lock:
+        if _prediction_cache is None:
+            _prediction_cache = PredictionCache()
+        return _prediction_cache
+
+
+def reset_prediction_cache() -> None:
+    """Drop the process-wide prediction cache, so it is re-created from the settings.
+
+    Unlike :meth:`PredictionCache.invalidate`, the persistent tier is kept.
+    """
+    global _prediction_cache
+    with _prediction_cache_lock:
+        _prediction_cache = None
@@ -0,0 +1,221 @@
+"""Lightweight timing of the stages of a prediction.
+
+A stage, e.g. an upstream request or a criterion, is timed with :func:`span` or :func:`timed`.
+Each stage records its number of calls and errors, its wall time, the cache hits and misses and
+the payload bytes reported while it is the innermost active span. The figures are aggregated
+for the whole process and, within :func:`collect_timings`, for a single prediction. Spans opened
+in worker threads started with ``copy_context().run`` count towards the prediction that started
+them.
+"""
+
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+from src.defs.timing import AutoACMGStageTiming
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class Span:
+    """An active span, collecting the cache accesses and payload bytes of its stage."""
+
+    __slots__ = ("name", "error", "cache_hits", "cache_misses", "bytes")
+
+    def __init__(self, name: str):
+        #: Name of the stage.
+        self.name = name
+        #: Whether the stage failed, set on exceptions or by stages that fail without raising.
+        self.error = False
+        #: Number of cache hits.
+        self.cache_hits = 0
+        #: Number of cache misses.
+        self.cache_misses = 0
+        #: Number of payload bytes received.
+        self.bytes = 0
+
+    def record_cache(self, hit: bool) -> None:
+        """Record a cache hit or miss."""
+        if hit:
+            self.cache_hits += 1
+        else:
+            self.cache_misses += 1
+
+    def record_bytes(self, n_bytes: int) -> None:
+        """Record received payload bytes."""
+        self.bytes += n_bytes
+
+
+class _StageStats:
+    """Mutable aggregate of a stage, see :class:`AutoACMGStageTiming`."""
+
+    __slots__ = ("calls", "errors", "seconds", "max_seconds", "cache_hits", "cache_misses", "bytes")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.bytes = 0
+
+
+class TimingRegistry:
+    """Thread-safe aggregates of the timed stages."""
+
+    def __init__(self):
+        #: Aggregates by stage name.
+        self._stages: Dict[str, _StageStats] = {}
+        #: Lock guarding the aggregates.
+        self._lock = threading.Lock()
+
+    def record(self, span: Span, seconds: float) -> None:
+        """Add a finished span to the aggregates of its stage."""
+        with self._lock:
+            stats = self._stages.get(span.name)
+            if stats is None:
+                stats = self._stages[span.name] = _StageStats()
+            stats.calls += 1
+            stats.errors += span.error
+            stats.seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.cache_hits += span.cache_hits
+            stats.cache_misses += span.cache_misses
+            stats.bytes += span.bytes
+
+    def snapshot(self) -> Dict[str, AutoACMGStageTiming]:
+        """Return a copy of the aggregates by stage name."""
+        with self._lock:
+            return {
+                name: AutoACMGStageTiming(
+                    calls=stats.calls,
+                    errors=stats.errors,
+                    seconds=stats.seconds,
+                    max_seconds=stats.max_seconds,
+                    cache_hits=stats.cache_hits,
+                    cache_misses=stats.cache_misses,
+                    bytes=stats.bytes,
+                )
+                for name, stats in self._stages.items()
+            }
+
+    def reset(self) -> None:
+        """Drop all aggregates."""
+        with self._lock:
+            self._stages.clear()
+
+
+#: Aggregates of the whole process.
+_process_timings = TimingRegistry()
+#: Aggregates of the prediction of the current context, if collected.
+_collector: ContextVar[Optional[TimingRegistry]] = ContextVar("timing_collector", default=None)
+#: Innermost active span of the current context.
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+#: Callables notified of every finished span, see :func:`add_span_listener`.
+_span_listeners: List[Callable[[Span, float], None]] = []
+
+
+def add_span_listener(listener: Callable[[Span, float], None]) -> None:
+    """Call ``listener`` with every finished span and its wall time in seconds.
+
+    Listeners run on the thread that finished the span and must be fast and thread-safe.
+    """
+    _span_listeners.append(listener)
+
+
+@contextmanager
+def span(name: str) -> Iterator[Span]:
+    """Time a stage.
+
+    The span is recorded on exit, as an error if an exception is raised.
+
+    Args:
+        name: The name of the stage, e.g. ``"annonars.get_variant_info"``.
+
+    Yields:
+        Span: The active span, to record cache accesses and payload bytes.
+    """
+    current = Span(name)
+    token = _current_span.set(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    except BaseException:
+        current.error = True
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        _current_span.reset(token)
+        _process_timings.record(current, seconds)
+        collector = _collector.get()
+        if collector is not None:
+            collector.record(current, seconds)
+        for listener in _span_listeners:
+            listener(current, seconds)
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """Decorator timing every call of a function or coroutine function as stage ``name``."""
+
+    def decorator(func: F) -> F:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def record_cache(hit: bool) -> None:
+    """Record a cache hit or miss on the innermost active span, if any."""
+    current = _current_span.get()
+    if current is not None:
+        current.record_cache(hit)
+
+
+def record_bytes(n_bytes: int) -> None:
+    """Record received payload bytes on the innermost active span, if any."""
+    current = _current_span.get()
+    if current is not None:
+        current.record_bytes(n_bytes)
+
+
+@contextmanager
+def collect_timings() -> Iterator[TimingRegistry]:
+    """Collect the timings of the stages run in the current context, e.g. of one prediction.
+
+    Yields:
+        TimingRegistry: The aggregates of the stages run within the block.
+    """
+    collector = TimingRegistry()
+    token = _collector.set(collector)
+    try:
+        yield collector
+    finally:
+        _collector.reset(token)
+
+
+def get_timings() -> Dict[str, AutoACMGStageTiming]:
+    """Return the aggregates of the stages run by the process, by stage name."""
+    return _process_timings.snapshot()
+
+
+def reset_timings() -> None:
+    """Drop the aggregates of the process."""
+    _process_timings.reset()
@@ -0,0 +1,258 @@
+"""Access to the genomic tracks bundled in ``lib``.
+
+The tracks are queried through a process-wide registry of open tabix handles. Alternatively, with
+``AUTO_ACMG_USE_TRACK_INDEX`` they are loaded once into an in-memory :class:`IntervalIndex`.
+"""
+
+import gzip
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+import tabix
+from loguru import logger
+
+from src.core.config import settings
+from src.defs.genome_builds import GenomeRelease
+
+#: File names of the bundled tracks, stored as ``lib/<track>/<release>/<file>``.
+TRACK_FILES: Dict[str, str] = {
+    "uniprot": "uniprot.bed.gz",
+    "rmsk": "rmsk.bed.gz",
+}
+
+
+class TabixHandle:
+    """An open tabix file shared by all threads of a process.
+
+    Queries of a tabix file move its file pointer, so they are serialised by a lock. The records
+    of a query are read under the lock, so the returned list is safe to use afterwards.
+    """
+
+    def __init__(self, path: str):
+        #: Path to the bgzipped and indexed file.
+        self.path = path
+        #: The open tabix file.
+        self.tb: Any = tabix.open(path)
+        #: Process that opened the file, forked children have to reopen it.
+        self.pid = os.getpid()
+        #: Lock serialising the queries.
+        self.lock = threading.Lock()
+
+    def query(self, chrom: str, start: int, end: int) -> List[List[str]]:
+        """Return the records overlapping the 0-based, half-open interval ``[start, end)``.
+
+        Raises:
+            tabix.TabixError: If the query fails.
+        """
+        with self.lock:
+            return list(self.tb.query(chrom, start, end))
+
+
+class IntervalIndex:
+    """Sorted, array-backed index of the intervals of a BED track.
+
+    Per chromosome, the 0-based, half-open intervals are kept in NumPy arrays sorted by start
+    together with the running maximum of their ends. The first interval overlapping a query is
+    then found by two binary searches: the running maximum gives the first interval ending after
+    the query start, and it overlaps the query if it starts before the query end.
+    """
+
+    def __init__(self, intervals: Dict[str, Tuple[np.ndarray, np.ndarray]]):
+        #: Interval starts by chromosome, sorted.
+        self.starts: Dict[str, np.ndarray] = {}
+        #: Interval ends by chromosome, in the order of the starts.
+        self.ends: Dict[str, np.ndarray] = {}
+        #: Running maximum of the interval ends by chromosome.
+        self.max_ends: Dict[str, np.ndarray] = {}
+        for chrom, (starts, ends) in intervals.items():
+            order = np.argsort(starts, kind="stable")
+            self.starts[chrom] = np.asarray(starts, dtype=np.int64)[order]
+            self.ends[chrom] = np.asarray(ends, dtype=np.int64)[order]
+            self.max_ends[chrom] = np.maximum.accumulate(self.ends[chrom])
+
+    @classmethod
+    def from_records(cls, records: Iterable[Tuple[str, int, int]]) -> "IntervalIndex":
+        """Build the index from ``(chrom, start, end)`` records."""
+        columns: Dict[str, Tuple[List[int], List[int]]] = {}
+        for chrom, start, end in records:
+            starts, ends = columns.setdefault(chrom, ([], []))
+            starts.append(start)
+            ends.append(end)
+        return cls(
+            {
+                chrom: (np.array(starts, dtype=np.int64), np.array(ends, dtype=np.int64))
+                for chrom, (starts, ends) in columns.items()
+            }
+        )
+
+    @classmethod
+    def from_bed(cls, path: str) -> "IntervalIndex":
+        """Load the index from a (bgzipped) BED file.
+
+        Raises:
+            OSError: If the file cannot be read.
+            ValueError: If a record is malformed.
+        """
+        with gzip.open(path, "rt") as bed:
+            records = (
+                (fields[0], int(fields[1]), int(fields[2]))
+                for fields in (line.split("\t", 3) for line in bed)
+                if fields[0] and not fields[0].startswith(("#", "track", "browser"))
+            )
+            return cls.from_records(records)
+
+    def __len__(self) -> int:
+        return sum(len(starts) for starts in self.starts.values())
+
+    def query(self, chrom: str, start: int, end: int) -> List[Tuple[int, int]]:
+        """Return the intervals overlapping the 0-based, half-open interval ``[start, end)``.
+
+        The intervals are ordered by start, as a tabix query would return them.
+        """
+        if chrom not in self.starts:
+            return []
+        starts, ends = self.starts[chrom], self.ends[chrom]
+        first = int(np.searchsorted(self.max_ends[chrom], start, side="right"))
+        last = int(np.searchsorted(starts, end, side="left"))
+        hits = np.nonzero(ends[first:last] > start)[0] + first
+        return [(int(starts[i]), int(ends[i])) for i in hits]
+
+    def first_overlap_many(
+        self, chrom: str, starts: np.ndarray, ends: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the first interval overlapping each of the 0-based, half-open query intervals.
+
+        Args:
+            chrom: Chromosome of the queries.
+            starts: Starts of the query intervals.
+            ends: Ends of the query intervals.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Start and end of the first overlapping interval per
+            query, -1 for queries without overlap.
+        """
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.asarray(ends, dtype=np.int64)
+        found_starts = np.full(starts.shape, -1, dtype=np.int64)
+        found_ends = np.full(starts.shape, -1, dtype=np.int64)
+        if chrom not in self.starts or len(self.starts[chrom]) == 0:
+            return found_starts, found_ends
+        interval_starts, interval_ends = self.starts[chrom], self.ends[chrom]
+        first = np.searchsorted(self.max_ends[chrom], starts, side="right")
+        candidates = np.minimum(first, len(interval_starts) - 1)
+        hit = (first < len(interval_starts)) & (interval_starts[candidates] < ends)
+        found_starts[hit] = interval_starts[candidates[hit]]
+        found_ends[hit] = interval_ends[candidates[hit]]
+        return found_starts, found_ends
+
+    def overlaps_many(self, chrom: str, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """Return whether any interval overlaps each of the 0-based, half-open query intervals."""
+        return self.first_overlap_many(chrom, starts, ends)[0] >= 0
+
+
+#: Lock guarding the handle registry.
+_lock = threading.Lock()
+#: Open handles by genome release and track name.
+_handles: Dict[Tuple[GenomeRelease, str], TabixHandle] = {}
+
+
+def track_path(genome_release: GenomeRelease, track: str) -> str:
+    """Path to the file of a bundled track.
+
+    Raises:
+        ValueError: If the track is unknown.
+    """
+    if track not in TRACK_FILES:
+        raise ValueError(f"Unknown track: {track}")
+    release = "grch37" if genome_release == GenomeRelease.GRCh37 else "grch38"
+    return os.path.join(settings.PATH_TO_ROOT, "lib", track, release, TRACK_FILES[track])
+
+
+def get_tabix_handle(genome_release: GenomeRelease, track: str) -> TabixHandle:
+    """Return the shared handle of a track, opening it on first use.
+
+    Raises:
+        ValueError: If the track is unknown.
+        tabix.TabixError: If the file cannot be opened. Failed opens are not registered, so
+            the next call tries again.
+    """
+    key = (genome_release, track)
+    with _lock:
+        handle = _handles.get(key)
+        if handle is None or handle.pid != os.getpid():
+            path = track_path(genome_release, track)
+            logger.debug("Opening tabix file {}", path)
+            handle = TabixHandle(path)
+            _handles[key] = handle
+        return handle
+
+
+def query_track(
+    genome_release: GenomeRelease, track: str, chrom: str, start: int, end: int
+) -> List[List[str]]:
+    """Return the records of a track overlapping the 0-based, half-open interval.
+
+    Raises:
+        ValueError: If the track is unknown.
+        tabix.TabixError: If the file cannot be opened or queried.
+    """
+    return get_tabix_handle(genome_release, track).query(chrom, start, end)
+
+
+def close_tabix_handles() -> None:
+    """Drop all open handles, the files are closed once no query uses them anymore."""
+    with _lock:
+        _handles.clear()
+
+
+#: Lock guarding the interval index registry.
+_index_lock = threading.Lock()
+#: Loaded interval indexes by genome release and track name.
+_indexes: Dict[Tuple[GenomeRelease, str], IntervalIndex] = {}
+
+
+def get_interval_index(genome_release: GenomeRelease, track: str) -> IntervalIndex:
+    """Return the in-memory index of a track, loading it on first use.
+
+    Raises:
+        ValueError: If the track is unknown or malformed.
+        OSError: If the file cannot be read.
+    """
+    key = (genome_release, track)
+    with _index_lock:
+        index = _indexes.get(key)
+        if index is None:
+            path = track_path(genome_release, track)
+            logger.debug("Loading track {} into memory", path)
+            index = IntervalIndex.from_bed(path)
+            logger.debug("Loaded {} intervals from {}", len(index), path)
+            _indexes[key] = index
+        return index
+
+
+def clear_interval_indexes() -> None:
+    """Drop all loaded interval indexes."""
+    with _index_lock:
+        _indexes.clear()
+
+
+def find_intervals(
+    genome_release: GenomeRelease, track: str, chrom: str, start: int, end: int
+) -> List[Tuple[int, int]]:
+    """Return the intervals of a track overlapping the 0-based, half-open interval.
+
+    The in-memory index is used if ``AUTO_ACMG_USE_TRACK_INDEX`` is set, tabix otherwise.
+
+    Raises:
+        ValueError: If the track is unknown or malformed.
+        OSError: If the in-memory index cannot be loaded.
+        tabix.TabixError: If the file cannot be opened or queried with tabix.
+    """
+    if settings.AUTO_ACMG_USE_TRACK_INDEX:
+        return get_interval_index(genome_release, track).query(chrom, start, end)
+    return [
+        (int(record[1]), int(record[2]))
+        for record in query_track(genome_release, track, chrom, start, end)
+    ]
@@ -1,6 +1,6 @@
 """API response models for AutoACMG."""
 
-from typing import List, Union
+from typing import Dict, List, Optional, Union
 
 from pydantic import BaseModel, Field
 
@@ -9,6 +9,7 @@ from src.defs.auto_acmg import (
     AutoACMGCriteriaPred,
     AutoACMGSeqVarScores,
     AutoACMGSeqVarTresholds,
+    AutoACMGStageTiming,
     AutoACMGStrucVarResult,
     GenomicStrand,
 )
@@ -49,6 +50,9 @@ class ApiAutoACMGSeqVarResult(BaseModel):
     seqvar: SeqVar
     data: ApiAutoACMGSeqVarData
     criteria: AutoACMGCriteriaPred
+    timings: Optional[Dict[str, AutoACMGStageTiming]] = Field(
+        default=None, description="The time spent per stage, if enabled on the server"
+    )
 
 
 class SeqVarPredictionResponse(BaseModel):
@@ -66,3 +70,35 @@ class StrucVarPredictionResponse(BaseModel):
 class VariantResolveResponse(BaseModel):
     variant_type: str = Field(..., description="The type of the variant (sequence or structural)")
     resolved_variant: Union[SeqVar, StrucVar] = Field(..., description="The resolved variant")
+
+
+class BatchPredictionRequest(BaseModel):
+    variants: List[str] = Field(
+        ..., min_length=1, description="The names or identifiers of the variants"
+    )
+    genome_release: str = Field(default="GRCh38", description="The genome release version")
+
+
+class StrucVarBatchPredictionRequest(BatchPredictionRequest):
+    duplication_tandem: bool = Field(
+        default=False,
+        description="The duplications are in tandem and disrupt reading frame and undergo NMD",
+    )
+
+
+class SeqVarBatchPredictionLine(BaseModel):
+    index: int = Field(..., description="The position of the variant in the request")
+    variant_name: str = Field(..., description="The variant name as given in the request")
+    prediction: Optional[ApiAutoACMGSeqVarResult] = Field(
+        default=None, description="The prediction result, missing if the prediction failed"
+    )
+    error: Optional[str] = Field(default=None, description="The error if the prediction failed")
+
+
+class StrucVarBatchPredictionLine(BaseModel):
+    index: int = Field(..., description="The position of the variant in the request")
+    variant_name: str = Field(..., description="The variant name as given in the request")
+    prediction: Optional[AutoACMGStrucVarResult] = Field(
+        default=None, description="The prediction result, missing if the prediction failed"
+    )
+    error: Optional[str] = Field(default=None, description="The error if the prediction failed")
@@ -1,13 +1,15 @@
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 
 from pydantic import BaseModel, ConfigDict
 
+from src.core.config import settings
 from src.defs.annonars_variant import GnomadExomes, GnomadMtDna
 from src.defs.core import AutoAcmgBaseEnum, AutoAcmgBaseModel
 from src.defs.genome_builds import GenomeRelease
 from src.defs.mehari import Exon, TranscriptGene, TranscriptSeqvar
 from src.defs.seqvar import SeqVar
 from src.defs.strucvar import StrucVar
+from src.defs.timing import AutoACMGStageTiming
 
 # ============ General ACMG Definitions ============
 
@@ -657,6 +659,8 @@ class AutoACMGSeqVarResult(AutoAcmgBaseModel):
     data: AutoACMGSeqVarData = AutoACMGSeqVarData()
     # ; ACMG criteria prediction
     criteria: AutoACMGCriteriaPred = AutoACMGCriteriaPred()
+    #: Time spent per stage, if ``AUTO_ACMG_ATTACH_TIMINGS`` is set
+    timings: Optional[Dict[str, AutoACMGStageTiming]] = None
 
 
 class AutoACMGStrucVarData(AutoAcmgBaseModel):
@@ -685,6 +689,37 @@ class AutoACMGStrucVarResult(AutoAcmgBaseModel):
     data: AutoACMGStrucVarData = AutoACMGStrucVarData()
     #: ACMG criteria prediction
     criteria: AutoACMGStrucVarPred = AutoACMGStrucVarPred()
+    #: Time spent per stage, if ``AUTO_ACMG_ATTACH_TIMINGS`` is set
+    timings: Optional[Dict[str, AutoACMGStageTiming]] = None
+
+
+class AutoACMGOptions(AutoAcmgBaseModel):
+    """Options of a single prediction.
+
+    The options are passed down to the predictors instead of being read from the global settings,
+    so concurrent predictions with different options do not interfere.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    #: The duplication is in tandem AND disrupts reading frame AND undergoes NMD
+    duplication_tandem: bool = False
+
+    @classmethod
+    def default(cls) -> "AutoACMGOptions":
+        """Return the options of a prediction without explicit options, taken from the settings."""
+        return cls(duplication_tandem=settings.DUPLICATION_TANDEM)
+
+
+class AutoACMGBatchResult(AutoAcmgBaseModel):
+    """Result of a single variant within a batch prediction."""
+
+    #: Variant name as given in the batch
+    variant_name: str
+    #: Prediction result, None if the prediction failed
+    prediction: Optional[Union[AutoACMGSeqVarResult, AutoACMGStrucVarResult]] = None
+    #: Error message if the prediction failed
+    error: Optional[str] = None
 
 
 class VcepSpec(BaseModel):
@@ -47,3 +47,7 @@ class AutoPVS1Error(AutoAcmgBaseException):
 
 class MissingDataError(AutoAcmgBaseException):
     pass
+
+
+class ServerBusyError(AutoAcmgBaseException):
+    pass
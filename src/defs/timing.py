@@ -0,0 +1,22 @@
+"""Models of the timings of the prediction stages."""
+
+from src.defs.core import AutoAcmgBaseModel
+
+
+class AutoACMGStageTiming(AutoAcmgBaseModel):
+    """Time spent in a stage of the prediction, e.g. an upstream request or a criterion."""
+
+    #: Number of calls
+    calls: int = 0
+    #: Number of calls that raised an exception
+    errors: int = 0
+    #: Total wall time in seconds
+    seconds: float = 0.0
+    #: Wall time of the slowest call in seconds
+    max_seconds: float = 0.0
+    #: Number of cache hits
+    cache_hits: int = 0
+    #: Number of cache misses
+    cache_misses: int = 0
+    #: Number of payload bytes received
+    bytes: int = 0
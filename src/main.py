@@ -1,12 +1,26 @@
 """Entry point for the AutoACMG API."""
 
 import pathlib
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
 
 from src.api.internal.api import router as internal_router
 from src.core.config import settings
+from src.core.executor import shutdown_executor
+from src.core.http import aclose_http_clients, close_http_clients
+from src.core.metrics import CONTENT_TYPE, MetricsMiddleware, render_metrics
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Shut the prediction workers and the shared HTTP connection pools down on shutdown."""
+    yield
+    shutdown_executor()
+    await aclose_http_clients()
+    close_http_clients()
+
 
 app = FastAPI(
     title="AutoACMG API",
@@ -15,6 +29,7 @@ app = FastAPI(
     docs_url=f"{settings.API_V1_STR}/docs",
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     debug=settings.DEBUG,
+    lifespan=lifespan,
 )
 
 
@@ -25,3 +40,11 @@ async def favicon():
 
 
 app.include_router(internal_router, prefix=f"{settings.API_V1_STR}")
+
+if settings.AUTO_ACMG_ENABLE_METRICS:
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Serve the operational metrics of the worker process in the Prometheus text format"""
+        return Response(content=render_metrics(), media_type=CONTENT_TYPE)
@@ -1,12 +1,11 @@
 """Implementation of PM1 criteria."""
 
-import os
 from typing import Optional, Tuple
 
 import tabix
 from loguru import logger
 
-from src.core.config import settings
+from src.core.tracks import find_intervals
 from src.defs.auto_acmg import (
     PM1,
     AutoACMGCriteria,
@@ -16,7 +15,6 @@ from src.defs.auto_acmg import (
     GenomicStrand,
 )
 from src.defs.exceptions import AlgorithmError, AutoAcmgBaseException, InvalidAPIResposeError
-from src.defs.genome_builds import GenomeRelease
 from src.defs.seqvar import SeqVar
 from src.utils import AutoACMGHelper
 
@@ -142,25 +140,15 @@ class AutoPM1(AutoACMGHelper):
             None otherwise.
 
         Raises:
-            AlgorithmError: If tabix fails to query the UniProt file.
+            AlgorithmError: If the UniProt track cannot be queried.
         """
         try:
-            # Find path to the lib file
-            if seqvar.genome_release == GenomeRelease.GRCh37:
-                path = os.path.join(
-                    settings.PATH_TO_ROOT, "lib", "uniprot", "grch37", "uniprot.bed.gz"
-                )
-            else:
-                path = os.path.join(
-                    settings.PATH_TO_ROOT, "lib", "uniprot", "grch38", "uniprot.bed.gz"
-                )
-            tb = tabix.open(path)
-            records = tb.query(f"chr{seqvar.chrom}", seqvar.pos - 1, seqvar.pos)
-            # Return the first record
-            for record in records:
-                return int(record[1]), int(record[2])
-            return None
-        except tabix.TabixError as e:
+            domains = find_intervals(
+                seqvar.genome_release, "uniprot", f"chr{seqvar.chrom}", seqvar.pos - 1, seqvar.pos
+            )
+            # Return the first domain
+            return domains[0] if domains else None
+        except (tabix.TabixError, OSError) as e:
             raise AlgorithmError("Failed to check if the variant is in a UniProt domain.") from e
 
     def verify_pm1(self, seqvar: SeqVar, var_data: AutoACMGSeqVarData) -> Tuple[Optional[PM1], str]:
@@ -1,12 +1,11 @@
 """Implementation of PM4 and BP3 rules for sequence variants."""
 
-import os
 from typing import Optional, Tuple
 
 import tabix
 from loguru import logger
 
-from src.core.config import settings
+from src.core.tracks import find_intervals
 from src.defs.auto_acmg import (
     PM4BP3,
     AutoACMGCriteria,
@@ -15,7 +14,6 @@ from src.defs.auto_acmg import (
     AutoACMGStrength,
 )
 from src.defs.exceptions import AlgorithmError, AutoAcmgBaseException
-from src.defs.genome_builds import GenomeRelease
 from src.defs.seqvar import SeqVar
 from src.utils import AutoACMGHelper
 
@@ -41,22 +39,14 @@ class AutoPM4BP3(AutoACMGHelper):
             bool: True if the variant is in a repeat region, False otherwise.
 
         Raises:
-            AlgorithmError: If tabix fails to query the RepeatMasker track.
+            AlgorithmError: If the RepeatMasker track cannot be queried.
         """
         try:
-            # Find path to the lib file
-            if seqvar.genome_release == GenomeRelease.GRCh37:
-                path = os.path.join(settings.PATH_TO_ROOT, "lib", "rmsk", "grch37", "rmsk.bed.gz")
-            else:
-                path = os.path.join(settings.PATH_TO_ROOT, "lib", "rmsk", "grch38", "rmsk.bed.gz")
-            tb = tabix.open(path)
-            records = tb.query(f"chr{seqvar.chrom}", seqvar.pos - 1, seqvar.pos)
-            # Check if iterator is not empty
-            if any(True for _ in records):
-                return True
-            else:
-                return False
-        except tabix.TabixError as e:
+            repeats = find_intervals(
+                seqvar.genome_release, "rmsk", f"chr{seqvar.chrom}", seqvar.pos - 1, seqvar.pos
+            )
+            return bool(repeats)
+        except (tabix.TabixError, OSError) as e:
             raise AlgorithmError("Failed to check if the variant is in a repeat region.") from e
 
     def _is_stop_loss(self, var_data: AutoACMGSeqVarData) -> bool:
@@ -1,10 +1,13 @@
 """Implementation of PS1 and PM5 prediction for sequence variants."""
 
 import re
-from typing import Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import List, Optional, Tuple
 
 from loguru import logger
 
+from src.core.config import settings
 from src.defs.annonars_variant import AnnonarsVariantResponse, VariantResult
 from src.defs.auto_acmg import (
     PS1PM5,
@@ -50,6 +53,43 @@ class AutoPS1PM5(AutoACMGHelper):
         except AutoAcmgBaseException:
             return None
 
+    def _get_alt_vars_info(
+        self, seqvar: SeqVar
+    ) -> List[Tuple[SeqVar, Optional[AnnonarsVariantResponse]]]:
+        """Get variant information for all alternative alleles at the position of the variant.
+
+        The alternative alleles are looked up with :meth:`_get_var_info` concurrently, with up to
+        ``settings.AUTO_ACMG_ANNONARS_VARIANT_CONCURRENCY`` workers.
+
+        Args:
+            seqvar: The sequence variant.
+
+        Returns:
+            List[Tuple[SeqVar, Optional[AnnonarsVariantResponse]]]: The alternative variants and
+            their Annonars responses, None if a variant is not found.
+        """
+        alt_seqvars = [
+            SeqVar(
+                genome_release=seqvar.genome_release,
+                chrom=seqvar.chrom,
+                pos=seqvar.pos,
+                delete=seqvar.delete,
+                insert=alt_base,
+            )
+            for alt_base in DNA_BASES
+            # Skip the same base insert
+            if alt_base != seqvar.insert
+        ]
+        max_workers = min(len(alt_seqvars), settings.AUTO_ACMG_ANNONARS_VARIANT_CONCURRENCY)
+        if max_workers <= 1:
+            return [(alt_seqvar, self._get_var_info(alt_seqvar)) for alt_seqvar in alt_seqvars]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(copy_context().run, self._get_var_info, alt_seqvar)
+                for alt_seqvar in alt_seqvars
+            ]
+        return [(alt_seqvar, future.result()) for alt_seqvar, future in zip(alt_seqvars, futures)]
+
     def _parse_HGVSp(self, pHGVSp: str) -> Optional[AminoAcid]:
         """Parse the pHGVSp from VEP into its components.
 
@@ -186,20 +226,10 @@ class AutoPS1PM5(AutoACMGHelper):
                 raise AlgorithmError("No valid primary amino acid change for PS1/PM5 prediction.")
 
             self.comment_ps1pm5 = f"Primary amino acid change: {primary_aa_change.name}. "
-            for alt_base in DNA_BASES:
-                # Skip the same base insert
-                if alt_base == seqvar.insert:
-                    continue
-
-                self.comment_ps1pm5 += f"Analysing alternative variant with base: {alt_base}. "
-                alt_seqvar = SeqVar(
-                    genome_release=seqvar.genome_release,
-                    chrom=seqvar.chrom,
-                    pos=seqvar.pos,
-                    delete=seqvar.delete,
-                    insert=alt_base,
+            for alt_seqvar, alt_info in self._get_alt_vars_info(seqvar):
+                self.comment_ps1pm5 += (
+                    f"Analysing alternative variant with base: {alt_seqvar.insert}. "
                 )
-                alt_info = self._get_var_info(alt_seqvar)
 
                 if alt_info and alt_info.result.dbnsfp and alt_info.result.dbnsfp.HGVSp_VEP:
                     alt_aa_change = self._parse_HGVSp(alt_info.result.dbnsfp.HGVSp_VEP)
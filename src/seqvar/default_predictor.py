@@ -1,10 +1,19 @@
-from typing import List, Optional
+import copy
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Any, List, Optional, Set, Tuple
 
 from loguru import logger
+from pydantic import PrivateAttr
 
 from src.api.reev.annonars import AnnonarsClient
 from src.core.config import settings
-from src.defs.auto_acmg import AutoACMGSeqVarResult
+from src.core.timing import span
+from src.defs.auto_acmg import (
+    AutoACMGSeqVarData,
+    AutoACMGSeqVarResult,
+    AutoACMGSeqVarTresholds,
+)
 from src.defs.auto_pvs1 import PVS1Prediction
 from src.defs.seqvar import SeqVar
 from src.seqvar.auto_bp7 import AutoBP7
@@ -39,6 +48,47 @@ NOT_IMPLEMENTED_CRITERIA: List[str] = [
     "BP5",  # Case with an alternate molecular basis for disease
 ]
 
+#: Criterion prediction methods and the result fields they fill, in the order of evaluation.
+CRITERIA_METHODS: List[Tuple[str, Tuple[str, ...]]] = [
+    ("predict_pvs1", ("pvs1",)),
+    ("predict_ps1pm5", ("ps1", "pm5")),
+    ("predict_pm1", ("pm1",)),
+    ("predict_pm2ba1bs1bs2", ("pm2", "ba1", "bs1", "bs2")),
+    ("predict_pm4bp3", ("pm4", "bp3")),
+    ("predict_pp2bp1", ("pp2", "bp1")),
+    ("predict_pp3bp4", ("pp3", "bp4")),
+    ("predict_bp7", ("bp7",)),
+]
+
+
+class _TrackedThresholds(AutoACMGSeqVarTresholds):
+    """Thresholds recording which fields a criterion reads and writes."""
+
+    #: Fields read before the criterion wrote them.
+    _read: Set[str] = PrivateAttr(default_factory=set)
+    #: Fields written by the criterion.
+    _written: Set[str] = PrivateAttr(default_factory=set)
+
+    def __getattribute__(self, name: str) -> Any:
+        if name in AutoACMGSeqVarTresholds.model_fields and name not in self._written:
+            self._read.add(name)
+        return super().__getattribute__(name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in AutoACMGSeqVarTresholds.model_fields:
+            self._written.add(name)
+        super().__setattr__(name, value)
+
+    @property
+    def fields_read(self) -> Set[str]:
+        """Fields read before they were written."""
+        return self._read
+
+    @property
+    def fields_written(self) -> Set[str]:
+        """Fields written."""
+        return self._written
+
 
 class DefaultSeqVarPredictor(
     AutoPVS1,
@@ -60,8 +110,83 @@ class DefaultSeqVarPredictor(
         #: Prediction result.
         self.result = result
 
-    def predict(self) -> Optional[AutoACMGSeqVarResult]:
-        """Predict ACMG criteria for the sequence variant."""
+    def _predict_isolated(
+        self, method_name: str, thresholds: AutoACMGSeqVarTresholds
+    ) -> Tuple[Any, _TrackedThresholds]:
+        """Run a criterion prediction on a copy of the predictor and of the variant data.
+
+        The criteria store their comments and predictions on the predictor and VCEP predictors
+        adjust ``var_data.thresholds``. Working on copies keeps concurrently evaluated criteria
+        from overwriting each other's state.
+
+        Args:
+            method_name: Name of the criterion prediction method.
+            thresholds: The thresholds to start from.
+
+        Returns:
+            Tuple[Any, _TrackedThresholds]: The result of the prediction method and the
+            thresholds it worked on, with the fields it read and wrote.
+        """
+        predictor = copy.copy(self)
+        tracked = _TrackedThresholds(**thresholds.model_dump())
+        var_data: AutoACMGSeqVarData = self.result.data.model_copy(update={"thresholds": tracked})
+        with span(f"criteria.{method_name}"):
+            return getattr(predictor, method_name)(self.seqvar, var_data), tracked
+
+    def _predict_timed(self, method_name: str) -> Any:
+        """Run a criterion prediction on the shared predictor state, timed as its stage."""
+        with span(f"criteria.{method_name}"):
+            return getattr(self, method_name)(self.seqvar, self.result.data)
+
+    def _predict_criteria(self, parallel: bool) -> List[Any]:
+        """Evaluate all criteria, in order or concurrently.
+
+        Concurrently, all criteria start from the current thresholds. The threshold changes of
+        each criterion are then applied in the order of ``CRITERIA_METHODS``, and a criterion that
+        read thresholds changed by an earlier one is evaluated again from the changed thresholds.
+        So the results and the final thresholds are the same as in sequential mode.
+
+        Args:
+            parallel: Whether to evaluate the criteria concurrently.
+
+        Returns:
+            List[Any]: The results of the criterion prediction methods in the order of
+            ``CRITERIA_METHODS``.
+        """
+        if not parallel:
+            return [self._predict_timed(method_name) for method_name, _ in CRITERIA_METHODS]
+        max_workers = max(
+            1, min(len(CRITERIA_METHODS), settings.AUTO_ACMG_CRITERIA_MAX_CONCURRENCY)
+        )
+        initial = self.result.data.thresholds
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(copy_context().run, self._predict_isolated, method_name, initial)
+                for method_name, _ in CRITERIA_METHODS
+            ]
+            outcomes = [future.result() for future in futures]
+        thresholds = initial.model_copy()
+        results = []
+        for (method_name, _), (result, tracked) in zip(CRITERIA_METHODS, outcomes):
+            if any(getattr(thresholds, f) != getattr(initial, f) for f in tracked.fields_read):
+                logger.debug("Evaluating {} again with the changed thresholds.", method_name)
+                result, tracked = self._predict_isolated(method_name, thresholds)
+            for field in tracked.fields_written:
+                setattr(thresholds, field, getattr(tracked, field))
+            results.append(result)
+        self.result.data.thresholds = thresholds
+        return results
+
+    def predict(self, *, parallel: Optional[bool] = None) -> Optional[AutoACMGSeqVarResult]:
+        """Predict ACMG criteria for the sequence variant.
+
+        Args:
+            parallel: Whether to evaluate the criteria concurrently on a thread pool. Defaults to
+                ``settings.AUTO_ACMG_PARALLEL_CRITERIA``. In parallel mode, every criterion works
+                on its own copy of the predictor state and of the thresholds. Criteria relying on
+                the threshold adjustments of earlier ones are evaluated again, so the results are
+                the same as in sequential mode.
+        """
         # PP5 and BP6 criteria are depricated
         logger.warning("Note, that PP5 and BP6 criteria are depricated and not predicted.")
         # Not implemented criteria
@@ -70,42 +195,15 @@ class DefaultSeqVarPredictor(
             NOT_IMPLEMENTED_CRITERIA,
         )
 
-        # PVS1
-        self.result.criteria.pvs1 = self.predict_pvs1(self.seqvar, self.result.data)
-
-        # PS1 and PM5
-        self.result.criteria.ps1, self.result.criteria.pm5 = self.predict_ps1pm5(
-            self.seqvar, self.result.data
-        )
-
-        # PM1
-        self.result.criteria.pm1 = self.predict_pm1(self.seqvar, self.result.data)
-
-        # PM2, BA1, BS1 and BS2
-        (
-            self.result.criteria.pm2,
-            self.result.criteria.ba1,
-            self.result.criteria.bs1,
-            self.result.criteria.bs2,
-        ) = self.predict_pm2ba1bs1bs2(self.seqvar, self.result.data)
-
-        # PM4 and BP3
-        self.result.criteria.pm4, self.result.criteria.bp3 = self.predict_pm4bp3(
-            self.seqvar, self.result.data
-        )
-
-        # PP2 and BP1
-        self.result.criteria.pp2, self.result.criteria.bp1 = self.predict_pp2bp1(
-            self.seqvar, self.result.data
-        )
-
-        # PP3 and BP4
-        self.result.criteria.pp3, self.result.criteria.bp4 = self.predict_pp3bp4(
-            self.seqvar, self.result.data
-        )
-
-        # BP7
-        self.result.criteria.bp7 = self.predict_bp7(self.seqvar, self.result.data)
+        if parallel is None:
+            parallel = settings.AUTO_ACMG_PARALLEL_CRITERIA
+        results = self._predict_criteria(parallel)
+        for (_, fields), prediction in zip(CRITERIA_METHODS, results):
+            if len(fields) == 1:
+                setattr(self.result.criteria, fields[0], prediction)
+            else:
+                for field, value in zip(fields, prediction):
+                    setattr(self.result.criteria, field, value)
 
         logger.info("ACMG criteria prediction completed.")
         return self.result
@@ -1,12 +1,13 @@
 """PVS1 criteria for Structural Variants (StrucVar)."""
 
-from typing import Dict, List, Tuple
+import copy
+from typing import Dict, List, Optional, Tuple
 
 from loguru import logger
 
-from src.core.config import settings
 from src.defs.auto_acmg import (
     AutoACMGCriteria,
+    AutoACMGOptions,
     AutoACMGPrediction,
     AutoACMGStrength,
     AutoACMGStrucVarData,
@@ -192,6 +193,9 @@ class StrucVarHelper(AutoACMGHelper):
         if strand == GenomicStrand.NotSet:
             raise MissingDataError("Genomic strand is not set. Cannot remove UTRs.")
 
+        # Work on copies, the exons may be shared with other predictions via the cache
+        exons = [copy.copy(exon) for exon in exons]
+
         if strand == GenomicStrand.Plus:
             # Remove 5' UTR
             exons_remove = []
@@ -630,8 +634,10 @@ class StrucVarHelper(AutoACMGHelper):
 class AutoPVS1(StrucVarHelper):
     """Handles the PVS1 criteria assesment for structural variants."""
 
-    def __init__(self):
+    def __init__(self, options: Optional[AutoACMGOptions] = None):
         super().__init__()
+        #: Options of the prediction, defaults to the global settings.
+        self.options = options or AutoACMGOptions.default()
         self.prediction: PVS1Prediction = PVS1Prediction.NotPVS1
         self.prediction_path: PVS1PredictionStrucVarPath = PVS1PredictionStrucVarPath.NotSet
 
@@ -734,7 +740,7 @@ class AutoPVS1(StrucVarHelper):
             )
             self.comment_pvs1 += "Analysing the duplication variant. => "
 
-            if settings.DUPLICATION_TANDEM:
+            if self.options.duplication_tandem:
                 self.comment_pvs1 += (
                     "The duplication is in tandem AND disrupts reading frame AND undergoes NMD. "
                 )
@@ -4,13 +4,18 @@ from loguru import logger
 
 from src.api.reev.annonars import AnnonarsClient
 from src.core.config import settings
-from src.defs.auto_acmg import AutoACMGStrucVarResult
+from src.defs.auto_acmg import AutoACMGOptions, AutoACMGStrucVarResult
 from src.defs.strucvar import StrucVar
 from src.strucvar.auto_pvs1 import AutoPVS1
 
 
 class DefaultStrucVarPredictor(AutoPVS1):
-    def __init__(self, strucvar: StrucVar, result: AutoACMGStrucVarResult):
+    def __init__(
+        self,
+        strucvar: StrucVar,
+        result: AutoACMGStrucVarResult,
+        options: Optional[AutoACMGOptions] = None,
+    ):
         #: Structural variant to predict.
         self.strucvar = strucvar
         #: Annonars client.
@@ -19,6 +24,8 @@ class DefaultStrucVarPredictor(AutoPVS1):
         )
         #: Prediction result.
         self.result = result
+        #: Options of the prediction, defaults to the global settings.
+        self.options = options or AutoACMGOptions.default()
 
     def predict(self) -> Optional[AutoACMGStrucVarResult]:
         """Predict ACMG criteria for the structural variant."""
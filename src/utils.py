@@ -1,6 +1,11 @@
 """Utility functions for the AutoACMG and AutoPVS1."""
 
-from typing import Dict, List, Tuple, Union
+import importlib
+import importlib.util
+import threading
+from functools import lru_cache
+from types import ModuleType
+from typing import Any, Dict, List, Tuple, Union
 
 import yaml
 from biocommons.seqrepo import SeqRepo
@@ -11,6 +16,7 @@ from lib.maxentpy.maxent import load_matrix3, load_matrix5
 from src.api.reev.annonars import AnnonarsClient
 from src.api.reev.mehari import MehariClient
 from src.core.config import settings
+from src.core.timing import record_bytes, span, timed
 from src.defs.auto_acmg import GenomicStrand, SpliceType, TranscriptInfo
 from src.defs.auto_pvs1 import SeqvarConsequenceMapping, SeqVarPVS1Consequence
 from src.defs.exceptions import AlgorithmError, AutoAcmgBaseException
@@ -28,6 +34,74 @@ class AutoACMGHelper:
         self.annonars_client = AnnonarsClient(api_base_url=settings.AUTO_ACMG_API_ANNONARS_URL)
 
 
+#: Lock guarding the lazily initialised, process-wide resources below.
+_shared_lock = threading.Lock()
+#: SeqRepo handles by data directory.
+_seqrepos: Dict[str, SeqRepo] = {}
+#: Lock serialising the sequence lookups on the shared SeqRepo handles.
+_seqrepo_lock = threading.Lock()
+#: Annonars clients by API base URL.
+_annonars_clients: Dict[str, AnnonarsClient] = {}
+#: MaxEntScan matrices for 5' and 3' splice sites.
+_maxent_matrices: Dict[int, Any] = {}
+
+
+def get_seqrepo() -> SeqRepo:
+    """Return the process-wide SeqRepo handle for the configured data directory."""
+    data_dir = settings.AUTO_ACMG_SEQREPO_DATA_DIR
+    with _shared_lock:
+        if data_dir not in _seqrepos:
+            _seqrepos[data_dir] = SeqRepo(data_dir)
+        return _seqrepos[data_dir]
+
+
+def get_annonars_client() -> AnnonarsClient:
+    """Return the process-wide Annonars client for the configured API URL."""
+    api_base_url = settings.AUTO_ACMG_API_ANNONARS_URL
+    with _shared_lock:
+        if api_base_url not in _annonars_clients:
+            _annonars_clients[api_base_url] = AnnonarsClient(api_base_url=api_base_url)
+        return _annonars_clients[api_base_url]
+
+
+def get_maxent_matrices() -> Tuple[Any, Any]:
+    """Return the process-wide MaxEntScan matrices for 5' and 3' splice sites."""
+    with _shared_lock:
+        if not _maxent_matrices:
+            _maxent_matrices[5] = load_matrix5()
+            _maxent_matrices[3] = load_matrix3()
+        return _maxent_matrices[5], _maxent_matrices[3]
+
+
+@lru_cache
+def _maxent_backend(backend: str) -> ModuleType:
+    """MaxEntScan implementation for the backend setting, see :func:`get_maxent_backend`."""
+    if backend != "python":
+        if importlib.util.find_spec("lib.maxentpy._hashseq") is not None:
+            return importlib.import_module("lib.maxentpy.maxent_fast")
+        if backend == "compiled":
+            logger.warning("The compiled MaxEntScan backend is not built. Using the Python one.")
+    return maxent
+
+
+def get_maxent_backend() -> ModuleType:
+    """Return the MaxEntScan implementation selected by ``AUTO_ACMG_MAXENT_BACKEND``.
+
+    ``compiled`` is ``maxent_fast`` with the Cython ``_hashseq`` extension, ``python`` is ``maxent``
+    with its table-driven k-mer hashing. ``auto`` uses the compiled one if the extension is built.
+    """
+    return _maxent_backend(settings.AUTO_ACMG_MAXENT_BACKEND)
+
+
+def clear_shared_resources() -> None:
+    """Drop the process-wide SeqRepo handles, Annonars clients and MaxEntScan matrices."""
+    with _shared_lock:
+        _seqrepos.clear()
+        _annonars_clients.clear()
+        _maxent_matrices.clear()
+    _maxent_backend.cache_clear()
+
+
 class SplicingPrediction:
     """Splicing prediction for a sequence variant."""
 
@@ -46,16 +120,17 @@ class SplicingPrediction:
         self.strand = strand
         self.exons = exons
         self.splice_type = self.determine_splice_type(consequences)
-        self.annonars_client = AnnonarsClient(api_base_url=settings.AUTO_ACMG_API_ANNONARS_URL)
-        self.sr = SeqRepo(settings.AUTO_ACMG_SEQREPO_DATA_DIR)
+        self.annonars_client = get_annonars_client()
+        self.sr = get_seqrepo()
 
         self.maxentscore_ref = -1.00
         self.maxentscore_alt = -1.00
         self.maxent_foldchange = 1.00
-        self.matrix5 = load_matrix5()
-        self.matrix3 = load_matrix3()
+        self.maxent = get_maxent_backend()
+        self.matrix5, self.matrix3 = get_maxent_matrices()
         self._initialize_maxentscore()
 
+    @timed("splicing.maxentscore")
     def _initialize_maxentscore(self):
         """
         Initialize the MaxEntScan scores for the sequence variant.
@@ -173,14 +248,14 @@ class SplicingPrediction:
         maxentscore_ref, maxentscore_alt = -1.00, -1.00
         if splice_type == SpliceType.Donor:
             if len(refseq) == 9:
-                maxentscore_ref = maxent.score5(refseq, matrix=self.matrix5)
+                maxentscore_ref = self.maxent.score5(refseq, matrix=self.matrix5)
             if len(altseq) == 9:
-                maxentscore_alt = maxent.score5(altseq, matrix=self.matrix5)
+                maxentscore_alt = self.maxent.score5(altseq, matrix=self.matrix5)
         elif splice_type == SpliceType.Acceptor:
             if len(refseq) == 23:
-                maxentscore_ref = maxent.score3(refseq, matrix=self.matrix3)
+                maxentscore_ref = self.maxent.score3(refseq, matrix=self.matrix3)
             if len(altseq) == 23:
-                maxentscore_alt = maxent.score3(altseq, matrix=self.matrix3)
+                maxentscore_alt = self.maxent.score3(altseq, matrix=self.matrix3)
 
         maxent_foldchange = maxentscore_alt / maxentscore_ref
         return (
@@ -222,7 +297,7 @@ class SplicingPrediction:
         rev_comp_seq = [nt_complement[k] for k in reverse_seq]
         return "".join(rev_comp_seq)
 
-    def get_sequence(self, start: int, end: int) -> str:
+    def get_sequence(self, start: int, end: int, *, strand_aware: bool = True) -> str:
         """
         Retrieve the sequence for the specified range.
         The reference sequence is chosen based on the chromosome and genome release from the
@@ -231,6 +306,8 @@ class SplicingPrediction:
         Args:
             start: The start position of the sequence.
             end: The end position of the sequence.
+            strand_aware: Whether to reverse complement the sequence on the minus strand. If
+                False, the forward strand sequence is returned.
 
         Returns:
             str: The sequence for the specified range.
@@ -247,17 +324,23 @@ class SplicingPrediction:
             logger.error("Invalid genome release: {}", self.seqvar.genome_release)
             raise AlgorithmError("Invalid genome release.")
         try:
-            seq = self.sr[chrom][start:end]
-            if self.strand == GenomicStrand.Minus:
+            with span("seqrepo.get_sequence"), _seqrepo_lock:
+                seq = self.sr[chrom][start:end]
+                record_bytes(len(seq))
+            if strand_aware and self.strand == GenomicStrand.Minus:
                 seq = self.reverse_complement(seq)
             return seq
         except Exception as e:
             logger.error("Failed to get sequence for {}:{}-{}. Error: {}", chrom, start, end, e)
             raise AlgorithmError("Failed to get sequence for the specified range.") from e
 
+    @timed("splicing.get_cryptic_ss")
     def get_cryptic_ss(self, refseq: str, splice_type: SpliceType) -> List[Tuple[int, str, float]]:
         """
         Get cryptic splice sites around the variant position.
+
+        The sequence around the variant is fetched once and the splice contexts of all positions
+        are taken from it.
         """
         if splice_type == SpliceType.Unknown:
             logger.warning("Unknown splice type. Cannot predict cryptic splice sites.")
@@ -265,25 +348,33 @@ class SplicingPrediction:
 
         refscore = self.maxentscore_ref
         search_flank = 20  # Flank size for checking positions around the variant
+        context_size = 9 if splice_type == SpliceType.Donor else 23
+        window_start = self.seqvar.pos - search_flank
+        # The splice contexts are scored on the forward strand, whatever the strand of the gene.
+        window = self.get_sequence(
+            window_start, self.seqvar.pos + search_flank + context_size, strand_aware=False
+        )
         cryptic_sites = []
 
-        for offset in range(-search_flank, search_flank + 1):
-            pos = self.seqvar.pos + offset
+        for offset in range(2 * search_flank + 1):
+            pos = window_start + offset
+            splice_context = window[offset : offset + context_size]
             if splice_type == SpliceType.Donor:
-                cryptic_sites.extend(self._find_cryptic_donor_sites(pos, refseq, refscore))
+                cryptic_sites.extend(
+                    self._find_cryptic_donor_sites(pos, splice_context, refseq, refscore)
+                )
             elif splice_type == SpliceType.Acceptor:
-                cryptic_sites.extend(self._find_cryptic_acceptor_sites(pos, refseq, refscore))
+                cryptic_sites.extend(
+                    self._find_cryptic_acceptor_sites(pos, splice_context, refseq, refscore)
+                )
 
         return cryptic_sites
 
     def _find_cryptic_donor_sites(
-        self, pos: int, refseq: str, refscore: float
+        self, pos: int, splice_context: str, refseq: str, refscore: float
     ) -> List[Tuple[int, str, float]]:
         """Find cryptic donor sites."""
-        splice_context = self.get_sequence(pos, pos + 9)
-        if self.strand == GenomicStrand.Minus:
-            splice_context = self.reverse_complement(splice_context)
-        maxentscore = maxent.score5(splice_context, matrix=self.matrix5)
+        maxentscore = self.maxent.score5(splice_context, matrix=self.matrix5)
 
         if (
             splice_context[3:5] in ["GT", refseq[3:5]]
@@ -297,13 +388,10 @@ class SplicingPrediction:
         return []
 
     def _find_cryptic_acceptor_sites(
-        self, pos: int, refseq: str, refscore: float
+        self, pos: int, splice_context: str, refseq: str, refscore: float
     ) -> List[Tuple[int, str, float]]:
         """Find cryptic acceptor sites."""
-        splice_context = self.get_sequence(pos, pos + 23)
-        if self.strand == GenomicStrand.Minus:
-            splice_context = self.reverse_complement(splice_context)
-        maxentscore = maxent.score3(splice_context, matrix=self.matrix3)
+        maxentscore = self.maxent.score3(splice_context, matrix=self.matrix3)
 
         if (
             splice_context[18:20] in ["AG", refseq[18:20]]
@@ -20,7 +20,6 @@ from src.defs.auto_acmg import (
 )
 from src.defs.exceptions import AlgorithmError, AutoAcmgBaseException
 from src.defs.seqvar import SeqVar
-from src.seqvar.auto_ps1_pm5 import DNA_BASES
 from src.seqvar.default_predictor import DefaultSeqVarPredictor
 
 #: VCEP specification for Myeloid Malignancy.
@@ -102,19 +101,7 @@ class MyeloidMalignancyPredictor(DefaultSeqVarPredictor):
             if not primary_aa_change:
                 raise AlgorithmError("No valid primary amino acid change for PS1/PM5 prediction.")
 
-            for alt_base in DNA_BASES:
-                # Skip the same base insert
-                if alt_base == seqvar.insert:
-                    continue
-                alt_seqvar = SeqVar(
-                    genome_release=seqvar.genome_release,
-                    chrom=seqvar.chrom,
-                    pos=seqvar.pos,
-                    delete=seqvar.delete,
-                    insert=alt_base,
-                )
-                alt_info = self._get_var_info(alt_seqvar)
-
+            for _, alt_info in self._get_alt_vars_info(seqvar):
                 if alt_info and alt_info.result.dbnsfp and alt_info.result.dbnsfp.HGVSp_VEP:
                     alt_aa_change = self._parse_HGVSp(alt_info.result.dbnsfp.HGVSp_VEP)
                     if alt_aa_change and self._is_pathogenic(alt_info.result):
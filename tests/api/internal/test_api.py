@@ -1,11 +1,25 @@
+import asyncio
+import json
+import threading
+import time
 from unittest.mock import patch
 
 import pytest
 from fastapi.testclient import TestClient
 
+from src.api.internal.api import _stream_batch
 from src.auto_acmg import AutoACMG
 from src.core.config import settings
-from src.defs.auto_acmg import AutoACMGSeqVarResult, AutoACMGStrucVarResult
+from src.defs.auto_acmg import (
+    AutoACMGBatchResult,
+    AutoACMGOptions,
+    AutoACMGSeqVarResult,
+    AutoACMGStrucVarResult,
+)
+from src.defs.exceptions import AutoAcmgBaseException, ServerBusyError
+from src.defs.genome_builds import GenomeRelease
+from src.defs.seqvar import SeqVar
+from src.defs.strucvar import StrucVar, StrucVarType
 from tests.utils import get_json_object
 
 # ------------------- resolve_variant -------------------
@@ -154,6 +168,36 @@ async def test_predict_strucvar_success(client: TestClient):
     assert "criteria" in result["prediction"]
 
 
+@pytest.mark.parametrize("path", ["/predict/strucvar", "/predict/strucvar/batch"])
+def test_predict_strucvar_duplication_tandem(client: TestClient, strucvar_response, path):
+    """Test that the duplication tandem flag is passed per request, not via the settings."""
+    # Arrange
+    variant_name = "DUP:chr17:41176312:41277500"
+    options = []
+
+    def predict(self):
+        options.append(self.options)
+        return strucvar_response
+
+    # Act
+    with patch.object(AutoACMG, "predict", autospec=True, side_effect=predict):
+        if path.endswith("batch"):
+            response = client.post(
+                f"{settings.API_V1_STR}{path}",
+                json={"variants": [variant_name], "duplication_tandem": True},
+            )
+        else:
+            response = client.get(
+                f"{settings.API_V1_STR}{path}",
+                params={"variant_name": variant_name, "duplication_tandem": True},
+            )
+
+    # Assert
+    assert response.status_code == 200
+    assert options == [AutoACMGOptions(duplication_tandem=True)]
+    assert settings.DUPLICATION_TANDEM is False
+
+
 @pytest.mark.asyncio
 async def test_predict_strucvar_invalid_genome_release(client: TestClient):
     """Test predicting a structural variant with an invalid genome release."""
@@ -206,4 +250,252 @@ async def test_predict_strucvar_sequence_variant(client: TestClient):
     assert "No valid structural variant prediction was made" in response.json()["detail"]
 
 
+# ------------------- batch predictions -------------------
+
+
+def _read_ndjson(response) -> list:
+    """Parse the lines of a streamed batch response, ordered by their index."""
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    return sorted(lines, key=lambda line: line["index"])
+
+
+@pytest.fixture
+def seqvar_response():
+    return AutoACMGSeqVarResult(
+        seqvar=SeqVar(GenomeRelease.GRCh38, "1", 228282272, "G", "A", "chr1:228282272:G:A")
+    )
+
+
+@pytest.fixture
+def strucvar_response():
+    return AutoACMGStrucVarResult(
+        strucvar=StrucVar(
+            StrucVarType.DEL,
+            GenomeRelease.GRCh38,
+            "17",
+            41176312,
+            41277500,
+            "DEL:chr17:41176312:41277500",
+        )
+    )
+
+
+def test_predict_seqvar_batch(client: TestClient, seqvar_response, strucvar_response):
+    """Test that every variant of a batch gets its line, failures included."""
+    # Arrange
+    predictions = {
+        "chr1:228282272:G:A": seqvar_response,
+        "DEL:chr17:41176312:41277500": strucvar_response,
+        "invalid_variant": None,
+    }
+
+    def predict(self):
+        if self.variant_name == "failing_variant":
+            raise AutoAcmgBaseException("Upstream failure")
+        return predictions[self.variant_name]
+
+    # Act
+    with patch.object(AutoACMG, "predict", autospec=True, side_effect=predict):
+        response = client.post(
+            f"{settings.API_V1_STR}/predict/seqvar/batch",
+            json={"variants": [*predictions, "failing_variant"]},
+        )
+
+    # Assert
+    assert response.status_code == 200
+    lines = _read_ndjson(response)
+    assert [line["index"] for line in lines] == [0, 1, 2, 3]
+    assert lines[0]["prediction"]["seqvar"]["user_repr"] == "chr1:228282272:G:A"
+    assert lines[0]["error"] is None
+    assert "exons" not in lines[0]["prediction"]["data"]
+    assert lines[1]["error"] == "No valid sequence variant prediction was made"
+    assert lines[2]["error"] == "Failed to predict the variant."
+    assert lines[3] == {
+        "index": 3,
+        "variant_name": "failing_variant",
+        "prediction": None,
+        "error": "Upstream failure",
+    }
+
+
+def test_predict_strucvar_batch(client: TestClient, seqvar_response, strucvar_response):
+    """Test the structural variant batch endpoint."""
+    # Arrange
+    predictions = {
+        "DEL:chr17:41176312:41277500": strucvar_response,
+        "chr1:228282272:G:A": seqvar_response,
+    }
+
+    # Act
+    with patch.object(
+        AutoACMG, "predict", autospec=True, side_effect=lambda self: predictions[self.variant_name]
+    ):
+        response = client.post(
+            f"{settings.API_V1_STR}/predict/strucvar/batch",
+            json={"variants": list(predictions), "genome_release": "GRCh37"},
+        )
+
+    # Assert
+    assert response.status_code == 200
+    lines = _read_ndjson(response)
+    assert lines[0]["prediction"]["strucvar"]["user_repr"] == "DEL:chr17:41176312:41277500"
+    assert lines[1]["error"] == "No valid structural variant prediction was made"
+
+
+@pytest.mark.parametrize("path", ["/predict/seqvar/batch", "/predict/strucvar/batch"])
+def test_predict_batch_invalid_request(client: TestClient, path):
+    """Test that invalid batches are rejected before streaming."""
+    # Act
+    invalid_release = client.post(
+        f"{settings.API_V1_STR}{path}",
+        json={"variants": ["chr1:228282272:G:A"], "genome_release": "InvalidRelease"},
+    )
+    empty = client.post(f"{settings.API_V1_STR}{path}", json={"variants": []})
+    # Assert
+    assert invalid_release.status_code == 400
+    assert invalid_release.json()["detail"] == "Invalid genome release"
+    assert empty.status_code == 422
+
+
+def test_stream_batch_bounds_concurrency(monkeypatch: pytest.MonkeyPatch):
+    """Test that a batch keeps at most the configured number of variants in flight."""
+    # Arrange
+    monkeypatch.setattr(settings, "AUTO_ACMG_BATCH_MAX_CONCURRENCY", 2)
+    lock = threading.Lock()
+    running = [0]
+    max_running = [0]
+
+    def predict_batch_item(variant_name, genome_release, memo, options):
+        with lock:
+            running[0] += 1
+            max_running[0] = max(max_running[0], running[0])
+        time.sleep(0.01 * int(variant_name))
+        with lock:
+            running[0] -= 1
+        return AutoACMGBatchResult(variant_name=variant_name, error="failed")
+
+    async def collect():
+        lines = _stream_batch(
+            ["3", "1", "2", "1", "1"],
+            GenomeRelease.GRCh38,
+            lambda index, result: result.model_copy(update={"variant_name": str(index)}),
+        )
+        return [json.loads(line)["variant_name"] async for line in lines]
+
+    # Act
+    with patch.object(AutoACMG, "_predict_batch_item", side_effect=predict_batch_item):
+        indexes = asyncio.run(collect())
+
+    # Assert
+    assert sorted(indexes) == ["0", "1", "2", "3", "4"]
+    assert indexes[0] == "1"
+    assert max_running[0] <= 2
+
+
+# ------------------- ETag -------------------
+
+
+@pytest.mark.parametrize(
+    "path,variant_name,response_fixture",
+    [
+        ("/predict/seqvar", "chr1:228282272:G:A", "seqvar_response"),
+        ("/predict/strucvar", "DEL:chr17:41176312:41277500", "strucvar_response"),
+    ],
+)
+@pytest.mark.parametrize(
+    "if_none_match,expected_status",
+    [
+        (None, 200),
+        ('"other"', 200),
+        ('"abc"', 304),
+        ('W/"abc"', 304),
+        ('"other", "abc"', 304),
+        ("*", 304),
+    ],
+)
+def test_predict_etag(
+    client: TestClient,
+    request,
+    path,
+    variant_name,
+    response_fixture,
+    if_none_match,
+    expected_status,
+):
+    """Test the ETag of cached predictions and conditional requests."""
+    # Arrange
+    prediction = request.getfixturevalue(response_fixture)
+
+    def predict(self):
+        self.etag = '"abc"'
+        return prediction
+
+    headers = {"If-None-Match": if_none_match} if if_none_match else {}
+
+    # Act
+    with patch.object(AutoACMG, "predict", autospec=True, side_effect=predict):
+        response = client.get(
+            f"{settings.API_V1_STR}{path}", params={"variant_name": variant_name}, headers=headers
+        )
+
+    # Assert
+    assert response.status_code == expected_status
+    assert response.headers["ETag"] == '"abc"'
+    assert bool(response.content) == (expected_status == 200)
+
+
+def test_predict_without_etag(client: TestClient, seqvar_response):
+    """Test that no ETag is sent if the prediction cache is not used."""
+    # Act
+    with patch.object(AutoACMG, "predict", return_value=seqvar_response):
+        response = client.get(
+            f"{settings.API_V1_STR}/predict/seqvar",
+            params={"variant_name": "chr1:228282272:G:A"},
+            headers={"If-None-Match": "*"},
+        )
+    # Assert
+    assert response.status_code == 200
+    assert "ETag" not in response.headers
+
+
+# ------------------- busy workers -------------------
+
+
+@pytest.mark.parametrize(
+    "path,params",
+    [
+        ("/resolve", {"variant_name": "chr1:228282272:G:A"}),
+        ("/predict/seqvar", {"variant_name": "chr1:228282272:G:A"}),
+        ("/predict/strucvar", {"variant_name": "DEL:chr17:41176312:41277500"}),
+    ],
+)
+def test_busy_workers(client: TestClient, path, params):
+    """Test that requests rejected by the busy workers are answered with 503."""
+    # Act
+    with patch(
+        "src.api.internal.api.run_in_executor", side_effect=ServerBusyError("Too many requests")
+    ):
+        response = client.get(f"{settings.API_V1_STR}{path}", params=params)
+    # Assert
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert response.json()["detail"] == "Too many requests"
+
+
+@pytest.mark.parametrize("path", ["/predict/seqvar/batch", "/predict/strucvar/batch"])
+def test_busy_workers_batch(client: TestClient, path):
+    """Test that batches are rejected with 503 before streaming if all workers are busy."""
+    # Act
+    with patch(
+        "src.api.internal.api.check_capacity", side_effect=ServerBusyError("Too many requests")
+    ):
+        response = client.post(
+            f"{settings.API_V1_STR}{path}", json={"variants": ["chr1:228282272:G:A"]}
+        )
+    # Assert
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
 # ... existing tests ...
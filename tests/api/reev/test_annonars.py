@@ -1,7 +1,20 @@
+import asyncio
+import threading
+
+import httpx
 import pytest
 from pytest_httpx import HTTPXMock
 
-from src.api.reev.annonars import AnnonarsClient
+from src.api.reev.annonars import AnnonarsClient, AsyncAnnonarsClient
+from src.core.cache import (
+    SCHEMA_VERSION_PREFIX,
+    get_cache_backend,
+    get_memory_cache,
+    get_range_cache,
+    request_memo,
+)
+from src.core.config import settings
+from src.core.timing import collect_timings
 from src.defs.annonars_gene import AnnonarsGeneResponse
 from src.defs.annonars_range import AnnonarsCustomRangeResult, AnnonarsRangeResponse
 from src.defs.annonars_variant import AnnonarsVariantResponse
@@ -141,6 +154,227 @@ async def test_get_variant_from_large_range_failure(httpx_mock: HTTPXMock):
         client.get_variant_from_range(example_seqvar, start, stop)
 
 
+@pytest.mark.asyncio
+async def test_get_variant_from_large_range_genomic_order(
+    httpx_mock: HTTPXMock, monkeypatch: pytest.MonkeyPatch
+):
+    """Test that concurrently fetched chunks are merged in genomic order."""
+    monkeypatch.setattr(settings, "AUTO_ACMG_ANNONARS_RANGE_CONCURRENCY", 3)
+    start = 1000
+    stop = 16000
+    chunks = [(1000, 5999), (6000, 10999), (11000, 15999)]
+    for chunk_start, chunk_stop in chunks:
+        httpx_mock.add_response(
+            method="GET",
+            url=f"https://example.com/annonars/annos/range?genome_release=grch38&chromosome=1&start={chunk_start}&stop={chunk_stop}",
+            json={
+                "server_version": "0.0.0",
+                "query": {
+                    "genome_release": "grch38",
+                    "chromosome": "1",
+                    "start": chunk_start,
+                    "stop": chunk_stop,
+                },
+                "result": {"gnomad_genomes": [{"pos": chunk_start}], "clinvar": None},
+            },
+            status_code=200,
+        )
+
+    client = AnnonarsClient(api_base_url="https://example.com/annonars")
+    response = client.get_variant_from_range(example_seqvar, start, stop)
+
+    assert response.gnomad_genomes is not None
+    assert [g.pos for g in response.gnomad_genomes] == [c[0] for c in chunks]
+    assert response.clinvar is None
+
+
+@pytest.fixture
+def range_cache(monkeypatch: pytest.MonkeyPatch):
+    """Enable the range cache and clear it before and after the test."""
+    monkeypatch.setattr(settings, "AUTO_ACMG_USE_RANGE_CACHE", True)
+    cache = get_range_cache()
+    monkeypatch.setattr(cache, "bin_size", 5000)
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+def _bin_response(start: int, stop: int, positions: list) -> dict:
+    """Range response of a bin with one gnomAD and one ClinVar record per position."""
+    return {
+        "server_version": "0.0.0",
+        "query": {"genome_release": "grch38", "chromosome": "1", "start": start, "stop": stop},
+        "result": {
+            "gnomad_genomes": [{"pos": pos} for pos in positions],
+            "clinvar": [
+                {
+                    "records": [
+                        {
+                            "name": f"var{pos}",
+                            "variationType": "single nucleotide variant",
+                            "classifications": {},
+                            "sequenceLocation": {"positionVcf": pos},
+                            "hgncIds": [],
+                        }
+                    ]
+                }
+                for pos in positions
+            ],
+        },
+    }
+
+
+@pytest.mark.asyncio
+async def test_get_variant_from_range_cache_reuses_bins(httpx_mock: HTTPXMock, range_cache):
+    """Test that overlapping range queries only fetch the missing bins."""
+    for bin_start, bin_stop, positions in [(1, 5000, [900, 4500]), (5001, 10000, [5100, 9000])]:
+        httpx_mock.add_response(
+            method="GET",
+            url=f"https://example.com/annonars/annos/range?genome_release=grch38&chromosome=1&start={bin_start}&stop={bin_stop}",
+            json=_bin_response(bin_start, bin_stop, positions),
+            status_code=200,
+        )
+
+    client = AnnonarsClient(api_base_url="https://example.com/annonars")
+    response = client.get_variant_from_range(example_seqvar, 1000, 4600)
+    assert response.gnomad_genomes is not None and response.clinvar is not None
+    assert [g.pos for g in response.gnomad_genomes] == [4500]
+    assert [c.records[0].name for c in response.clinvar] == ["var4500"]
+
+    # Sub-range of the cached bin, no request
+    response = client.get_variant_from_range(example_seqvar, 800, 1000)
+    assert response.gnomad_genomes is not None
+    assert [g.pos for g in response.gnomad_genomes] == [900]
+
+    # Overlapping range, only the second bin is fetched
+    response = client.get_variant_from_range(example_seqvar, 4000, 6000)
+    assert response.gnomad_genomes is not None
+    assert [g.pos for g in response.gnomad_genomes] == [4500, 5100]
+    assert len(httpx_mock.get_requests()) == 2
+
+
+@pytest.mark.asyncio
+async def test_async_get_variant_from_range_cache(httpx_mock: HTTPXMock, range_cache):
+    """Test that the async client shares the range cache bins."""
+    httpx_mock.add_response(
+        method="GET",
+        url="https://example.com/annonars/annos/range?genome_release=grch38&chromosome=1&start=1&stop=5000",
+        json=_bin_response(1, 5000, [900, 4500]),
+        status_code=200,
+    )
+
+    client = AsyncAnnonarsClient(api_base_url="https://example.com/annonars")
+    response = await client.get_variant_from_range(example_seqvar, 1000, 4600)
+    assert response.gnomad_genomes is not None
+    assert [g.pos for g in response.gnomad_genomes] == [4500]
+
+    sync_response = AnnonarsClient(
+        api_base_url="https://example.com/annonars"
+    ).get_variant_from_range(example_seqvar, 1000, 4600)
+    assert sync_response == response
+    assert len(httpx_mock.get_requests()) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_variant_from_range_cache_per_base_url(httpx_mock: HTTPXMock, range_cache):
+    """Test that the range cache bins of one Annonars instance are not served for another."""
+    for base_url, positions in [
+        ("https://example.com/annonars", [900]),
+        ("https://other.example.com/annonars", [4500]),
+    ]:
+        httpx_mock.add_response(
+            method="GET",
+            url=f"{base_url}/annos/range?genome_release=grch38&chromosome=1&start=1&stop=5000",
+            json=_bin_response(1, 5000, positions),
+            status_code=200,
+        )
+
+    response = AnnonarsClient(api_base_url="https://example.com/annonars").get_variant_from_range(
+        example_seqvar, 1, 5000
+    )
+    assert response.gnomad_genomes is not None
+    assert [g.pos for g in response.gnomad_genomes] == [900]
+
+    response = AnnonarsClient(
+        api_base_url="https://other.example.com/annonars"
+    ).get_variant_from_range(example_seqvar, 1, 5000)
+    assert response.gnomad_genomes is not None
+    assert [g.pos for g in response.gnomad_genomes] == [4500]
+    assert len(httpx_mock.get_requests()) == 2
+
+
+#: Records of the simulated Annonars range endpoint, some spanning several bins
+_range_records: dict = {
+    "gnomad_genomes": [
+        {"pos": 990, "refAllele": "A" * 20},
+        {"pos": 1500, "refAllele": "C"},
+        {"pos": 1995, "refAllele": "G" * 10},
+        {"pos": 2600, "refAllele": "T"},
+    ],
+    "clinvar": [
+        {
+            "records": [
+                {
+                    "name": f"var{start}",
+                    "variationType": "Deletion",
+                    "classifications": {},
+                    "sequenceLocation": {"start": start, "stop": stop},
+                    "hgncIds": [],
+                }
+            ]
+        }
+        for start, stop in [(500, 1200), (1950, 2100), (2400, 2450)]
+    ],
+}
+
+
+def _range_callback(request: httpx.Request) -> httpx.Response:
+    """Answer a range query with the records overlapping it, like Annonars."""
+    start, stop = int(request.url.params["start"]), int(request.url.params["stop"])
+    gnomad_genomes = [
+        g
+        for g in _range_records["gnomad_genomes"]
+        if g["pos"] <= stop and g["pos"] + len(g["refAllele"]) - 1 >= start
+    ]
+    clinvar = [
+        c
+        for c in _range_records["clinvar"]
+        if c["records"][0]["sequenceLocation"]["start"] <= stop
+        and c["records"][0]["sequenceLocation"]["stop"] >= start
+    ]
+    query = {"genome_release": "grch38", "chromosome": "1", "start": start, "stop": stop}
+    return httpx.Response(
+        200,
+        json={
+            "server_version": "0.0.0",
+            "query": query,
+            "result": {"gnomad_genomes": gnomad_genomes, "clinvar": clinvar},
+        },
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("start, stop", [(1000, 2500), (1001, 2000), (1998, 2002), (2440, 2460)])
+async def test_get_variant_from_range_cache_matches_direct(
+    httpx_mock: HTTPXMock, range_cache, monkeypatch: pytest.MonkeyPatch, start: int, stop: int
+):
+    """Test that the binned path returns the records of a direct range query, including the
+    records overlapping the range or a bin border from before."""
+    httpx_mock.add_callback(_range_callback, is_reusable=True)
+    monkeypatch.setattr(range_cache, "bin_size", 1000)
+    client = AnnonarsClient(api_base_url="https://example.com/annonars")
+    async_client = AsyncAnnonarsClient(api_base_url="https://example.com/annonars")
+
+    binned = client.get_variant_from_range(example_seqvar, start, stop)
+    async_binned = await async_client.get_variant_from_range(example_seqvar, start, stop)
+    monkeypatch.setattr(settings, "AUTO_ACMG_USE_RANGE_CACHE", False)
+    direct = client.get_variant_from_range(example_seqvar, start, stop)
+
+    assert direct.clinvar
+    assert binned == direct
+    assert async_binned == direct
+
+
 # -------- get_variant_info ---------
 
 
@@ -190,6 +424,140 @@ async def test_get_variant_info_500(httpx_mock: HTTPXMock):
         client.get_variant_info(example_seqvar)
 
 
+def _variant_response() -> dict:
+    """Minimal variant response for the example variant."""
+    return {
+        "server_version": "0.0.0",
+        "query": {
+            "genome_release": "grch38",
+            "chromosome": "1",
+            "pos": 1000,
+            "reference": "A",
+            "alternative": "T",
+        },
+        "result": {},
+    }
+
+
+@pytest.mark.asyncio
+async def test_get_variant_info_memory_tier(
+    httpx_mock: HTTPXMock, tmp_path, monkeypatch: pytest.MonkeyPatch
+):
+    """Test that a cached variant response is served from memory without a second request."""
+    monkeypatch.setattr(settings, "AUTO_ACMG_USE_CACHE", True)
+    monkeypatch.setattr(settings, "AUTO_ACMG_CACHE_DIR", str(tmp_path))
+    get_memory_cache().clear()
+    mock_response = _variant_response()
+    httpx_mock.add_response(
+        method="GET",
+        url="https://example.com/annonars/annos/variant?genome_release=grch38&chromosome=1&pos=1000&reference=A&alternative=T",
+        json=mock_response,
+        status_code=200,
+    )
+
+    client = AnnonarsClient(api_base_url="https://example.com/annonars")
+    response = client.get_variant_info(example_seqvar)
+    assert client.get_variant_info(example_seqvar) == response
+    assert len(httpx_mock.get_requests()) == 1
+    get_memory_cache().clear()
+
+
+@pytest.mark.asyncio
+async def test_get_variant_info_persistent_tier(
+    httpx_mock: HTTPXMock, tmp_path, monkeypatch: pytest.MonkeyPatch
+):
+    """Test that a fetched response is stored stamped and served from the persistent cache."""
+    monkeypatch.setattr(settings, "AUTO_ACMG_USE_CACHE", True)
+    monkeypatch.setattr(settings, "AUTO_ACMG_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "AUTO_ACMG_MEMORY_CACHE_MAX_ENTRIES", 0)
+    mock_response = _variant_response()
+    httpx_mock.add_response(
+        method="GET",
+        url="https://example.com/annonars/annos/variant?genome_release=grch38&chromosome=1&pos=1000&reference=A&alternative=T",
+        json=mock_response,
+        status_code=200,
+    )
+
+    response = AnnonarsClient(api_base_url="https://example.com/annonars").get_variant_info(
+        example_seqvar
+    )
+    cached = AnnonarsClient(api_base_url="https://example.com/annonars").get_variant_info(
+        example_seqvar
+    )
+    assert cached == response == AnnonarsVariantResponse.model_validate(mock_response)
+    assert len(httpx_mock.get_requests()) == 1
+    assert [path.read_bytes()[:16] for path in tmp_path.iterdir()] == [SCHEMA_VERSION_PREFIX]
+
+
+@pytest.mark.asyncio
+async def test_get_variant_info_timings(
+    httpx_mock: HTTPXMock, tmp_path, monkeypatch: pytest.MonkeyPatch
+):
+    """Test that lookups are timed with their cache accesses and payload bytes."""
+    monkeypatch.setattr(settings, "AUTO_ACMG_USE_CACHE", True)
+    monkeypatch.setattr(settings, "AUTO_ACMG_CACHE_DIR", str(tmp_path))
+    get_memory_cache().clear()
+    httpx_mock.add_response(
+        method="GET",
+        url="https://example.com/annonars/annos/variant?genome_release=grch38&chromosome=1&pos=1000&reference=A&alternative=T",
+        json=_variant_response(),
+        status_code=200,
+    )
+
+    client = AnnonarsClient(api_base_url="https://example.com/annonars")
+    with collect_timings() as timings:
+        client.get_variant_info(example_seqvar)
+        client.get_variant_info(example_seqvar)
+    get_memory_cache().clear()
+
+    collected = timings.snapshot()
+    lookups = collected["annonars.get_variant_info"]
+    assert (lookups.calls, lookups.cache_hits, lookups.cache_misses) == (2, 1, 1)
+    assert collected["annonars.http"].calls == 1
+    assert collected["annonars.http"].bytes > 0
+
+
+@pytest.mark.asyncio
+async def test_get_variant_info_request_memo(httpx_mock: HTTPXMock):
+    """Test that variant lookups are shared by all clients within a request memo."""
+    httpx_mock.add_response(
+        method="GET",
+        url="https://example.com/annonars/annos/variant?genome_release=grch38&chromosome=1&pos=1000&reference=A&alternative=T",
+        json=_variant_response(),
+        status_code=200,
+    )
+
+    with request_memo():
+        response = AnnonarsClient(api_base_url="https://example.com/annonars").get_variant_info(
+            example_seqvar
+        )
+        other = AnnonarsClient(api_base_url="https://example.com/annonars").get_variant_info(
+            example_seqvar
+        )
+    assert other is response
+    assert len(httpx_mock.get_requests()) == 1
+
+
+@pytest.mark.asyncio
+async def test_async_get_variant_info_request_memo(httpx_mock: HTTPXMock):
+    """Test that concurrent async variant lookups are coalesced within a request memo."""
+    httpx_mock.add_response(
+        method="GET",
+        url="https://example.com/annonars/annos/variant?genome_release=grch38&chromosome=1&pos=1000&reference=A&alternative=T",
+        json=_variant_response(),
+        status_code=200,
+    )
+
+    client = AsyncAnnonarsClient(api_base_url="https://example.com/annonars")
+    with request_memo():
+        response, other = await asyncio.gather(
+            client.get_variant_info(example_seqvar), client.get_variant_info(example_seqvar)
+        )
+        assert await client.get_variant_info(example_seqvar) is response
+    assert other is response
+    assert len(httpx_mock.get_requests()) == 1
+
+
 # -------- get_gene_info ---------
 
 
@@ -238,3 +606,97 @@ async def test_get_gene_info_500(httpx_mock: HTTPXMock):
     client = AnnonarsClient(api_base_url="https://example.com/annonars")
     with pytest.raises(AnnonarsException):
         client.get_gene_info("HGNC:1100")
+
+
+# -------- AsyncAnnonarsClient ---------
+
+
+def _range_response(start: int, stop: int) -> dict:
+    """Minimal range response for the example variant."""
+    return {
+        "server_version": "0.0.0",
+        "query": {"genome_release": "grch38", "chromosome": "1", "start": start, "stop": stop},
+        "result": {"gnomad_genomes": [], "clinvar": []},
+    }
+
+
+@pytest.mark.asyncio
+async def test_async_get_variant_from_large_range(httpx_mock: HTTPXMock):
+    """Test AsyncAnnonarsClient.get_variant_from_range with a range split into two requests."""
+    start = 1000
+    stop = 11000
+    for chunk_start, chunk_stop in [(start, start + 4999), (start + 5000, stop - 1)]:
+        httpx_mock.add_response(
+            method="GET",
+            url=f"https://example.com/annonars/annos/range?genome_release=grch38&chromosome=1&start={chunk_start}&stop={chunk_stop}",
+            json=_range_response(chunk_start, chunk_stop),
+            status_code=200,
+        )
+
+    client = AsyncAnnonarsClient(api_base_url="https://example.com/annonars")
+    response = await client.get_variant_from_range(example_seqvar, start, stop)
+    assert isinstance(response, AnnonarsCustomRangeResult)
+    assert response.gnomad_genomes == []
+    assert response.clinvar == []
+
+
+@pytest.mark.asyncio
+async def test_async_get_variant_info_500(httpx_mock: HTTPXMock):
+    """Test AsyncAnnonarsClient.get_variant_info with a 500 response."""
+    httpx_mock.add_response(
+        method="GET",
+        url="https://example.com/annonars/annos/variant?genome_release=grch38&chromosome=1&pos=1000&reference=A&alternative=T",
+        status_code=500,
+    )
+
+    client = AsyncAnnonarsClient(api_base_url="https://example.com/annonars")
+    with pytest.raises(AnnonarsException):
+        await client.get_variant_info(example_seqvar)
+
+
+@pytest.mark.asyncio
+async def test_async_get_gene_info_invalid(httpx_mock: HTTPXMock):
+    """Test AsyncAnnonarsClient.get_gene_info with a non-validating response."""
+    httpx_mock.add_response(
+        method="GET",
+        url="https://example.com/annonars/genes/info?hgnc_id=HGNC:1100",
+        json={"foo": "bar"},
+        status_code=200,
+    )
+
+    client = AsyncAnnonarsClient(api_base_url="https://example.com/annonars")
+    with pytest.raises(AnnonarsException):
+        await client.get_gene_info("HGNC:1100")
+
+
+@pytest.mark.asyncio
+async def test_async_persistent_cache_off_event_loop(
+    httpx_mock: HTTPXMock, tmp_path, monkeypatch: pytest.MonkeyPatch
+):
+    """Test that the async client reads and writes the persistent cache on worker threads."""
+    monkeypatch.setattr(settings, "AUTO_ACMG_USE_CACHE", True)
+    monkeypatch.setattr(settings, "AUTO_ACMG_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "AUTO_ACMG_MEMORY_CACHE_MAX_ENTRIES", 0)
+    httpx_mock.add_response(
+        method="GET",
+        url="https://example.com/annonars/annos/variant?genome_release=grch38&chromosome=1&pos=1000&reference=A&alternative=T",
+        json=_variant_response(),
+        status_code=200,
+    )
+    threads = []
+    backend = get_cache_backend(settings.AUTO_ACMG_CACHE_BACKEND, str(tmp_path))
+    for name in ("get_bytes", "put_bytes"):
+        method = getattr(backend, name)
+
+        def record_thread(*args, _method=method):
+            threads.append(threading.current_thread())
+            return _method(*args)
+
+        monkeypatch.setattr(backend, name, record_thread)
+
+    client = AsyncAnnonarsClient(api_base_url="https://example.com/annonars")
+    await client.get_variant_info(example_seqvar)
+    await client.get_variant_info(example_seqvar)
+
+    assert len(threads) == 3
+    assert threading.current_thread() not in threads
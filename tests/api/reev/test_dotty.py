@@ -1,7 +1,10 @@
+import asyncio
+
 import pytest
 from pytest_httpx import HTTPXMock
 
-from src.api.reev.dotty import DottyClient
+from src.api.reev.dotty import AsyncDottyClient, DottyClient
+from src.core.cache import request_memo
 from src.defs.dotty import DottySpdiResponse
 from src.defs.genome_builds import GenomeRelease
 from tests.utils import get_json_object
@@ -53,3 +56,57 @@ async def test_to_spdi_500(httpx_mock: HTTPXMock):
     client = DottyClient(api_base_url="https://example.com/dotty")
     response = client.to_spdi("test_query", GenomeRelease.GRCh38)
     assert response is None
+
+
+# -------- AsyncDottyClient ---------
+
+
+@pytest.mark.asyncio
+async def test_async_to_spdi_success(httpx_mock: HTTPXMock):
+    """Test AsyncDottyClient.to_spdi with a successful response."""
+    mock_response = {"success": False, "message": "not found"}
+    httpx_mock.add_response(
+        method="GET",
+        url="https://example.com/dotty/api/v1/to-spdi?q=test_query&assembly=GRCh38",
+        json=mock_response,
+        status_code=200,
+    )
+
+    client = AsyncDottyClient(api_base_url="https://example.com/dotty")
+    response = await client.to_spdi("test_query", GenomeRelease.GRCh38)
+    assert response == DottySpdiResponse.model_validate(mock_response)
+
+
+@pytest.mark.asyncio
+async def test_async_to_spdi_500(httpx_mock: HTTPXMock):
+    """Test AsyncDottyClient.to_spdi with a 500 response."""
+    httpx_mock.add_response(
+        method="GET",
+        url="https://example.com/dotty/api/v1/to-spdi?q=test_query&assembly=GRCh38",
+        status_code=500,
+    )
+
+    client = AsyncDottyClient(api_base_url="https://example.com/dotty")
+    response = await client.to_spdi("test_query", GenomeRelease.GRCh38)
+    assert response is None
+
+
+@pytest.mark.asyncio
+async def test_async_to_spdi_request_memo(httpx_mock: HTTPXMock):
+    """Test that concurrent AsyncDottyClient lookups are coalesced within a request memo."""
+    httpx_mock.add_response(
+        method="GET",
+        url="https://example.com/dotty/api/v1/to-spdi?q=test_query&assembly=GRCh38",
+        json={"success": False, "message": "not found"},
+        status_code=200,
+    )
+
+    client = AsyncDottyClient(api_base_url="https://example.com/dotty")
+    with request_memo():
+        response, other = await asyncio.gather(
+            client.to_spdi("test_query", GenomeRelease.GRCh38),
+            client.to_spdi("test_query", GenomeRelease.GRCh38),
+        )
+    assert response is not None
+    assert other is response
+    assert len(httpx_mock.get_requests()) == 1
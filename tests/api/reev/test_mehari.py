@@ -1,7 +1,10 @@
+import asyncio
+
 import pytest
 from pytest_httpx import HTTPXMock
 
-from src.api.reev.mehari import MehariClient
+from src.api.reev.mehari import AsyncMehariClient, MehariClient
+from src.core.cache import request_memo
 from src.defs.exceptions import MehariException
 from src.defs.genome_builds import GenomeRelease
 from src.defs.mehari import GeneTranscripts, TranscriptsSeqVar, TranscriptsStrucVar
@@ -178,3 +181,71 @@ async def test_get_gene_transcripts_500(httpx_mock: HTTPXMock):
     client = MehariClient(api_base_url="https://example.com/mehari")
     with pytest.raises(MehariException):
         client.get_gene_transcripts(example_hgnc_id, GenomeRelease.GRCh38)
+
+
+# ---------- AsyncMehariClient ----------------
+
+
+@pytest.mark.asyncio
+async def test_async_get_gene_transcripts_success(httpx_mock: HTTPXMock):
+    """Test AsyncMehariClient.get_gene_transcripts with a successful response."""
+    mock_response: dict = {"transcripts": []}
+    httpx_mock.add_response(
+        method="GET",
+        url=f"https://example.com/mehari/genes/txs?hgncId={example_hgnc_id}&genomeBuild=GENOME_BUILD_GRCH38",
+        json=mock_response,
+        status_code=200,
+    )
+
+    client = AsyncMehariClient(api_base_url="https://example.com/mehari")
+    response = await client.get_gene_transcripts(example_hgnc_id, GenomeRelease.GRCh38)
+    assert response == GeneTranscripts.model_validate(mock_response)
+
+
+@pytest.mark.asyncio
+async def test_async_get_seqvar_transcripts_500(httpx_mock: HTTPXMock):
+    """Test AsyncMehariClient.get_seqvar_transcripts with a 500 response."""
+    httpx_mock.add_response(
+        method="GET",
+        url="https://example.com/mehari/seqvars/csq?genome_release=grch38&chromosome=1&position=1000&reference=A&alternative=T",
+        status_code=500,
+    )
+
+    client = AsyncMehariClient(api_base_url="https://example.com/mehari")
+    with pytest.raises(MehariException):
+        await client.get_seqvar_transcripts(example_seqvar)
+
+
+@pytest.mark.asyncio
+async def test_async_get_strucvar_transcripts_invalid(httpx_mock: HTTPXMock):
+    """Test AsyncMehariClient.get_strucvar_transcripts with a non-validating response."""
+    httpx_mock.add_response(
+        method="GET",
+        url="https://example.com/mehari/strucvars/csq?genome_release=grch38&chromosome=1&start=1000&stop=2000&sv_type=DEL",
+        json={"foo": "bar"},
+        status_code=200,
+    )
+
+    client = AsyncMehariClient(api_base_url="https://example.com/mehari")
+    with pytest.raises(MehariException):
+        await client.get_strucvar_transcripts(example_strucvar)
+
+
+@pytest.mark.asyncio
+async def test_async_get_gene_transcripts_request_memo(httpx_mock: HTTPXMock):
+    """Test that concurrent AsyncMehariClient lookups are coalesced within a request memo."""
+    httpx_mock.add_response(
+        method="GET",
+        url=f"https://example.com/mehari/genes/txs?hgncId={example_hgnc_id}&genomeBuild=GENOME_BUILD_GRCH38",
+        json={"transcripts": []},
+        status_code=200,
+    )
+
+    client = AsyncMehariClient(api_base_url="https://example.com/mehari")
+    with request_memo():
+        response, other = await asyncio.gather(
+            client.get_gene_transcripts(example_hgnc_id, GenomeRelease.GRCh38),
+            client.get_gene_transcripts(example_hgnc_id, GenomeRelease.GRCh38),
+        )
+    assert other is response
+    assert len(httpx_mock.get_requests()) == 1
@@ -0,0 +1,138 @@
+import csv
+import threading
+
+import pytest
+
+from src.bench.comparison_v4 import (
+    ComparisonVariant,
+    CsvSink,
+    ParquetSink,
+    columns,
+    run_comparison,
+)
+
+VARIANTS = [
+    ComparisonVariant("var1", ["PM2", "PP3"], "first"),
+    ComparisonVariant("var2", ["BA1"], "second"),
+]
+
+
+def fake_tool(variant: ComparisonVariant):
+    return ["PM2", "BP4"], {"variant": variant.variant}
+
+
+def failing_tool(variant: ComparisonVariant):
+    raise RuntimeError("service unavailable")
+
+
+def read_rows(path):
+    with open(path, newline="") as csvfile:
+        return list(csv.DictReader(csvfile))
+
+
+def test_run_comparison(tmp_path):
+    """Test that every variant is written once with the comparison of each tool."""
+    path = str(tmp_path / "stats.csv")
+    tools = {"Fake": fake_tool, "Failing": failing_tool}
+    sink = CsvSink(path, columns(list(tools)))
+    try:
+        assert run_comparison(VARIANTS + VARIANTS[:1], sink, tools=tools, workers=2) == 2
+    finally:
+        sink.close()
+
+    rows = {row["Variant"]: row for row in read_rows(path)}
+    assert set(rows) == {"var1", "var2"}
+    assert rows["var1"]["Fake Criteria"] == "PM2;BP4"
+    assert rows["var1"]["Fake True Positives"] == "PM2"
+    assert rows["var1"]["Fake False Negatives"] == "PP3"
+    assert rows["var1"]["Fake False Positives"] == "BP4"
+    assert rows["var1"]["Fake Full Response"] == '{"variant": "var1"}'
+    assert rows["var1"]["Failing Criteria"] == ""
+    assert rows["var1"]["Failed Tools"] == "Failing"
+    assert rows["var2"]["Comment"] == "second"
+
+
+def test_run_comparison_resumes(tmp_path):
+    """Test that a rerun skips the completed variants and drops an incomplete last line."""
+    path = str(tmp_path / "stats.csv")
+    tools = {"Fake": fake_tool}
+    sink = CsvSink(path, columns(list(tools)))
+    run_comparison(VARIANTS[:1], sink, tools=tools)
+    sink.close()
+    with open(path, "a") as csvfile:
+        csvfile.write("var2,BA1,PM2")
+
+    sink = CsvSink(path, columns(list(tools)))
+    try:
+        assert run_comparison(VARIANTS, sink, tools=tools) == 1
+    finally:
+        sink.close()
+    assert [row["Variant"] for row in read_rows(path)] == ["var1", "var2"]
+
+
+def test_run_comparison_retries_failed_tools(tmp_path):
+    """Test that a rerun evaluates the variants again for which a tool failed."""
+    path = str(tmp_path / "stats.csv")
+    failing = {"var1"}
+
+    def flaky_tool(variant: ComparisonVariant):
+        if variant.variant in failing:
+            raise TimeoutError("timed out")
+        return fake_tool(variant)
+
+    tools = {"Flaky": flaky_tool}
+    sink = CsvSink(path, columns(list(tools)))
+    try:
+        assert run_comparison(VARIANTS, sink, tools=tools) == 2
+        assert sink.completed() == {"var2"}
+        failing.clear()
+        assert run_comparison(VARIANTS, sink, tools=tools) == 1
+        assert sink.completed() == {"var1", "var2"}
+    finally:
+        sink.close()
+    rows = [(row["Variant"], row["Failed Tools"]) for row in read_rows(path)]
+    assert sorted(rows[:2]) == [("var1", "Flaky"), ("var2", "")]
+    assert rows[2] == ("var1", "")
+
+
+def test_csv_sink_refuses_other_columns(tmp_path):
+    """Test that an output written for other tools is not resumed."""
+    path = str(tmp_path / "stats.csv")
+    CsvSink(path, columns(["Fake"])).close()
+    with pytest.raises(ValueError, match="other columns"):
+        CsvSink(path, columns(["Fake", "Other"]))
+
+
+def test_run_comparison_tools_concurrent(tmp_path):
+    """Test that the tools of a variant run at the same time."""
+    barrier = threading.Barrier(2, timeout=5)
+
+    def waiting_tool(variant: ComparisonVariant):
+        barrier.wait()
+        return [], None
+
+    tools = {"A": waiting_tool, "B": waiting_tool}
+    sink = CsvSink(str(tmp_path / "stats.csv"), columns(list(tools)))
+    try:
+        run_comparison(VARIANTS[:1], sink, tools=tools, workers=1)
+    finally:
+        sink.close()
+    assert not barrier.broken
+
+
+def test_parquet_sink_resumes(tmp_path):
+    """Test that the Parquet files of a previous run are skipped."""
+    pytest.importorskip("pyarrow")
+    path = str(tmp_path / "stats.parquet")
+    tools = {"Fake": fake_tool}
+    sink = ParquetSink(path, columns(list(tools)), batch_size=1)
+    run_comparison(VARIANTS[:1], sink, tools=tools)
+    sink.close()
+
+    sink = ParquetSink(path, columns(list(tools)))
+    try:
+        assert sink.completed() == {"var1"}
+        assert run_comparison(VARIANTS, sink, tools=tools) == 1
+    finally:
+        sink.close()
+    assert sink.completed() == {"var1", "var2"}
@@ -0,0 +1,74 @@
+import httpx
+import pytest
+
+from src.api.reev.annonars import AnnonarsClient
+from src.auto_acmg import AutoACMG
+from src.bench.perf_bench import load_corpus, percentile, run_benchmark
+from src.bench.replay import FixtureStore, RecordingTransport
+from src.defs.auto_acmg import AutoACMGSeqVarResult
+from src.defs.exceptions import AnnonarsException
+from src.defs.genome_builds import GenomeRelease
+
+#: Base URL of the fake upstream service
+UPSTREAM = "http://annonars"
+
+
+def test_percentile():
+    """Test the linearly interpolated percentiles."""
+    assert percentile([], 50) is None
+    assert percentile([3.0], 95) == 3.0
+    assert percentile([4.0, 1.0, 3.0, 2.0], 50) == 2.5
+    assert percentile([1.0, 2.0, 3.0], 100) == 3.0
+
+
+def test_load_corpus(tmp_path):
+    """Test that section headings are skipped and commented out variants kept."""
+    corpus_file = tmp_path / "variants.csv"
+    corpus_file.write_text(
+        "section,variant_name,genome_release,expected_prediction,comment\n"
+        "# Section,,,,\n"
+        ",NM_000001.1:c.1A>G,GRCh38,,\n"
+        "#,NM_000002.1:c.2C>T,GRCh37,,\n"
+    )
+    assert load_corpus(str(corpus_file)) == [
+        ("NM_000001.1:c.1A>G", GenomeRelease.GRCh38),
+        ("NM_000002.1:c.2C>T", GenomeRelease.GRCh37),
+    ]
+
+
+@pytest.fixture
+def store(tmp_path) -> FixtureStore:
+    """Fixture store with the response of the variant ``recorded`` only."""
+    upstream = httpx.MockTransport(lambda request: httpx.Response(200, json={"ok": True}))
+    store = FixtureStore(str(tmp_path))
+    with httpx.Client(transport=RecordingTransport(store, upstream)) as client:
+        client.get(f"{UPSTREAM}/recorded")
+    return store
+
+
+def _fake_predict(self: AutoACMG):
+    """Prediction fetching the variant from the upstream service, None if it is missing."""
+    try:
+        AnnonarsClient(api_base_url=UPSTREAM)._get(f"{UPSTREAM}/{self.variant_name}")
+    except AnnonarsException:
+        return None
+    return AutoACMGSeqVarResult()
+
+
+def test_run_benchmark_offline(store: FixtureStore, monkeypatch: pytest.MonkeyPatch):
+    """Test that the benchmark replays the store, also when run twice in the same process."""
+    monkeypatch.setattr(AutoACMG, "_predict", _fake_predict)
+    corpus = [("recorded", GenomeRelease.GRCh38), ("missing", GenomeRelease.GRCh38)]
+
+    for _ in range(2):
+        results = run_benchmark(corpus, store, repeat=2, workers=2, allocations=False)
+        assert results["meta"]["recorded_responses"] == 1
+        # One warm-up and two timed runs of each mode, each with one request per variant.
+        assert results["meta"]["replayed_requests"] == 7
+        assert results["meta"]["missing_requests"] == 7
+        assert set(results["modes"]) == {"single", "batch", "concurrent"}
+        for mode in results["modes"].values():
+            assert mode["predictions"] == 4
+            assert mode["failures"] == 2
+            assert mode["latency_seconds"]["p50"] is not None
+            assert "allocations" not in mode
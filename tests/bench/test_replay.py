@@ -0,0 +1,47 @@
+import gzip
+import json
+
+import httpx
+
+from src.bench.replay import FixtureStore, RecordingTransport, ReplayTransport, request_key
+
+
+def test_request_key():
+    """Test that requests are keyed by path and query only."""
+    assert request_key(httpx.URL("http://a:8080/api/info?x=1")) == "/api/info?x=1"
+    assert request_key(httpx.URL("http://b/api/info")) == "/api/info"
+
+
+def test_record_and_replay(tmp_path):
+    """Test that recorded responses are replayed from a reloaded store."""
+    upstream = httpx.MockTransport(lambda request: httpx.Response(200, json={"hello": "world"}))
+    with httpx.Client(transport=RecordingTransport(FixtureStore(str(tmp_path)), upstream)) as c:
+        assert c.get("http://upstream/api?q=1").json() == {"hello": "world"}
+
+    store = FixtureStore(str(tmp_path))
+    assert store.load() == 1
+    transport = ReplayTransport(store)
+    with httpx.Client(transport=transport) as client:
+        assert client.get("http://other/api?q=1").json() == {"hello": "world"}
+        assert client.get("http://other/api?q=2").status_code == 404
+    assert (transport.replayed, transport.missing) == (1, 1)
+
+
+def test_record_gzip_encoded(tmp_path):
+    """Test that compressed upstream responses are decoded once when recording."""
+
+    def upstream_handler(request: httpx.Request) -> httpx.Response:
+        body = gzip.compress(json.dumps({"hello": "world"}).encode())
+        return httpx.Response(
+            200,
+            headers={"content-type": "application/json", "content-encoding": "gzip"},
+            content=body,
+        )
+
+    store = FixtureStore(str(tmp_path))
+    upstream = httpx.MockTransport(upstream_handler)
+    with httpx.Client(transport=RecordingTransport(store, upstream)) as client:
+        response = client.get("http://upstream/api?q=1")
+        assert response.json() == {"hello": "world"}
+        assert "content-encoding" not in response.headers
+    assert store.get("/api?q=1") == (200, b'{"hello": "world"}')
@@ -0,0 +1,423 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+from pydantic import ValidationError
+
+from src.core.cache import (
+    Cache,
+    FileCacheBackend,
+    MemoryCache,
+    RangeCache,
+    RequestMemo,
+    SQLiteCacheBackend,
+    get_cache_backend,
+    get_request_memo,
+    request_memo,
+    schema_version,
+)
+from src.core.config import settings
+from src.defs.annonars_range import RangeQuery, SequenceLocation
+
+# ------------------- Cache backends -------------------
+
+
+@pytest.mark.parametrize("backend_cls", [FileCacheBackend, SQLiteCacheBackend])
+def test_cache_backend_roundtrip(tmp_path, backend_cls):
+    """Test that stored values are returned and replaced."""
+    backend = backend_cls(str(tmp_path))
+    assert backend.get("https://example.com/a") is None
+    backend.put("https://example.com/a", {"value": [1, 2]})
+    assert backend.get("https://example.com/a") == {"value": [1, 2]}
+    backend.put("https://example.com/a", {"value": 3})
+    assert backend.get("https://example.com/a") == {"value": 3}
+
+
+def test_file_cache_backend_leaves_no_temporary_files(tmp_path):
+    """Test that the file backend renames its temporary files into place."""
+    backend = FileCacheBackend(str(tmp_path))
+    backend.put("https://example.com/a", {"value": 1})
+    assert [p.suffix for p in tmp_path.iterdir()] == [".json"]
+
+
+def test_sqlite_cache_backend_shared_between_connections(tmp_path):
+    """Test that values written by one backend instance and thread are visible to others."""
+    writer = SQLiteCacheBackend(str(tmp_path))
+    reader = SQLiteCacheBackend(str(tmp_path))
+    thread = threading.Thread(target=writer.put, args=("https://example.com/a", {"value": 1}))
+    thread.start()
+    thread.join()
+    assert reader.get("https://example.com/a") == {"value": 1}
+
+
+def test_cache_uses_configured_backend(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    """Test that the cache delegates to the configured backend only if enabled."""
+    monkeypatch.setattr(settings, "AUTO_ACMG_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "AUTO_ACMG_CACHE_BACKEND", "sqlite")
+    monkeypatch.setattr(settings, "AUTO_ACMG_USE_CACHE", False)
+    assert Cache().backend is None
+
+    monkeypatch.setattr(settings, "AUTO_ACMG_USE_CACHE", True)
+    cache = Cache()
+    assert isinstance(cache.backend, SQLiteCacheBackend)
+    assert cache.backend is get_cache_backend("sqlite", str(tmp_path))
+    cache.add("https://example.com/a", {"value": 1})
+    assert Cache().get("https://example.com/a") == {"value": 1}
+
+
+def test_get_cache_backend_unknown(tmp_path):
+    """Test that an unknown backend name is rejected."""
+    with pytest.raises(ValueError):
+        get_cache_backend("unknown", str(tmp_path))
+
+
+@pytest.mark.parametrize("backend_cls", [FileCacheBackend, SQLiteCacheBackend])
+def test_cache_backend_ttl(tmp_path, backend_cls, monkeypatch: pytest.MonkeyPatch):
+    """Test that expired entries are not returned."""
+    backend = backend_cls(str(tmp_path), ttl=60.0)
+    backend.put("https://example.com/a", {"value": 1})
+    assert backend.get("https://example.com/a") == {"value": 1}
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120.0)
+    assert backend.get("https://example.com/a") is None
+
+
+@pytest.mark.parametrize("backend_cls", [FileCacheBackend, SQLiteCacheBackend])
+def test_cache_backend_update_keeps_creation_time(
+    tmp_path, backend_cls, monkeypatch: pytest.MonkeyPatch
+):
+    """Test that updated entries keep their creation time and missing ones are not created."""
+    backend = backend_cls(str(tmp_path), ttl=60.0)
+    backend.put("https://example.com/a", {"value": 1})
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 40.0)
+    backend.update_bytes("https://example.com/a", b'{"value": 2}')
+    backend.update_bytes("https://example.com/b", b'{"value": 2}')
+    assert backend.get("https://example.com/a") == {"value": 2}
+    assert backend.get("https://example.com/b") is None
+    monkeypatch.setattr(time, "time", lambda: now + 80.0)
+    assert backend.get("https://example.com/a") is None
+
+
+@pytest.mark.parametrize("backend_cls", [FileCacheBackend, SQLiteCacheBackend])
+def test_cache_backend_evicts_oldest_entries(
+    tmp_path, backend_cls, monkeypatch: pytest.MonkeyPatch
+):
+    """Test that the oldest entries are evicted once the entry limit is exceeded."""
+    backend = backend_cls(str(tmp_path), max_entries=2)
+    for i, key in enumerate(["a", "b", "c"]):
+        monkeypatch.setattr(time, "time", lambda i=i: 1000.0 + i)
+        backend.put(key, {"value": key})
+        if isinstance(backend, FileCacheBackend):
+            os.utime(backend._get_cache_filename(key), (1000.0 + i, 1000.0 + i))
+    backend.evict()
+    assert backend.get("a") is None
+    assert backend.get("b") == {"value": "b"}
+    assert backend.get("c") == {"value": "c"}
+
+
+@pytest.mark.parametrize("backend_cls", [FileCacheBackend, SQLiteCacheBackend])
+def test_cache_backend_evicts_by_size(tmp_path, backend_cls):
+    """Test that the size limit keeps the cache bounded."""
+    backend = backend_cls(str(tmp_path), max_bytes=1)
+    backend.put("a", {"value": "a" * 100})
+    backend.evict()
+    assert backend.get("a") is None
+
+
+def test_file_cache_backend_tracks_usage(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    """Test that the file backend only scans its directory once a size limit is exceeded."""
+    backend = FileCacheBackend(str(tmp_path), max_entries=20)
+    scans = []
+    evict = backend.evict
+
+    def counting_evict():
+        scans.append(1)
+        evict()
+
+    monkeypatch.setattr(backend, "evict", counting_evict)
+    for i in range(22):
+        backend.put(str(i), {"value": i})
+    assert len(scans) == 1
+    backend.put("22", {"value": 22})
+    assert len(scans) == 2
+    assert len(list(tmp_path.glob("*.json"))) == 20
+
+
+@pytest.mark.parametrize("backend_cls", [FileCacheBackend, SQLiteCacheBackend])
+def test_cache_backend_delete_and_clear(tmp_path, backend_cls):
+    """Test deleting single values and all values."""
+    backend = backend_cls(str(tmp_path))
+    for key in "abc":
+        backend.put(key, {"value": key})
+    backend.delete("a")
+    backend.delete("unknown")
+    assert backend.get("a") is None
+    assert backend.get("b") == {"value": "b"}
+    backend.clear()
+    assert backend.get("b") is None
+    assert backend.get("c") is None
+
+
+# ------------------- Schema versions -------------------
+
+
+def test_schema_version():
+    """Test that the schema version identifies the schema of a model."""
+    assert schema_version(RangeQuery) == schema_version(RangeQuery)
+    assert schema_version(RangeQuery) != schema_version(SequenceLocation)
+
+
+@pytest.mark.parametrize("backend_name", ["file", "sqlite"])
+def test_cache_response_schema_version(
+    tmp_path, backend_name, monkeypatch: pytest.MonkeyPatch, mocker
+):
+    """Test that stamped responses take the fast path and others are validated and stamped."""
+    monkeypatch.setattr(settings, "AUTO_ACMG_USE_CACHE", True)
+    monkeypatch.setattr(settings, "AUTO_ACMG_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "AUTO_ACMG_CACHE_BACKEND", backend_name)
+    cache = Cache()
+    query = {"genome_release": "grch38", "chromosome": "1", "start": 1, "stop": 2, "extra": 1}
+    expected = RangeQuery.model_validate(query)
+
+    cache.add("https://example.com/legacy", query)
+    validate = mocker.spy(RangeQuery, "model_validate")
+    validate_json = mocker.spy(RangeQuery, "model_validate_json")
+    assert cache.get_response("https://example.com/legacy", RangeQuery) == expected
+    assert (validate.call_count, validate_json.call_count) == (1, 0)
+    assert cache.get_response("https://example.com/legacy", RangeQuery) == expected
+    assert (validate.call_count, validate_json.call_count) == (1, 1)
+
+    cache.add_response("https://example.com/new", query, RangeQuery)
+    assert cache.get_response("https://example.com/new", RangeQuery) == expected
+    assert cache.get("https://example.com/new") == query
+    assert (validate.call_count, validate_json.call_count) == (1, 2)
+
+    cache.add_response("https://example.com/invalid", {"start": "x"}, RangeQuery)
+    with pytest.raises(ValidationError):
+        cache.get_response("https://example.com/invalid", RangeQuery)
+
+
+def test_memory_cache_evicts_least_recently_used():
+    """Test that the least recently used entries are evicted by count and size."""
+    cache = MemoryCache(max_entries=2, max_bytes=100)
+    cache.put("a", 1, 10)
+    cache.put("b", 2, 10)
+    assert cache.get("a") == 1
+    cache.put("c", 3, 10)
+    assert cache.get("b") is None
+    cache.put("d", 4, 95)
+    assert cache.get("a") is None
+    assert cache.get("c") is None
+    assert cache.get("d") == 4
+
+
+def test_memory_cache_delete():
+    """Test that deleted entries free their size."""
+    cache = MemoryCache(max_bytes=20)
+    cache.put("a", 1, 10)
+    cache.put("b", 2, 10)
+    cache.delete("a")
+    cache.delete("unknown")
+    cache.put("c", 3, 10)
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert cache.get("c") == 3
+
+
+def test_memory_cache_ttl(monkeypatch: pytest.MonkeyPatch):
+    """Test that expired entries are dropped."""
+    cache = MemoryCache(max_entries=10, ttl=60.0)
+    cache.put("a", 1)
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 120.0)
+    assert cache.get("a") is None
+
+
+def test_cache_memory_tier(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    """Test that copies of the validated models are served from the in-memory tier."""
+    monkeypatch.setattr(settings, "AUTO_ACMG_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "AUTO_ACMG_USE_CACHE", True)
+    cache = Cache()
+    assert cache.memory is not None
+    cache.memory.clear()
+    assert cache.get_model("https://example.com/a", SequenceLocation) is None
+    location = SequenceLocation(start=1)
+    cache.add_model("https://example.com/a", location)
+    location.start = 2
+    cached = Cache().get_model("https://example.com/a", SequenceLocation)
+    assert cached is not None
+    assert cached == SequenceLocation(start=1)
+    cached.start = 3
+    assert Cache().get_model("https://example.com/a", SequenceLocation) == SequenceLocation(start=1)
+    cache.memory.clear()
+
+
+# ------------------- RequestMemo -------------------
+
+
+def test_request_memo_fetches_once():
+    """Test that a memoised key is only fetched once."""
+    memo = RequestMemo()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return {"value": 42}
+
+    assert memo.get_or_fetch("url", fetch) == {"value": 42}
+    assert memo.get_or_fetch("url", fetch) == {"value": 42}
+    assert len(calls) == 1
+
+
+def test_request_memo_coalesces_concurrent_requests():
+    """Test that concurrent identical requests are coalesced into one fetch."""
+    memo = RequestMemo()
+    calls = []
+    results = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.05)
+        return "data"
+
+    threads = [
+        threading.Thread(target=lambda: results.append(memo.get_or_fetch("url", fetch)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == ["data"] * 8
+
+
+def test_request_memo_does_not_memoise_failures():
+    """Test that a failed fetch is retried by later callers."""
+    memo = RequestMemo()
+
+    def failing_fetch():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        memo.get_or_fetch("url", failing_fetch)
+    assert memo.get_or_fetch("url", lambda: "ok") == "ok"
+
+
+def test_request_memo_max_entries():
+    """Test that a bounded memo drops the least recently used responses."""
+    memo = RequestMemo(max_entries=2)
+    memo.get_or_fetch("a", lambda: 1)
+    memo.get_or_fetch("b", lambda: 2)
+    assert memo.get_or_fetch("a", lambda: -1) == 1
+    memo.get_or_fetch("c", lambda: 3)
+    assert memo.get_or_fetch("b", lambda: -2) == -2
+    assert memo.get_or_fetch("a", lambda: -1) == -1
+
+
+async def test_request_memo_coalesces_concurrent_async_requests():
+    """Test that concurrent identical requests of asyncio tasks are coalesced into one fetch."""
+    memo = RequestMemo()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "data"
+
+    results = await asyncio.gather(*(memo.get_or_fetch_async("url", fetch) for _ in range(8)))
+    assert len(calls) == 1
+    assert results == ["data"] * 8
+    assert await memo.get_or_fetch_async("url", fetch) == "data"
+    assert memo.get_or_fetch("url", lambda: "other") == "data"
+    assert len(calls) == 1
+
+
+async def test_request_memo_async_waits_for_thread():
+    """Test that an asyncio task waits for the same request in flight in a thread."""
+    memo = RequestMemo()
+    started = threading.Event()
+
+    def fetch():
+        started.set()
+        time.sleep(0.05)
+        return "data"
+
+    thread_result = asyncio.create_task(asyncio.to_thread(memo.get_or_fetch, "url", fetch))
+    await asyncio.to_thread(started.wait)
+    assert await memo.get_or_fetch_async("url", lambda: asyncio.sleep(0, "other")) == "data"
+    assert await thread_result == "data"
+
+
+async def test_request_memo_async_failure_and_cancellation():
+    """Test that failed requests fail all waiters and cancelled ones are performed again."""
+    memo = RequestMemo()
+    release = asyncio.Event()
+
+    async def failing_fetch():
+        await release.wait()
+        raise ValueError("boom")
+
+    owner = asyncio.create_task(memo.get_or_fetch_async("url", failing_fetch))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(memo.get_or_fetch_async("url", failing_fetch))
+    await asyncio.sleep(0)
+    release.set()
+    for task in (owner, waiter):
+        with pytest.raises(ValueError):
+            await task
+
+    async def slow_fetch():
+        await asyncio.sleep(10)
+
+    owner = asyncio.create_task(memo.get_or_fetch_async("url", slow_fetch))
+    await asyncio.sleep(0)
+    cancelled_waiter = asyncio.create_task(memo.get_or_fetch_async("url", slow_fetch))
+    waiter = asyncio.create_task(memo.get_or_fetch_async("url", lambda: asyncio.sleep(0, "ok")))
+    await asyncio.sleep(0)
+    # Cancelling a waiter leaves the request in flight.
+    cancelled_waiter.cancel()
+    await asyncio.sleep(0)
+    assert not owner.done() and not waiter.done()
+    # Cancelling the caller performing the request lets the waiter perform it.
+    owner.cancel()
+    assert await waiter == "ok"
+    assert owner.cancelled() and cancelled_waiter.cancelled()
+
+
+def test_request_memo_context():
+    """Test activating and deactivating the request memo."""
+    assert get_request_memo() is None
+    with request_memo() as memo:
+        assert get_request_memo() is memo
+    assert get_request_memo() is None
+
+
+# ------------------- RangeCache -------------------
+
+
+def test_range_cache_bin_indices():
+    """Test the bins overlapping a range."""
+    cache = RangeCache(bin_size=100, max_bins=10)
+    assert list(cache.bin_indices(1, 100)) == [0]
+    assert list(cache.bin_indices(100, 101)) == [0, 1]
+    assert list(cache.bin_indices(-20, 30)) == [0]
+    assert list(cache.bin_indices(50, 40)) == []
+    assert cache.bin_interval(1) == (101, 200)
+
+
+def test_range_cache_evicts_least_recently_used():
+    """Test that the least recently used bin is evicted when the cache is full."""
+    cache = RangeCache(bin_size=100, max_bins=2)
+    cache.add("http://annonars", "grch38", "1", 0, "a")
+    cache.add("http://annonars", "grch38", "1", 1, "b")
+    assert cache.get("http://annonars", "grch38", "1", 0) == "a"
+    cache.add("http://annonars", "grch38", "1", 2, "c")
+    assert cache.get("http://annonars", "grch38", "1", 1) is None
+    assert cache.get("http://annonars", "grch38", "1", 0) == "a"
+    assert cache.get("http://annonars", "grch37", "1", 0) is None
+    assert cache.get("http://other", "grch38", "1", 0) is None
@@ -0,0 +1,164 @@
+import asyncio
+import threading
+from contextvars import ContextVar
+
+import pytest
+
+from src.core.config import settings
+from src.core.executor import (
+    check_capacity,
+    get_executor,
+    pending_calls,
+    run_in_executor,
+    shutdown_executor,
+)
+from src.defs.exceptions import ServerBusyError
+
+#: Context variable to check that the context reaches the workers.
+request_id: ContextVar[str] = ContextVar("request_id", default="")
+
+
+@pytest.fixture
+def executor_settings(monkeypatch: pytest.MonkeyPatch):
+    def configure(max_workers: int, max_queue: int, queue_timeout: float = 0.0):
+        monkeypatch.setattr(settings, "AUTO_ACMG_API_MAX_WORKERS", max_workers)
+        monkeypatch.setattr(settings, "AUTO_ACMG_API_MAX_QUEUE", max_queue)
+        monkeypatch.setattr(settings, "AUTO_ACMG_API_QUEUE_TIMEOUT", queue_timeout)
+
+    shutdown_executor()
+    yield configure
+    shutdown_executor()
+
+
+def test_get_executor_is_shared(executor_settings):
+    """Test that the thread pool is created once."""
+    executor_settings(2, 0)
+    assert get_executor() is get_executor()
+    assert get_executor()._max_workers == 2
+
+
+def test_run_in_executor_off_loop(executor_settings):
+    """Test that calls run on a worker thread with the context of the caller."""
+    executor_settings(2, 0)
+
+    def work(value):
+        return value, request_id.get(), threading.current_thread().name
+
+    async def main():
+        request_id.set("abc")
+        return await run_in_executor(work, 42)
+
+    value, context_value, thread_name = asyncio.run(main())
+    assert (value, context_value) == (42, "abc")
+    assert thread_name.startswith("auto-acmg")
+
+
+def test_run_in_executor_raises(executor_settings):
+    """Test that exceptions of the call are raised to the caller."""
+    executor_settings(1, 0)
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        asyncio.run(run_in_executor(fail))
+
+
+def test_run_in_executor_does_not_block_loop(executor_settings):
+    """Test that the event loop keeps running while a call blocks a worker."""
+    executor_settings(1, 0)
+    release = threading.Event()
+
+    async def main():
+        call = asyncio.ensure_future(run_in_executor(release.wait, 5))
+        ticks = 0
+        while ticks < 3:
+            await asyncio.sleep(0.01)
+            ticks += 1
+        release.set()
+        assert await call
+        return ticks
+
+    assert asyncio.run(main()) == 3
+
+
+def test_run_in_executor_rejects_when_queue_full(executor_settings):
+    """Test that calls beyond the workers and the queue are rejected right away."""
+    executor_settings(1, 1)
+    release = threading.Event()
+
+    async def main():
+        running = asyncio.ensure_future(run_in_executor(release.wait, 5))
+        queued = asyncio.ensure_future(run_in_executor(release.wait, 5))
+        await asyncio.sleep(0.05)
+        with pytest.raises(ServerBusyError):
+            await run_in_executor(release.wait, 5)
+        release.set()
+        return await asyncio.gather(running, queued)
+
+    assert asyncio.run(main()) == [True, True]
+
+
+def test_run_in_executor_queue_timeout(executor_settings):
+    """Test that queued calls give up after the queue timeout."""
+    executor_settings(1, 1, queue_timeout=0.05)
+    release = threading.Event()
+
+    async def main():
+        running = asyncio.ensure_future(run_in_executor(release.wait, 5))
+        await asyncio.sleep(0.01)
+        with pytest.raises(ServerBusyError):
+            await run_in_executor(release.wait, 5)
+        release.set()
+        return await running
+
+    assert asyncio.run(main())
+
+
+def test_run_in_executor_wait(executor_settings):
+    """Test that waiting calls are neither rejected nor timed out but count towards the queue."""
+    executor_settings(1, 0, queue_timeout=0.01)
+    release = threading.Event()
+
+    async def main():
+        running = asyncio.ensure_future(run_in_executor(release.wait, 5, wait=True))
+        waiting = asyncio.ensure_future(run_in_executor(release.wait, 5, wait=True))
+        await asyncio.sleep(0.05)
+        assert not waiting.done()
+        with pytest.raises(ServerBusyError):
+            check_capacity()
+        release.set()
+        result = await asyncio.gather(running, waiting)
+        check_capacity()
+        return result
+
+    assert asyncio.run(main()) == [True, True]
+
+
+def test_run_in_executor_cancelled_keeps_worker(executor_settings):
+    """Test that a cancelled call keeps its worker and queue place until its thread finished."""
+    executor_settings(1, 0)
+    started = threading.Event()
+    release = threading.Event()
+
+    def work():
+        started.set()
+        return release.wait(5)
+
+    async def main():
+        call = asyncio.ensure_future(run_in_executor(work))
+        while not started.is_set():
+            await asyncio.sleep(0.01)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+        assert pending_calls() == 1
+        with pytest.raises(ServerBusyError):
+            check_capacity()
+        release.set()
+        while pending_calls():
+            await asyncio.sleep(0.01)
+        check_capacity()
+        return await run_in_executor(int, 7)
+
+    assert asyncio.run(main()) == 7
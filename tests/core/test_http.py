@@ -0,0 +1,88 @@
+import asyncio
+
+import httpx
+import pytest
+
+from src.api.reev.annonars import AnnonarsClient
+from src.core.config import settings
+from src.core.http import (
+    aclose_http_clients,
+    close_http_clients,
+    get_async_http_client,
+    get_http_client,
+    set_http_transport,
+)
+
+# ------------------- get_http_client -------------------
+
+
+def test_get_http_client_is_shared():
+    """Test that the same client is returned for the same pool."""
+    close_http_clients()
+    client = get_http_client()
+    assert get_http_client() is client
+    assert get_http_client("other") is not client
+    close_http_clients()
+    assert client.is_closed
+
+
+def test_get_http_client_recreated_after_close():
+    """Test that a closed client is replaced by a new one."""
+    client = get_http_client()
+    client.close()
+    assert get_http_client() is not client
+    close_http_clients()
+
+
+def test_get_http_client_http2_fallback(monkeypatch: pytest.MonkeyPatch):
+    """Test that HTTP/2 falls back to HTTP/1.1 when the h2 package is missing."""
+    monkeypatch.setattr(settings, "AUTO_ACMG_HTTP2", True)
+    monkeypatch.setattr("src.core.http.importlib.util.find_spec", lambda name: None)
+    close_http_clients()
+    assert get_http_client() is not None
+    close_http_clients()
+
+
+def test_set_http_transport():
+    """Test that the clients send their requests through the configured transport."""
+    set_http_transport(httpx.MockTransport(lambda request: httpx.Response(200, json={"a": 1})))
+    try:
+        assert get_http_client().get("http://upstream/api").json() == {"a": 1}
+    finally:
+        set_http_transport(None)
+
+
+def test_set_http_transport_existing_api_clients():
+    """Test that API clients created before a transport change use the new shared client."""
+    annonars_client = AnnonarsClient()
+    previous = annonars_client.client
+    set_http_transport(httpx.MockTransport(lambda request: httpx.Response(200, json={"a": 1})))
+    try:
+        assert previous.is_closed
+        assert not annonars_client.client.is_closed
+        assert annonars_client.client.get("http://upstream/api").json() == {"a": 1}
+    finally:
+        set_http_transport(None)
+
+
+# ------------------- get_async_http_client -------------------
+
+
+@pytest.mark.asyncio
+async def test_get_async_http_client_is_shared():
+    """Test that the same async client is returned within one event loop."""
+    client = get_async_http_client()
+    assert get_async_http_client() is client
+    await aclose_http_clients()
+    assert client.is_closed
+
+
+def test_get_async_http_client_per_loop():
+    """Test that different event loops get different async clients."""
+
+    async def get_client():
+        client = get_async_http_client()
+        await aclose_http_clients()
+        return client
+
+    assert asyncio.run(get_client()) is not asyncio.run(get_client())
@@ -0,0 +1,119 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from src.core.cache import RangeCache, RequestMemo
+from src.core.metrics import (
+    CACHE_REQUESTS,
+    CONTENT_TYPE,
+    UPSTREAM_REQUESTS,
+    Counter,
+    Histogram,
+    render_metrics,
+    reset_metrics,
+)
+from src.core.timing import reset_timings, span
+
+
+@pytest.fixture(autouse=True)
+def metrics():
+    reset_metrics()
+    reset_timings()
+    yield
+    reset_metrics()
+    reset_timings()
+
+
+# ------------------- metric types -------------------
+
+
+def test_counter_render():
+    """Test the text format of a counter, with escaped label values."""
+    counter = Counter("requests_total", "Requests.", ("path",))
+    counter.inc(("/a",))
+    counter.inc(("/a",), 2)
+    counter.inc(('say "hi"\n',), 0.5)
+    assert counter.render() == [
+        "# HELP requests_total Requests.",
+        "# TYPE requests_total counter",
+        'requests_total{path="/a"} 3',
+        'requests_total{path="say \\"hi\\"\\n"} 0.5',
+    ]
+
+
+def test_histogram_render():
+    """Test that the buckets of a histogram are cumulative and include their upper bound."""
+    histogram = Histogram("latency_seconds", "Latency.", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value, ("a",))
+    assert histogram.render()[2:] == [
+        'latency_seconds_bucket{stage="a",le="0.1"} 2',
+        'latency_seconds_bucket{stage="a",le="1.0"} 3',
+        'latency_seconds_bucket{stage="a",le="+Inf"} 4',
+        'latency_seconds_sum{stage="a"} 2.65',
+        'latency_seconds_count{stage="a"} 4',
+    ]
+
+
+# ------------------- recorded metrics -------------------
+
+
+def test_upstream_requests_from_spans():
+    """Test that the upstream request spans are recorded per service and outcome."""
+    with span("annonars.http") as request_span:
+        request_span.record_bytes(10)
+    with pytest.raises(ValueError):
+        with span("annonars.http"):
+            raise ValueError("failed")
+    with span("annonars.get_gene_info"):
+        pass
+    assert UPSTREAM_REQUESTS.values() == {("annonars", "ok"): 1, ("annonars", "error"): 1}
+    assert 'auto_acmg_upstream_response_bytes_total{service="annonars"} 10' in render_metrics()
+
+
+def test_cache_tiers():
+    """Test that the lookups of the cache tiers are counted and give the hit ratios."""
+    memo = RequestMemo()
+    memo.get_or_fetch("key", lambda: 1)
+    memo.get_or_fetch("key", lambda: 1)
+    memo.get_or_fetch("key", lambda: 1)
+    range_cache = RangeCache(bin_size=10, max_bins=10)
+    range_cache.get("http://annonars", "grch38", "1", 0)
+
+    assert CACHE_REQUESTS.values() == {
+        ("memo", "miss"): 1,
+        ("memo", "hit"): 2,
+        ("range", "miss"): 1,
+    }
+    output = render_metrics()
+    assert 'auto_acmg_cache_hit_ratio{tier="memo"} 0.6666666666666666' in output
+    assert 'auto_acmg_cache_hit_ratio{tier="range"} 0' in output
+
+
+def test_stage_totals():
+    """Test that the stage timings are exported."""
+    with span("criteria.predict_pvs1"):
+        pass
+    assert 'auto_acmg_stage_calls_total{stage="criteria.predict_pvs1"} 1' in render_metrics()
+
+
+# ------------------- endpoint -------------------
+
+
+def test_metrics_endpoint(client: TestClient):
+    """Test that requests are recorded by route and the metrics are served."""
+    client.get("/favicon.ico")
+    client.get("/unknown")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == CONTENT_TYPE
+    assert "# TYPE auto_acmg_http_request_duration_seconds histogram" in response.text
+    assert (
+        'auto_acmg_http_request_duration_seconds_count{method="GET",endpoint="/favicon.ico",'
+        'status="200"} 1'
+    ) in response.text
+    assert (
+        'auto_acmg_http_request_duration_seconds_count{method="GET",endpoint="unmatched",'
+        'status="404"} 1'
+    ) in response.text
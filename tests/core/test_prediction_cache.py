@@ -0,0 +1,167 @@
+import time
+
+import pytest
+
+from src.core.cache import get_cache_backend
+from src.core.config import settings
+from src.core.prediction_cache import PredictionCache, predictor_fingerprint, variant_key
+from src.defs.auto_acmg import AutoACMGOptions, AutoACMGSeqVarResult, AutoACMGStrucVarResult
+from src.defs.genome_builds import GenomeRelease
+from src.defs.seqvar import SeqVar
+from src.defs.strucvar import StrucVar, StrucVarType
+from src.seqvar.default_predictor import DefaultSeqVarPredictor
+from src.vcep import CoagulationFactorDeficiencyPredictor, VHLPredictor
+
+
+@pytest.fixture
+def prediction_cache(monkeypatch: pytest.MonkeyPatch, tmp_path):
+    monkeypatch.setattr(settings, "AUTO_ACMG_USE_CACHE", False)
+    monkeypatch.setattr(settings, "AUTO_ACMG_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "AUTO_ACMG_DATA_VERSION", "2024-01")
+    return PredictionCache()
+
+
+@pytest.fixture
+def seqvar():
+    return SeqVar(GenomeRelease.GRCh38, "chr1", 100, "g", "a", "NM_000001.1:c.1G>A")
+
+
+@pytest.fixture
+def seqvar_result(seqvar):
+    return AutoACMGSeqVarResult(seqvar=seqvar)
+
+
+# ------------------- keys -------------------
+
+
+def test_variant_key_ignores_name(seqvar):
+    """Test that the key of a variant does not depend on how it was named."""
+    same = SeqVar(GenomeRelease.GRCh38, "1", 100, "G", "A", "chr1:100:G:A")
+    assert variant_key(seqvar) == variant_key(same) == "GRCh38-1-100-G-A"
+    strucvar = StrucVar(StrucVarType.DUP, GenomeRelease.GRCh37, "chrX", 10, 20)
+    assert variant_key(strucvar) == "GRCh37-X-10-20-DUP"
+
+
+def test_key_depends_on_options_and_data_version(seqvar, monkeypatch: pytest.MonkeyPatch):
+    """Test that options and the upstream data version are part of the key."""
+    key = PredictionCache.key(seqvar, AutoACMGOptions())
+    assert PredictionCache.key(seqvar, AutoACMGOptions(duplication_tandem=True)) != key
+    monkeypatch.setattr(settings, "AUTO_ACMG_DATA_VERSION", "other")
+    assert PredictionCache.key(seqvar, AutoACMGOptions()) != key
+
+
+@pytest.mark.parametrize(
+    "predictor_class,expected",
+    [
+        (DefaultSeqVarPredictor, "DefaultSeqVarPredictor[]"),
+        (VHLPredictor, "VHLPredictor[GN078:1.0.0]"),
+        (
+            CoagulationFactorDeficiencyPredictor,
+            "CoagulationFactorDeficiencyPredictor[GN071:1.0.0,GN080:1.0.0]",
+        ),
+    ],
+)
+def test_predictor_fingerprint(predictor_class, expected):
+    """Test the fingerprints of predictors with none, one and several VCEP specifications."""
+    assert predictor_fingerprint(predictor_class) == expected
+
+
+# ------------------- PredictionCache -------------------
+
+
+def test_prediction_cache_roundtrip(prediction_cache, seqvar, seqvar_result):
+    """Test that stored predictions are returned as fresh copies named as requested."""
+    options = AutoACMGOptions()
+    assert prediction_cache.get(seqvar, options) is None
+    entry = prediction_cache.put(seqvar, options, seqvar_result, "Predictor[]", "HGNC:1")
+
+    renamed = SeqVar(GenomeRelease.GRCh38, "1", 100, "G", "A", "chr1:100:G:A")
+    cached = prediction_cache.get(renamed, options)
+    assert cached == entry
+    assert (cached.kind, cached.predictor, cached.hgnc_id) == ("seqvar", "Predictor[]", "HGNC:1")
+    result = cached.to_result(renamed)
+    assert isinstance(result, AutoACMGSeqVarResult)
+    assert result.seqvar is not None and result.seqvar.user_repr == "chr1:100:G:A"
+    assert result.criteria == seqvar_result.criteria
+    assert cached.to_result(renamed) is not result
+    assert cached.etag(renamed) != cached.etag(seqvar)
+    assert cached.etag(seqvar).startswith('"') and cached.etag(seqvar).endswith('"')
+
+
+def test_prediction_cache_etag_changes_with_content(prediction_cache, seqvar, seqvar_result):
+    """Test that the ETag changes if the prediction changes."""
+    options = AutoACMGOptions()
+    etag = prediction_cache.put(seqvar, options, seqvar_result, "Predictor[]").etag(seqvar)
+    seqvar_result.data.hgnc_id = "HGNC:2"
+    assert prediction_cache.put(seqvar, options, seqvar_result, "Predictor[]").etag(seqvar) != etag
+
+
+def test_prediction_cache_strucvar(prediction_cache):
+    """Test that structural variant predictions are restored with their model."""
+    strucvar = StrucVar(StrucVarType.DEL, GenomeRelease.GRCh38, "1", 100, 200)
+    options = AutoACMGOptions(duplication_tandem=True)
+    prediction_cache.put(strucvar, options, AutoACMGStrucVarResult(strucvar=strucvar), "P[]")
+    assert prediction_cache.get(strucvar, AutoACMGOptions()) is None
+    result = prediction_cache.get(strucvar, options).to_result(strucvar)
+    assert isinstance(result, AutoACMGStrucVarResult)
+    assert result.strucvar == strucvar
+
+
+def test_prediction_cache_ttl(monkeypatch: pytest.MonkeyPatch, seqvar, seqvar_result):
+    """Test that cached predictions expire."""
+    monkeypatch.setattr(settings, "AUTO_ACMG_USE_CACHE", False)
+    monkeypatch.setattr(settings, "AUTO_ACMG_PREDICTION_CACHE_TTL", 60.0)
+    prediction_cache = PredictionCache()
+    prediction_cache.put(seqvar, AutoACMGOptions(), seqvar_result, "P[]")
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 120.0)
+    assert prediction_cache.get(seqvar, AutoACMGOptions()) is None
+
+
+def test_prediction_cache_invalidate(prediction_cache, seqvar, seqvar_result):
+    """Test dropping single and all cached predictions."""
+    other = SeqVar(GenomeRelease.GRCh38, "2", 100, "G", "A")
+    options = AutoACMGOptions()
+    prediction_cache.put(seqvar, options, seqvar_result, "P[]")
+    prediction_cache.put(other, options, seqvar_result, "P[]")
+
+    prediction_cache.invalidate(seqvar)
+    assert prediction_cache.get(seqvar, options) is None
+    assert prediction_cache.get(other, options) is not None
+
+    prediction_cache.invalidate()
+    assert prediction_cache.get(other, options) is None
+
+
+def test_prediction_cache_invalidate_default_options(
+    monkeypatch: pytest.MonkeyPatch, prediction_cache, seqvar, seqvar_result
+):
+    """Test that invalidating without options drops the prediction made with default options."""
+    monkeypatch.setattr(settings, "DUPLICATION_TANDEM", True)
+    options = AutoACMGOptions.default()
+    assert options == AutoACMGOptions(duplication_tandem=True)
+    prediction_cache.put(seqvar, options, seqvar_result, "P[]")
+
+    prediction_cache.invalidate(seqvar)
+    assert prediction_cache.get(seqvar, options) is None
+
+
+@pytest.mark.parametrize("backend", ["file", "sqlite"])
+def test_prediction_cache_persistent(
+    monkeypatch: pytest.MonkeyPatch, tmp_path, backend, seqvar, seqvar_result
+):
+    """Test that predictions are shared through the persistent tier and invalidated there."""
+    monkeypatch.setattr(settings, "AUTO_ACMG_USE_CACHE", True)
+    monkeypatch.setattr(settings, "AUTO_ACMG_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "AUTO_ACMG_CACHE_BACKEND", backend)
+    options = AutoACMGOptions()
+    entry = PredictionCache().put(seqvar, options, seqvar_result, "P[]")
+
+    assert PredictionCache().get(seqvar, options) == entry
+    assert (tmp_path / "predictions").is_dir()
+    shared_backend = get_cache_backend(backend, str(tmp_path / "predictions"))
+    assert PredictionCache().backend is shared_backend
+    assert shared_backend.ttl == settings.AUTO_ACMG_PREDICTION_CACHE_TTL
+
+    PredictionCache().invalidate()
+    assert PredictionCache().get(seqvar, options) is None
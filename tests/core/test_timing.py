@@ -0,0 +1,110 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+
+import pytest
+
+from src.core.timing import (
+    collect_timings,
+    get_timings,
+    record_bytes,
+    record_cache,
+    reset_timings,
+    span,
+    timed,
+)
+
+
+@pytest.fixture(autouse=True)
+def process_timings():
+    reset_timings()
+    yield
+    reset_timings()
+
+
+# ------------------- span -------------------
+
+
+def test_span_records_calls_and_time():
+    """Test that every span counts as a call of its stage."""
+    for _ in range(3):
+        with span("stage"):
+            pass
+    timing = get_timings()["stage"]
+    assert timing.calls == 3
+    assert timing.errors == 0
+    assert 0.0 <= timing.max_seconds <= timing.seconds
+
+
+def test_span_records_errors():
+    """Test that spans left by an exception are counted as errors."""
+    with pytest.raises(ValueError):
+        with span("stage"):
+            raise ValueError("failed")
+    timing = get_timings()["stage"]
+    assert (timing.calls, timing.errors) == (1, 1)
+
+
+def test_record_cache_and_bytes_on_innermost_span():
+    """Test that cache accesses and payload bytes count towards the innermost span."""
+    record_cache(True)  # no active span, ignored
+    with span("outer") as outer:
+        record_cache(False)
+        with span("inner"):
+            record_cache(True)
+            record_cache(True)
+            record_bytes(100)
+        outer.record_bytes(5)
+    timings = get_timings()
+    assert (timings["outer"].cache_hits, timings["outer"].cache_misses) == (0, 1)
+    assert timings["outer"].bytes == 5
+    assert (timings["inner"].cache_hits, timings["inner"].cache_misses) == (2, 0)
+    assert timings["inner"].bytes == 100
+
+
+def test_timed_functions_and_coroutines():
+    """Test the decorator on functions and coroutine functions."""
+
+    @timed("sync")
+    def double(x: int) -> int:
+        return 2 * x
+
+    @timed("async")
+    async def triple(x: int) -> int:
+        return 3 * x
+
+    assert double(2) == 4
+    assert asyncio.run(triple(2)) == 6
+    timings = get_timings()
+    assert timings["sync"].calls == 1
+    assert timings["async"].calls == 1
+
+
+# ------------------- collect_timings -------------------
+
+
+def test_collect_timings_per_context():
+    """Test that a collector only sees the spans run within it, including worker threads."""
+    with span("before"):
+        pass
+    with collect_timings() as collector:
+        with span("stage"):
+            pass
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [executor.submit(copy_context().run, timed("worker")(int)) for _ in range(4)]
+            [future.result() for future in futures]
+    with span("after"):
+        pass
+
+    collected = collector.snapshot()
+    assert set(collected) == {"stage", "worker"}
+    assert collected["worker"].calls == 4
+    assert set(get_timings()) == {"before", "stage", "worker", "after"}
+
+
+def test_reset_timings():
+    """Test dropping the aggregates of the process."""
+    with span("stage"):
+        pass
+    reset_timings()
+    assert get_timings() == {}
@@ -0,0 +1,224 @@
+import gzip
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+import tabix
+
+from src.core.config import settings
+from src.core.tracks import (
+    IntervalIndex,
+    clear_interval_indexes,
+    close_tabix_handles,
+    find_intervals,
+    get_interval_index,
+    get_tabix_handle,
+    query_track,
+    track_path,
+)
+from src.defs.genome_builds import GenomeRelease
+
+
+@pytest.fixture
+def mock_tabix_open():
+    close_tabix_handles()
+    with patch("src.core.tracks.tabix.open") as mock_open:
+        mock_open.side_effect = lambda path: MagicMock(name=path)
+        yield mock_open
+    close_tabix_handles()
+
+
+# ------------------- track_path -------------------
+
+
+@pytest.mark.parametrize(
+    "genome_release,track,expected",
+    [
+        (GenomeRelease.GRCh37, "uniprot", "lib/uniprot/grch37/uniprot.bed.gz"),
+        (GenomeRelease.GRCh38, "uniprot", "lib/uniprot/grch38/uniprot.bed.gz"),
+        (GenomeRelease.GRCh37, "rmsk", "lib/rmsk/grch37/rmsk.bed.gz"),
+        (GenomeRelease.GRCh38, "rmsk", "lib/rmsk/grch38/rmsk.bed.gz"),
+    ],
+)
+def test_track_path(genome_release, track, expected):
+    """Test the paths to the bundled tracks."""
+    assert track_path(genome_release, track) == os.path.join(settings.PATH_TO_ROOT, expected)
+
+
+def test_track_path_unknown():
+    """Test that unknown tracks are rejected."""
+    with pytest.raises(ValueError):
+        track_path(GenomeRelease.GRCh38, "unknown")
+
+
+# ------------------- get_tabix_handle -------------------
+
+
+def test_get_tabix_handle_is_shared(mock_tabix_open):
+    """Test that a track is opened once per genome release."""
+    handle = get_tabix_handle(GenomeRelease.GRCh38, "rmsk")
+    assert get_tabix_handle(GenomeRelease.GRCh38, "rmsk") is handle
+    assert get_tabix_handle(GenomeRelease.GRCh37, "rmsk") is not handle
+    assert get_tabix_handle(GenomeRelease.GRCh38, "uniprot") is not handle
+    assert mock_tabix_open.call_count == 3
+
+
+def test_get_tabix_handle_shared_across_threads(mock_tabix_open):
+    """Test that concurrent first uses open the track only once."""
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        handles = list(
+            executor.map(lambda _: get_tabix_handle(GenomeRelease.GRCh38, "uniprot"), range(32))
+        )
+    assert all(handle is handles[0] for handle in handles)
+    mock_tabix_open.assert_called_once()
+
+
+def test_get_tabix_handle_reopened_after_fork(mock_tabix_open):
+    """Test that a handle opened by another process is not reused."""
+    handle = get_tabix_handle(GenomeRelease.GRCh38, "rmsk")
+    handle.pid = -1
+    assert get_tabix_handle(GenomeRelease.GRCh38, "rmsk") is not handle
+
+
+def test_get_tabix_handle_open_error_not_registered(mock_tabix_open):
+    """Test that a failed open is retried on the next call."""
+    mock_tabix_open.side_effect = tabix.TabixError("Failed to open file")
+    with pytest.raises(tabix.TabixError):
+        get_tabix_handle(GenomeRelease.GRCh38, "rmsk")
+    mock_tabix_open.side_effect = lambda path: MagicMock(name=path)
+    assert get_tabix_handle(GenomeRelease.GRCh38, "rmsk") is not None
+    assert mock_tabix_open.call_count == 2
+
+
+# ------------------- query_track -------------------
+
+
+def test_query_track(mock_tabix_open):
+    """Test that the records of a query are returned as a list."""
+    handle = get_tabix_handle(GenomeRelease.GRCh38, "rmsk")
+    handle.tb.query.return_value = iter([["chr1", "99", "101"]])
+    assert query_track(GenomeRelease.GRCh38, "rmsk", "chr1", 99, 100) == [["chr1", "99", "101"]]
+    handle.tb.query.assert_called_once_with("chr1", 99, 100)
+
+
+# ------------------- IntervalIndex -------------------
+
+
+@pytest.fixture
+def interval_index():
+    return IntervalIndex.from_records(
+        [
+            ("chr1", 100, 200),
+            ("chr1", 10, 1000),
+            ("chr1", 150, 160),
+            ("chr1", 300, 400),
+            ("chr2", 5, 6),
+        ]
+    )
+
+
+def test_interval_index_len(interval_index):
+    """Test the number of indexed intervals."""
+    assert len(interval_index) == 5
+
+
+@pytest.mark.parametrize(
+    "chrom,start,end,expected",
+    [
+        ("chr1", 0, 10, []),
+        ("chr1", 9, 10, []),
+        ("chr1", 10, 11, [(10, 1000)]),
+        ("chr1", 155, 156, [(10, 1000), (100, 200), (150, 160)]),
+        ("chr1", 200, 201, [(10, 1000)]),
+        ("chr1", 1000, 1001, []),
+        ("chr1", 250, 350, [(10, 1000), (300, 400)]),
+        ("chr2", 5, 6, [(5, 6)]),
+        ("chr2", 6, 7, []),
+        ("chrX", 0, 100, []),
+    ],
+)
+def test_interval_index_query(interval_index, chrom, start, end, expected):
+    """Test the intervals overlapping a query, ordered by start."""
+    assert interval_index.query(chrom, start, end) == expected
+
+
+def test_interval_index_matches_brute_force():
+    """Test random queries against a linear scan."""
+    rng = random.Random(42)
+    intervals = []
+    for _ in range(500):
+        start = rng.randrange(0, 10_000)
+        intervals.append((start, start + rng.randrange(1, 300)))
+    index = IntervalIndex.from_records(("chr1", start, end) for start, end in intervals)
+    query_starts = np.array([rng.randrange(0, 10_500) for _ in range(1000)])
+    query_ends = query_starts + np.array([rng.randrange(1, 5) for _ in range(1000)])
+
+    first_starts, first_ends = index.first_overlap_many("chr1", query_starts, query_ends)
+    overlaps = index.overlaps_many("chr1", query_starts, query_ends)
+    for i, (start, end) in enumerate(zip(query_starts.tolist(), query_ends.tolist())):
+        expected = sorted((s, e) for s, e in intervals if s < end and e > start)
+        assert sorted(index.query("chr1", start, end)) == expected
+        assert bool(overlaps[i]) == bool(expected)
+        if expected:
+            assert (first_starts[i], first_ends[i]) in expected
+            assert first_starts[i] == expected[0][0]
+        else:
+            assert (first_starts[i], first_ends[i]) == (-1, -1)
+
+
+def test_interval_index_first_overlap_many(interval_index):
+    """Test the batch query with positions as 1-bp intervals."""
+    positions = np.array([5, 155, 350, 2000])
+    starts, ends = interval_index.first_overlap_many("chr1", positions, positions + 1)
+    assert starts.tolist() == [-1, 10, 10, -1]
+    assert ends.tolist() == [-1, 1000, 1000, -1]
+    assert interval_index.overlaps_many("chrX", positions, positions + 1).tolist() == [False] * 4
+
+
+def test_interval_index_from_bed(tmp_path):
+    """Test loading a bgzipped BED file."""
+    path = tmp_path / "track.bed.gz"
+    with gzip.open(path, "wt") as bed:
+        bed.write("#chrom\tstart\tend\n")
+        bed.write("chr1\t100\t200\tname\t0\t+\n")
+        bed.write("chr1\t50\t60\n")
+    index = IntervalIndex.from_bed(str(path))
+    assert len(index) == 2
+    assert index.query("chr1", 0, 150) == [(50, 60), (100, 200)]
+
+
+# ------------------- find_intervals -------------------
+
+
+@pytest.fixture
+def track_index(monkeypatch: pytest.MonkeyPatch):
+    index = IntervalIndex.from_records([("chr1", 100, 200)])
+    clear_interval_indexes()
+    monkeypatch.setattr(settings, "AUTO_ACMG_USE_TRACK_INDEX", True)
+    with patch("src.core.tracks.IntervalIndex.from_bed", return_value=index) as mock_from_bed:
+        yield mock_from_bed
+    clear_interval_indexes()
+
+
+def test_get_interval_index_is_shared(track_index):
+    """Test that a track is loaded once per genome release."""
+    index = get_interval_index(GenomeRelease.GRCh38, "rmsk")
+    assert get_interval_index(GenomeRelease.GRCh38, "rmsk") is index
+    track_index.assert_called_once_with(track_path(GenomeRelease.GRCh38, "rmsk"))
+
+
+def test_find_intervals_index(track_index, mock_tabix_open):
+    """Test that the in-memory index is used when enabled."""
+    assert find_intervals(GenomeRelease.GRCh38, "rmsk", "chr1", 149, 150) == [(100, 200)]
+    assert find_intervals(GenomeRelease.GRCh38, "rmsk", "chr1", 200, 201) == []
+    mock_tabix_open.assert_not_called()
+
+
+def test_find_intervals_tabix(mock_tabix_open):
+    """Test that tabix is used per default."""
+    handle = get_tabix_handle(GenomeRelease.GRCh38, "uniprot")
+    handle.tb.query.return_value = iter([["chr1", "100", "200", "domain"]])
+    assert find_intervals(GenomeRelease.GRCh38, "uniprot", "chr1", 149, 150) == [(100, 200)]
@@ -0,0 +1,62 @@
+import random
+
+import numpy as np
+import pytest
+
+from lib.maxentpy import maxent
+
+
+@pytest.fixture(scope="module")
+def matrix5():
+    return maxent.load_matrix5()
+
+
+@pytest.fixture(scope="module")
+def matrix3():
+    return maxent.load_matrix3()
+
+
+def _random_seqs(length, count, seed=42):
+    rng = random.Random(seed)
+    return ["".join(rng.choice("ACGTacgt") for _ in range(length)) for _ in range(count)]
+
+
+# ------------------- score5_many -------------------
+
+
+def test_score5_many_matches_score5(matrix5):
+    """Test the batch scores against the scores of single sequences."""
+    seqs = _random_seqs(9, 2000)
+    expected = [maxent.score5(seq, matrix=matrix5) for seq in seqs]
+    np.testing.assert_allclose(maxent.score5_many(seqs), expected, rtol=0, atol=1e-12)
+    np.testing.assert_allclose(maxent.score5_many(seqs, matrix=matrix5), expected, atol=1e-12)
+
+
+def test_score5_many_empty():
+    """Test scoring no sequences."""
+    assert maxent.score5_many([]).shape == (0,)
+
+
+@pytest.mark.parametrize("seqs", [["CAGGTAAG"], ["CAGGTAAGN"]])
+def test_score5_many_invalid(seqs):
+    """Test that sequences of the wrong length or with other bases are rejected."""
+    with pytest.raises(ValueError):
+        maxent.score5_many(seqs)
+
+
+# ------------------- score3_many -------------------
+
+
+def test_score3_many_matches_score3(matrix3):
+    """Test the batch scores against the scores of single sequences."""
+    seqs = _random_seqs(23, 2000)
+    expected = [maxent.score3(seq, matrix=matrix3) for seq in seqs]
+    np.testing.assert_allclose(maxent.score3_many(seqs), expected, rtol=0, atol=1e-12)
+    dense = maxent.dense_matrix3(matrix3)
+    np.testing.assert_allclose(maxent.score3_many(seqs, matrix=dense), expected, atol=1e-12)
+
+
+def test_score3_many_invalid():
+    """Test that sequences of the wrong length are rejected."""
+    with pytest.raises(ValueError):
+        maxent.score3_many(["TTCCAAACGAACTTTTGTAGGG"])
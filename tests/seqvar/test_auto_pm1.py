@@ -172,36 +172,31 @@ def test_count_vars_no_clinvar_data(mock_get_variant_from_range, auto_pm1, seqva
 # ============== _get_uniprot_domain ==============
 
 
-@patch("src.seqvar.auto_pm1.tabix")
-def test_get_uniprot_domain_found(mock_tabix, auto_pm1, seqvar):
+@patch("src.seqvar.auto_pm1.find_intervals")
+def test_get_uniprot_domain_found(mock_find_intervals, auto_pm1, seqvar):
     """Test retrieving UniProt domain successfully."""
-    # Setting up the mock
-    mock_query = MagicMock()
-    mock_query.__iter__.return_value = iter([["1", "50", "150"]])
-    mock_open = mock_tabix.open.return_value
-    mock_open.query.return_value = mock_query
+    mock_find_intervals.return_value = [(50, 150), (120, 300)]
 
     domain = auto_pm1._get_uniprot_domain(seqvar)
     assert domain == (50, 150), "Should return the correct start and end positions"
+    mock_find_intervals.assert_called_once_with(
+        seqvar.genome_release, "uniprot", f"chr{seqvar.chrom}", seqvar.pos - 1, seqvar.pos
+    )
 
 
-@patch("src.seqvar.auto_pm1.tabix")
-def test_get_uniprot_domain_none_found(mock_tabix, auto_pm1, seqvar):
+@patch("src.seqvar.auto_pm1.find_intervals")
+def test_get_uniprot_domain_none_found(mock_find_intervals, auto_pm1, seqvar):
     """Test no UniProt domain found for the variant."""
-    # Setting up the mock to return an empty iterator
-    mock_query = MagicMock()
-    mock_query.__iter__.return_value = iter([])
-    mock_open = mock_tabix.open.return_value
-    mock_open.query.return_value = mock_query
+    mock_find_intervals.return_value = []
 
     domain = auto_pm1._get_uniprot_domain(seqvar)
     assert domain is None, "Should return None when no domain is found"
 
 
-@patch("src.seqvar.auto_pm1.tabix.open")
-def test_get_uniprot_domain_exception(mock_tabix_open, auto_pm1, seqvar):
+@patch("src.seqvar.auto_pm1.find_intervals")
+def test_get_uniprot_domain_exception(mock_find_intervals, auto_pm1, seqvar):
     """Test handling exceptions when querying UniProt domains."""
-    mock_tabix_open.side_effect = tabix.TabixError("Test error")
+    mock_find_intervals.side_effect = tabix.TabixError("Test error")
 
     with pytest.raises(AlgorithmError) as excinfo:
         auto_pm1._get_uniprot_domain(seqvar)
@@ -30,31 +30,26 @@ def var_data():
 # ============== _in_repeat_region =================
 
 
-@patch("src.seqvar.auto_pm4_bp3.tabix.open")
-def test_in_repeat_region_true(mock_tabix_open, auto_pm4bp3, seqvar):
-    mock_tabix = MagicMock()
-    mock_tabix.query.return_value = iter(
-        [["chr1", "99", "101"]]
-    )  # Simulating a record that matches the position
-    mock_tabix_open.return_value = mock_tabix
+@patch("src.seqvar.auto_pm4_bp3.find_intervals")
+def test_in_repeat_region_true(mock_find_intervals, auto_pm4bp3, seqvar):
+    # Simulating a record that matches the position
+    mock_find_intervals.return_value = [(99, 101)]
 
     result = auto_pm4bp3._in_repeat_region(seqvar)
     assert result is True
 
 
-@patch("src.seqvar.auto_pm4_bp3.tabix.open")
-def test_in_repeat_region_false(mock_tabix_open, auto_pm4bp3, seqvar):
-    mock_tabix = MagicMock()
-    mock_tabix.query.return_value = iter([])  # No records returned
-    mock_tabix_open.return_value = mock_tabix
+@patch("src.seqvar.auto_pm4_bp3.find_intervals")
+def test_in_repeat_region_false(mock_find_intervals, auto_pm4bp3, seqvar):
+    mock_find_intervals.return_value = []  # No records returned
 
     result = auto_pm4bp3._in_repeat_region(seqvar)
     assert result is False
 
 
-@patch("src.seqvar.auto_pm4_bp3.tabix.open")
-def test_in_repeat_region_error(mock_tabix_open, auto_pm4bp3, seqvar):
-    mock_tabix_open.side_effect = tabix.TabixError("Failed to open file")
+@patch("src.seqvar.auto_pm4_bp3.find_intervals")
+def test_in_repeat_region_error(mock_find_intervals, auto_pm4bp3, seqvar):
+    mock_find_intervals.side_effect = tabix.TabixError("Failed to open file")
 
     with pytest.raises(AlgorithmError) as excinfo:
         auto_pm4bp3._in_repeat_region(seqvar)
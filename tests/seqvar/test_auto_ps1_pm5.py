@@ -41,6 +41,19 @@ def test_get_var_info_exception(auto_ps1pm5, seqvar):
     assert result is None, "Expected to get None when an exception occurs"
 
 
+# =========== _get_alt_vars_info ===========
+
+
+@patch("src.seqvar.auto_ps1_pm5.AutoPS1PM5._get_var_info")
+def test_get_alt_vars_info(mock_get_var_info, auto_ps1pm5, seqvar):
+    """Test that all alternative alleles are looked up, in the order of the bases."""
+    mock_get_var_info.side_effect = lambda alt_seqvar: alt_seqvar.insert
+    result = auto_ps1pm5._get_alt_vars_info(seqvar)
+    assert [alt_seqvar.insert for alt_seqvar, _ in result] == ["A", "C", "G"]
+    assert [alt_info for _, alt_info in result] == ["A", "C", "G"]
+    assert mock_get_var_info.call_count == 3
+
+
 # =========== _parse_HGVSp ===========
 
 
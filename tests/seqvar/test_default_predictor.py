@@ -2,10 +2,19 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
-from src.defs.auto_acmg import AutoACMGSeqVarData, AutoACMGSeqVarResult
+from src.defs.auto_acmg import (
+    AutoACMGCADD,
+    AutoACMGConsequence,
+    AutoACMGCriteria,
+    AutoACMGPrediction,
+    AutoACMGSeqVarData,
+    AutoACMGSeqVarResult,
+    AutoACMGSeqVarScores,
+)
 from src.defs.genome_builds import GenomeRelease
 from src.defs.seqvar import SeqVar
 from src.seqvar.default_predictor import DefaultSeqVarPredictor
+from src.vcep import CongenitalMyopathiesPredictor
 
 
 @pytest.fixture
@@ -103,3 +112,47 @@ def test_predict(
     assert result.criteria.pm2 is not None, "PM2 prediction should be stored in the result."
     assert result.criteria.bp3 is not None, "BP3 prediction should be stored in the result."
     assert result.criteria.bp7 is not None, "BP7 prediction should be stored in the result."
+
+
+def _criterion(name: str) -> AutoACMGCriteria:
+    return AutoACMGCriteria(name=name, prediction=AutoACMGPrediction.NotApplicable)
+
+
+def test_predict_parallel_matches_sequential(seqvar):
+    """Test that criteria see the threshold changes of earlier ones also in parallel mode.
+
+    The Congenital Myopathies PP3/BP4 lowers the SpliceAI thresholds, which BP7 relies on.
+    """
+    data = AutoACMGSeqVarData(
+        consequence=AutoACMGConsequence(mehari=["synonymous_variant"]),
+        scores=AutoACMGSeqVarScores(cadd=AutoACMGCADD(phyloP100=0.5, spliceAI_donor_gain=0.07)),
+    )
+    fixed_criteria = {
+        "predict_pvs1": _criterion("PVS1"),
+        "predict_ps1pm5": (_criterion("PS1"), _criterion("PM5")),
+        "predict_pm1": _criterion("PM1"),
+        "predict_pm2ba1bs1bs2": tuple(_criterion(name) for name in ("PM2", "BA1", "BS1", "BS2")),
+        "predict_pm4bp3": (_criterion("PM4"), _criterion("BP3")),
+        "predict_pp2bp1": (_criterion("PP2"), _criterion("BP1")),
+    }
+    patches = [
+        patch.object(CongenitalMyopathiesPredictor, name, return_value=value)
+        for name, value in fixed_criteria.items()
+    ]
+    for p in patches:
+        p.start()
+    try:
+        sequential = CongenitalMyopathiesPredictor(
+            seqvar, AutoACMGSeqVarResult(data=data.model_copy(deep=True))
+        ).predict(parallel=False)
+        parallel = CongenitalMyopathiesPredictor(
+            seqvar, AutoACMGSeqVarResult(data=data.model_copy(deep=True))
+        ).predict(parallel=True)
+    finally:
+        for p in patches:
+            p.stop()
+
+    assert sequential is not None and parallel is not None
+    assert sequential.criteria.bp7.prediction == AutoACMGPrediction.NotApplicable
+    assert parallel.data.thresholds.spliceAI_donor_gain == 0.05
+    assert parallel.model_dump() == sequential.model_dump()
@@ -4,8 +4,10 @@ from unittest.mock import MagicMock, patch
 import pytest
 
 from src.api.reev.annonars import AnnonarsClient
+from src.core.config import settings
 from src.defs.auto_acmg import (
     AutoACMGCriteria,
+    AutoACMGOptions,
     AutoACMGPrediction,
     AutoACMGStrength,
     AutoACMGStrucVarData,
@@ -14,6 +16,7 @@ from src.defs.auto_acmg import (
 from src.defs.auto_pvs1 import PVS1Prediction, PVS1PredictionStrucVarPath
 from src.defs.exceptions import AlgorithmError, InvalidAPIResposeError, MissingDataError
 from src.defs.genome_builds import GenomeRelease
+from src.defs.mehari import Exon
 from src.defs.strucvar import StrucVar, StrucVarType
 from src.strucvar.auto_pvs1 import AutoPVS1, StrucVarHelper
 
@@ -387,6 +390,17 @@ def test_calc_cds(exons, strand, start_codon, stop_codon, expected, strucvar_hel
         assert exon.altEndI == expected[i].altEndI
 
 
+def test_calc_cds_leaves_input_unchanged(strucvar_helper):
+    """Test that _calc_cds does not modify the given exons."""
+    exons = [
+        Exon(altStartI=100, altEndI=200, altCdsStartI=100, altCdsEndI=200),
+        Exon(altStartI=300, altEndI=400, altCdsStartI=300, altCdsEndI=400),
+    ]
+    result = strucvar_helper._calc_cds(exons, GenomicStrand.Plus, 50, 50)
+    assert [(e.altStartI, e.altEndI) for e in result] == [(150, 200), (300, 350)]
+    assert [(e.altStartI, e.altEndI) for e in exons] == [(100, 200), (300, 400)]
+
+
 def test_calc_cds_error(strucvar_helper):
     """Test error handling in _calc_cds."""
     with pytest.raises(MissingDataError):
@@ -854,3 +868,26 @@ def test_predict_pvs1(mock_verify_pvs1, auto_pvs1, strucvar_del, var_data):
     assert (
         "Full gene deletion identified" in criteria.summary
     ), "Summary should include comment from verification"
+
+
+@pytest.mark.parametrize(
+    "duplication_tandem,expected_prediction,expected_path",
+    [
+        (True, PVS1Prediction.PVS1, PVS1PredictionStrucVarPath.DUP1),
+        (False, PVS1Prediction.NotPVS1, PVS1PredictionStrucVarPath.DUP3),
+    ],
+)
+def test_verify_pvs1_duplication_tandem_option(
+    monkeypatch, strucvar_dup, var_data, duplication_tandem, expected_prediction, expected_path
+):
+    """Test that duplications are assessed with the options of the prediction."""
+    monkeypatch.setattr(settings, "DUPLICATION_TANDEM", not duplication_tandem)
+    auto_pvs1 = AutoPVS1(AutoACMGOptions(duplication_tandem=duplication_tandem))
+    prediction, path, _ = auto_pvs1.verify_pvs1(strucvar_dup, var_data)
+    assert (prediction, path) == (expected_prediction, expected_path)
+
+
+def test_auto_pvs1_default_options(monkeypatch):
+    """Test that the options default to the global settings."""
+    monkeypatch.setattr(settings, "DUPLICATION_TANDEM", True)
+    assert AutoPVS1().options == AutoACMGOptions(duplication_tandem=True)
@@ -2,7 +2,7 @@ from unittest.mock import patch
 
 import pytest
 
-from src.defs.auto_acmg import AutoACMGStrucVarResult
+from src.defs.auto_acmg import AutoACMGOptions, AutoACMGPrediction, AutoACMGStrucVarResult
 from src.defs.genome_builds import GenomeRelease
 from src.defs.strucvar import StrucVar, StrucVarType
 from src.strucvar.default_predictor import DefaultStrucVarPredictor
@@ -53,3 +53,14 @@ def test_predict_no_pvs1_implemented(default_predictor):
         result = default_predictor.predict()
         mock_predict_pvs1.assert_called_once()
         assert "pvs1" not in result.criteria, "PVS1 should not be set if no implementation exists."
+
+
+def test_predict_with_options(strucvar, auto_acmg_result):
+    """Test that the options of the prediction reach the PVS1 assessment."""
+    strucvar.sv_type = StrucVarType.DUP
+    predictor = DefaultStrucVarPredictor(
+        strucvar, auto_acmg_result, AutoACMGOptions(duplication_tandem=True)
+    )
+    result = predictor.predict()
+    assert result is not None
+    assert result.criteria.pvs1.prediction == AutoACMGPrediction.Applicable
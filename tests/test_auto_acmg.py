@@ -1,14 +1,31 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import MagicMock, patch
 
+import httpx
 import pytest
 
+from src.api.reev.mehari import MehariClient
 from src.auto_acmg import AutoACMG
-from src.defs.auto_acmg import AutoACMGSeqVarResult, AutoACMGStrucVarResult, GenomicStrand
+from src.core.cache import RequestMemo, get_memory_cache, get_request_memo, request_memo
+from src.core.config import settings
+from src.core.http import set_http_transport
+from src.core.metrics import render_metrics, reset_metrics
+from src.core.prediction_cache import get_prediction_cache, reset_prediction_cache
+from src.core.timing import get_timings
+from src.defs.auto_acmg import (
+    AutoACMGOptions,
+    AutoACMGSeqVarResult,
+    AutoACMGStrucVarResult,
+    GenomicStrand,
+)
 from src.defs.exceptions import AutoAcmgBaseException, ParseError
 from src.defs.genome_builds import GenomeRelease
+from src.defs.mehari import GeneTranscripts
 from src.defs.seqvar import SeqVar
 from src.defs.strucvar import StrucVar, StrucVarType
 from src.seqvar.default_predictor import DefaultSeqVarPredictor
+from tests.utils import get_json_object
 
 
 @pytest.fixture
@@ -211,18 +228,18 @@ def test_select_predictor_unknown_gene(auto_acmg):
     # Test with an unknown gene ID
     hgnc_id = "HGNC:unknown"
     predictor = auto_acmg._select_predictor(hgnc_id)
-    assert (
-        predictor == DefaultSeqVarPredictor
-    ), "Should return DefaultSeqVarPredictor for unknown HGNC IDs"
+    assert predictor == DefaultSeqVarPredictor, (
+        "Should return DefaultSeqVarPredictor for unknown HGNC IDs"
+    )
 
 
 def test_select_predictor_none(auto_acmg):
     # Optional: Test with None as input
     hgnc_id = None
     predictor = auto_acmg._select_predictor(hgnc_id)
-    assert (
-        predictor == DefaultSeqVarPredictor
-    ), "Should return DefaultSeqVarPredictor for None input"
+    assert predictor == DefaultSeqVarPredictor, (
+        "Should return DefaultSeqVarPredictor for None input"
+    )
 
 
 # ------------------- resolve_variant -------------------
@@ -327,9 +344,25 @@ def test_predict_strucvar(
     mock_predict.assert_called_once()
 
     # Ensure the result is of the correct type
-    assert isinstance(
-        result, AutoACMGStrucVarResult
-    ), "The result should be a AutoACMGStrucVarResult."
+    assert isinstance(result, AutoACMGStrucVarResult), (
+        "The result should be a AutoACMGStrucVarResult."
+    )
+
+
+@patch("src.auto_acmg.DefaultStrucVarPredictor", autospec=True)
+@patch("src.auto_acmg.AutoACMG._parse_strucvar_data")
+@patch("src.auto_acmg.AutoACMG.resolve_variant")
+def test_predict_strucvar_options(
+    mock_resolve_variant, mock_parse_data, mock_predictor, strucvar: StrucVar
+):
+    """Test that the options of the prediction are passed to the structural variant predictor."""
+    mock_resolve_variant.return_value = strucvar
+    options = AutoACMGOptions(duplication_tandem=True)
+    auto_acmg = AutoACMG("test_variant", options=options)
+
+    auto_acmg.predict()
+
+    mock_predictor.assert_called_once_with(strucvar, auto_acmg.strucvar_result, options)
 
 
 @patch("src.auto_acmg.SeqVarResolver.resolve_seqvar", return_value=None)
@@ -348,3 +381,261 @@ def test_predict_strucvar_resolution_failure(
     mock_resolve_strucvar.return_value = None
     result = auto_acmg.predict()
     assert result is None, "Should return None if structural variant resolution fails."
+
+
+@patch("src.auto_acmg.AutoACMG._predict", autospec=True)
+def test_predict_uses_request_memo(mock_predict, auto_acmg: AutoACMG):
+    """Test that a prediction runs within its own request memo."""
+    memos = []
+    mock_predict.side_effect = lambda self: memos.append(get_request_memo())
+
+    auto_acmg.predict()
+    auto_acmg.predict()
+
+    assert memos[0] is not None and memos[1] is not None
+    assert memos[0] is not memos[1]
+    assert get_request_memo() is None
+
+
+@patch("src.auto_acmg.AutoACMG._predict", autospec=True)
+def test_predict_reuses_active_request_memo(mock_predict, auto_acmg: AutoACMG):
+    """Test that a prediction shares an already active request memo."""
+    memos = []
+    mock_predict.side_effect = lambda self: memos.append(get_request_memo())
+
+    with request_memo(RequestMemo()) as memo:
+        auto_acmg.predict()
+
+    assert memos == [memo]
+
+
+def test_predict_does_not_share_cached_models(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    """Test that a prediction modifying a cached model does not affect later predictions."""
+    monkeypatch.setattr(settings, "AUTO_ACMG_USE_CACHE", True)
+    monkeypatch.setattr(settings, "AUTO_ACMG_CACHE_DIR", str(tmp_path))
+    gene_transcripts = get_json_object("mehari/HAL_gene.json")
+    upstream = httpx.MockTransport(lambda request: httpx.Response(200, json=gene_transcripts))
+    set_http_transport(upstream)
+    expected = GeneTranscripts.model_validate(gene_transcripts)
+    fetched = []
+
+    def predict(self: AutoACMG):
+        client = MehariClient(api_base_url="https://example.com/memory-tier")
+        transcripts = client.get_gene_transcripts("HGNC:1", GenomeRelease.GRCh38)
+        fetched.append(transcripts.model_copy(deep=True))
+        transcripts.transcripts.clear()
+        return None
+
+    try:
+        with patch("src.auto_acmg.AutoACMG._predict", autospec=True, side_effect=predict):
+            AutoACMG("chr1:100:A:T").predict()
+            AutoACMG("chr1:100:A:T").predict()
+    finally:
+        set_http_transport(None)
+        get_memory_cache().clear()
+
+    assert fetched == [expected, expected]
+    assert expected.transcripts
+
+
+# --------------- timings ---------------
+
+
+@pytest.mark.parametrize("attach", [True, False])
+@patch("src.auto_acmg.DefaultSeqVarPredictor.predict", autospec=True)
+@patch("src.auto_acmg.AutoACMG._parse_seqvar_data")
+@patch("src.auto_acmg.AutoACMG.resolve_variant")
+def test_predict_attaches_timings(
+    mock_resolve_variant,
+    mock_parse_data,
+    mock_predict,
+    attach,
+    seqvar: SeqVar,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Test that the timings of a prediction are attached to its result if enabled."""
+    monkeypatch.setattr(settings, "AUTO_ACMG_ATTACH_TIMINGS", attach)
+    mock_resolve_variant.return_value = seqvar
+    mock_predict.side_effect = lambda self: self.result
+
+    result = AutoACMG("chr1:100:A:T").predict()
+
+    assert result is not None
+    if not attach:
+        assert result.timings is None
+        return
+    assert result.timings is not None
+    assert set(result.timings) == {"auto_acmg.predict", "auto_acmg.predict_criteria"}
+    assert result.timings["auto_acmg.predict"].calls == 1
+    assert "auto_acmg.predict" in get_timings()
+
+
+@patch("src.auto_acmg.DefaultSeqVarPredictor.predict", autospec=True)
+@patch("src.auto_acmg.AutoACMG._parse_seqvar_data")
+@patch("src.auto_acmg.AutoACMG.resolve_variant")
+def test_predict_records_predictor_latency(
+    mock_resolve_variant, mock_parse_data, mock_predict, seqvar: SeqVar
+):
+    """Test that the latency of a prediction is recorded by its predictor class."""
+    reset_metrics()
+    mock_resolve_variant.return_value = seqvar
+    mock_predict.side_effect = lambda self: self.result
+
+    auto_acmg = AutoACMG("chr1:100:A:T")
+    auto_acmg.predict()
+
+    assert auto_acmg.predictor_name == "DefaultSeqVarPredictor"
+    assert (
+        'auto_acmg_prediction_duration_seconds_count{predictor="DefaultSeqVarPredictor",'
+        'cached="false"} 1'
+    ) in render_metrics()
+    reset_metrics()
+
+
+# --------------- prediction cache ---------------
+
+
+@pytest.fixture
+def prediction_cache(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "AUTO_ACMG_USE_PREDICTION_CACHE", True)
+    monkeypatch.setattr(settings, "AUTO_ACMG_USE_CACHE", False)
+    reset_prediction_cache()
+    yield get_prediction_cache()
+    reset_prediction_cache()
+
+
+@patch("src.auto_acmg.DefaultSeqVarPredictor.predict", autospec=True)
+@patch("src.auto_acmg.AutoACMG._parse_seqvar_data")
+@patch("src.auto_acmg.AutoACMG.resolve_variant")
+def test_predict_uses_prediction_cache(
+    mock_resolve_variant, mock_parse_data, mock_predict, prediction_cache, seqvar: SeqVar
+):
+    """Test that repeated predictions of a variant are served from the prediction cache."""
+    mock_resolve_variant.return_value = seqvar
+    mock_predict.side_effect = lambda self: self.result
+
+    first = AutoACMG("chr1:100:A:T")
+    first_result = first.predict()
+    second = AutoACMG("chr1:100:A:T")
+    second_result = second.predict()
+
+    assert mock_predict.call_count == 1
+    assert mock_parse_data.call_count == 1
+    assert second_result == first_result and second_result is not first_result
+    assert first.etag is not None and second.etag == first.etag
+
+
+@patch("src.auto_acmg.predictor_fingerprint")
+@patch("src.auto_acmg.DefaultSeqVarPredictor.predict", autospec=True)
+@patch("src.auto_acmg.AutoACMG._parse_seqvar_data")
+@patch("src.auto_acmg.AutoACMG.resolve_variant")
+def test_predict_ignores_outdated_cached_prediction(
+    mock_resolve_variant,
+    mock_parse_data,
+    mock_predict,
+    mock_fingerprint,
+    prediction_cache,
+    seqvar: SeqVar,
+):
+    """Test that predictions of an updated VCEP specification are recomputed."""
+    mock_resolve_variant.return_value = seqvar
+    mock_predict.side_effect = lambda self: self.result
+    mock_fingerprint.return_value = "DefaultSeqVarPredictor[GN001:1.0.0]"
+    AutoACMG("chr1:100:A:T").predict()
+
+    mock_fingerprint.return_value = "DefaultSeqVarPredictor[GN001:2.0.0]"
+    AutoACMG("chr1:100:A:T").predict()
+    AutoACMG("chr1:100:A:T").predict()
+
+    assert mock_predict.call_count == 2
+
+
+# --------------- predict_many ---------------
+
+
+@patch("src.auto_acmg.AutoACMG.predict", autospec=True)
+def test_predict_many_order_and_errors(mock_predict, seqvar: SeqVar):
+    """Test that predict_many keeps the input order and reports per-variant errors."""
+
+    def predict(self):
+        if self.variant_name == "bad":
+            raise AutoAcmgBaseException("Failed")
+        if self.variant_name == "unresolved":
+            return None
+        return AutoACMGSeqVarResult(seqvar=seqvar)
+
+    mock_predict.side_effect = predict
+
+    results = AutoACMG.predict_many(
+        ["var1", "bad", "var2", "unresolved", "var1"], GenomeRelease.GRCh38, max_concurrency=2
+    )
+
+    assert [r.variant_name for r in results] == ["var1", "bad", "var2", "unresolved", "var1"]
+    assert results[0].prediction is not None and results[0].error is None
+    assert results[1].prediction is None and results[1].error == "Failed"
+    assert results[3].prediction is None and results[3].error is not None
+    # Duplicated variants are only predicted once
+    assert mock_predict.call_count == 4
+
+
+@patch("src.auto_acmg.AutoACMG.predict", autospec=True)
+def test_predict_many_shares_request_memo(mock_predict):
+    """Test that all variants of a batch share the same request memo."""
+    memos = []
+
+    def predict(self):
+        memos.append(get_request_memo())
+        return None
+
+    mock_predict.side_effect = predict
+
+    AutoACMG.predict_many(["var1", "var2", "var3"], max_concurrency=3)
+
+    assert len(memos) == 3
+    assert memos[0] is not None
+    assert all(memo is memos[0] for memo in memos)
+    assert get_request_memo() is None
+
+
+@patch("src.auto_acmg.AutoACMG.predict", autospec=True)
+def test_predict_many_bounded(mock_predict, monkeypatch: pytest.MonkeyPatch):
+    """Test that at most ``max_concurrency`` variants are submitted and the memo is bounded."""
+    monkeypatch.setattr(settings, "AUTO_ACMG_BATCH_MEMO_MAX_ENTRIES", 16)
+    lock = threading.Lock()
+    counts = {"submitted": 0, "finished": 0}
+    in_flight = []
+    memos = []
+
+    class CountingExecutor(ThreadPoolExecutor):
+        def submit(self, *args, **kwargs):
+            with lock:
+                counts["submitted"] += 1
+            return super().submit(*args, **kwargs)
+
+    def predict(self):
+        with lock:
+            in_flight.append(counts["submitted"] - counts["finished"])
+            memos.append(get_request_memo())
+        with lock:
+            counts["finished"] += 1
+
+    mock_predict.side_effect = predict
+    monkeypatch.setattr("src.auto_acmg.ThreadPoolExecutor", CountingExecutor)
+
+    results = AutoACMG.predict_many([f"var{i}" for i in range(10)], max_concurrency=2)
+
+    assert len(results) == 10
+    assert max(in_flight) <= 2
+    assert memos[0] is not None and memos[0].max_entries == 16
+
+
+@patch("src.auto_acmg.AutoACMG.predict", autospec=True)
+def test_predict_many_options(mock_predict):
+    """Test that the options are used for every variant of a batch."""
+    options = AutoACMGOptions(duplication_tandem=True)
+    seen = []
+    mock_predict.side_effect = lambda self: seen.append(self.options)
+
+    AutoACMG.predict_many(["var1", "var2"], options=options)
+
+    assert seen == [options, options]
@@ -1,3 +1,4 @@
+import random
 from typing import List
 from unittest.mock import MagicMock, patch
 
@@ -11,7 +12,15 @@ from src.defs.genome_builds import GenomeRelease
 from src.defs.mehari import GeneTranscripts, TranscriptsSeqVar, TranscriptsStrucVar
 from src.defs.seqvar import SeqVar
 from src.defs.strucvar import StrucVar, StrucVarType
-from src.utils import SeqVarTranscriptsHelper, SplicingPrediction, StrucVarTranscriptsHelper
+from src.utils import (
+    SeqVarTranscriptsHelper,
+    SplicingPrediction,
+    StrucVarTranscriptsHelper,
+    clear_shared_resources,
+    get_maxent_backend,
+    get_maxent_matrices,
+    get_seqrepo,
+)
 from tests.utils import get_json_object
 
 
@@ -78,6 +87,17 @@ def exons_ss():
     return [MagicMock(altEndI=110, altStartI=90)]
 
 
+@pytest.fixture(autouse=True)
+def shared_resources(monkeypatch):
+    """Start every test without the process-wide SeqRepo, Annonars client and matrices."""
+    from src.core.config import settings
+
+    monkeypatch.setattr(settings, "AUTO_ACMG_MAXENT_BACKEND", "python")
+    clear_shared_resources()
+    yield
+    clear_shared_resources()
+
+
 @pytest.fixture
 def settings_ss():
     from src.core.config import settings
@@ -145,6 +165,88 @@ def test_splicing_prediction_init(
     )
 
 
+@patch("src.utils.SeqRepo")
+@patch("src.utils.AnnonarsClient")
+@patch("src.utils.load_matrix5", return_value="mock_matrix5")
+@patch("src.utils.load_matrix3", return_value="mock_matrix3")
+@patch.object(SplicingPrediction, "_initialize_maxentscore")
+def test_splicing_prediction_shares_resources(
+    mock_initialize_maxentscore,
+    mock_load_matrix3,
+    mock_load_matrix5,
+    mock_annonars_client,
+    mock_seqrepo,
+    seqvar_ss,
+    exons_ss,
+    settings_ss,
+):
+    """Test that SeqRepo, Annonars client and matrices are set up once per process."""
+    predictions = [
+        SplicingPrediction(
+            seqvar=seqvar_ss,
+            strand=GenomicStrand.Plus,
+            consequences=["splice_donor_variant"],
+            exons=exons_ss,
+        )
+        for _ in range(3)
+    ]
+
+    assert all(prediction.sr is predictions[0].sr for prediction in predictions)
+    assert all(
+        prediction.annonars_client is predictions[0].annonars_client for prediction in predictions
+    )
+    mock_seqrepo.assert_called_once_with("/mock/seqrepo/data/dir")
+    mock_annonars_client.assert_called_once()
+    mock_load_matrix5.assert_called_once()
+    mock_load_matrix3.assert_called_once()
+
+
+@patch("src.utils.SeqRepo")
+def test_get_seqrepo_per_data_dir(mock_seqrepo, monkeypatch):
+    """Test that a SeqRepo handle is opened per data directory."""
+    from src.core.config import settings
+
+    mock_seqrepo.side_effect = lambda data_dir: MagicMock(name=data_dir)
+    monkeypatch.setattr(settings, "AUTO_ACMG_SEQREPO_DATA_DIR", "/seqrepo/a")
+    seqrepo_a = get_seqrepo()
+    monkeypatch.setattr(settings, "AUTO_ACMG_SEQREPO_DATA_DIR", "/seqrepo/b")
+    assert get_seqrepo() is not seqrepo_a
+    monkeypatch.setattr(settings, "AUTO_ACMG_SEQREPO_DATA_DIR", "/seqrepo/a")
+    assert get_seqrepo() is seqrepo_a
+
+
+def test_get_maxent_matrices():
+    """Test that the matrices are loaded from the msgpack files and shared."""
+    matrix5, matrix3 = get_maxent_matrices()
+    assert len(matrix5) == 4**7
+    assert len(matrix3) == 9
+    assert get_maxent_matrices()[0] is matrix5
+
+
+@pytest.mark.parametrize(
+    "backend,built,expected",
+    [
+        ("python", True, "lib.maxentpy.maxent"),
+        ("auto", False, "lib.maxentpy.maxent"),
+        ("compiled", False, "lib.maxentpy.maxent"),
+        ("auto", True, "lib.maxentpy.maxent_fast"),
+        ("compiled", True, "lib.maxentpy.maxent_fast"),
+    ],
+)
+def test_get_maxent_backend(backend, built, expected, monkeypatch):
+    """Test that the compiled MaxEntScan is used only if it is built and not disabled."""
+    from src.core.config import settings
+
+    monkeypatch.setattr(settings, "AUTO_ACMG_MAXENT_BACKEND", backend)
+    find_spec = MagicMock(return_value=MagicMock() if built else None)
+    import_module = MagicMock(side_effect=lambda name: MagicMock(__name__=name))
+    with (
+        patch("src.utils.importlib.util.find_spec", find_spec),
+        patch("src.utils.importlib.import_module", import_module),
+    ):
+        assert get_maxent_backend().__name__ == expected
+
+
 @pytest.mark.parametrize(
     "strand,expected_splice_type",
     [
@@ -388,6 +490,16 @@ def test_get_sequence_minus_strand(mock_reverse_complement, splicing_prediction,
     ), "The sequence should be the reverse complement when the strand is minus."
 
 
+@patch("src.utils.SplicingPrediction.reverse_complement")
+def test_get_sequence_forward_strand(mock_reverse_complement, splicing_prediction, seqvar_ss):
+    """Test that the forward strand sequence is returned on the minus strand if requested."""
+    splicing_prediction.strand = GenomicStrand.Minus
+    splicing_prediction.sr = {CHROM_REFSEQ_38["1"]: "ACGTACGTACGT"}
+
+    assert splicing_prediction.get_sequence(1, 5, strand_aware=False) == "CGTA"
+    mock_reverse_complement.assert_not_called()
+
+
 def test_get_cryptic_ss_unknown_splice_type(splicing_prediction):
     """Test cryptic splice site retrieval when splice type is unknown."""
     result = splicing_prediction.get_cryptic_ss("ACGTACGTACGT", SpliceType.Unknown)
@@ -443,76 +555,132 @@ def test_get_cryptic_ss_no_sites_found(
     assert result == [], "Should return an empty list if no cryptic sites are found."
 
 
-@patch.object(SplicingPrediction, "get_sequence", return_value="ACGTGTACG")
+def _legacy_cryptic_ss(splicing_prediction, refseq, splice_type):
+    """Cryptic splice sites as scanned before, with one sequence lookup per position."""
+    cryptic_sites = []
+    for offset in range(-20, 21):
+        pos = splicing_prediction.seqvar.pos + offset
+        size = 9 if splice_type == SpliceType.Donor else 23
+        splice_context = splicing_prediction.get_sequence(pos, pos + size)
+        if splicing_prediction.strand == GenomicStrand.Minus:
+            splice_context = splicing_prediction.reverse_complement(splice_context)
+        if splice_type == SpliceType.Donor:
+            cryptic_sites.extend(
+                splicing_prediction._find_cryptic_donor_sites(
+                    pos, splice_context, refseq, splicing_prediction.maxentscore_ref
+                )
+            )
+        else:
+            cryptic_sites.extend(
+                splicing_prediction._find_cryptic_acceptor_sites(
+                    pos, splice_context, refseq, splicing_prediction.maxentscore_ref
+                )
+            )
+    return cryptic_sites
+
+
+@pytest.mark.parametrize("strand", [GenomicStrand.Plus, GenomicStrand.Minus])
+@pytest.mark.parametrize(
+    "splice_type,refseq",
+    [
+        (SpliceType.Donor, "CAGGTAAGT"),
+        (SpliceType.Acceptor, "TTCCAAACGAACTTTTGTAGGGA"),
+    ],
+)
+@pytest.mark.parametrize("seed", range(5))
+def test_get_cryptic_ss_matches_per_position_scan(
+    seed, splice_type, refseq, strand, splicing_prediction
+):
+    """Test that the single window scan finds the same sites as the per-position scan."""
+    rng = random.Random(seed)
+    # Random sequence with planted splice site motifs, so that some positions qualify
+    bases = [rng.choice("ACGT") for _ in range(200)]
+    for i in range(rng.randrange(60, 70), 150, rng.randrange(5, 9)):
+        bases[i : i + 9] = list("CAGGTAAGT")
+    splicing_prediction.sr = {CHROM_REFSEQ_38["1"]: "".join(bases)}
+    splicing_prediction.seqvar.pos = 100
+    splicing_prediction.strand = strand
+    splicing_prediction.maxentscore_ref = 4.0
+
+    get_sequence = SplicingPrediction.get_sequence
+    with patch.object(
+        SplicingPrediction, "get_sequence", autospec=True, side_effect=get_sequence
+    ) as mock_get_sequence:
+        result = splicing_prediction.get_cryptic_ss(refseq, splice_type)
+    mock_get_sequence.assert_called_once()
+
+    expected = _legacy_cryptic_ss(splicing_prediction, refseq, splice_type)
+    assert result == expected
+    if splice_type == SpliceType.Donor:
+        assert expected, "The planted motifs should give cryptic donor sites."
+
+
 @patch("src.utils.maxent.score5", return_value=4.5)
-def test_find_cryptic_donor_sites_plus_strand(mock_score5, mock_get_sequence, splicing_prediction):
-    """Test finding cryptic donor sites on the Plus strand with a valid context."""
+def test_find_cryptic_donor_sites(mock_score5, splicing_prediction):
+    """Test finding cryptic donor sites with a valid context."""
     refseq = "ACGTGTACG"
     pos = 100
     refscore = 3.0
 
-    result = splicing_prediction._find_cryptic_donor_sites(pos, refseq, refscore)
+    result = splicing_prediction._find_cryptic_donor_sites(pos, "ACGTGTACG", refseq, refscore)
 
-    mock_get_sequence.assert_called_once_with(pos, pos + 9)
     mock_score5.assert_called_once_with("ACGTGTACG", matrix=splicing_prediction.matrix5)
 
     assert result == [(pos, "ACGTGTACG", 4.5)], "Should return the correct cryptic donor site."
 
 
-@patch.object(SplicingPrediction, "get_sequence", return_value="ACGTGTACG")
-@patch("src.utils.maxent.score5", return_value=4.5)
-@patch.object(SplicingPrediction, "reverse_complement", return_value="CGTACGTAC")
-def test_find_cryptic_donor_sites_minus_strand(
-    mock_reverse_complement, mock_score5, mock_get_sequence, splicing_prediction
-):
-    """Test finding cryptic donor sites on the Minus strand with a valid context."""
+@patch("src.utils.maxent.score5", return_value=0.5)
+def test_get_cryptic_ss_minus_strand(mock_score5, splicing_prediction):
+    """Test that the window is fetched once on the forward strand on the Minus strand."""
+    sequence = "".join(random.Random(0).choice("ACGT") for _ in range(200))
+    splicing_prediction.sr = {CHROM_REFSEQ_38["1"]: sequence}
     splicing_prediction.strand = GenomicStrand.Minus
-    refseq = "CGTACGTAC"
-    pos = 100
-    refscore = 3.0
-
-    result = splicing_prediction._find_cryptic_donor_sites(pos, refseq, refscore)
+    splicing_prediction.seqvar.pos = 100
+    # The window as fetched before, reverse complemented by ``get_sequence`` and back.
+    window = SplicingPrediction.reverse_complement(
+        SplicingPrediction.reverse_complement(sequence[80:129])
+    )
 
-    mock_get_sequence.assert_called_once_with(pos, pos + 9)
-    mock_reverse_complement.assert_called_once_with("ACGTGTACG")
-    mock_score5.assert_called_once_with("CGTACGTAC", matrix=splicing_prediction.matrix5)
+    get_sequence = SplicingPrediction.get_sequence
+    with (
+        patch.object(
+            SplicingPrediction, "get_sequence", autospec=True, side_effect=get_sequence
+        ) as mock_get_sequence,
+        patch.object(SplicingPrediction, "reverse_complement") as mock_reverse_complement,
+    ):
+        result = splicing_prediction.get_cryptic_ss("CGTACGTAC", SpliceType.Donor)
 
-    assert result == [
-        (pos, "CGTACGTAC", 4.5)
-    ], "Should return the correct cryptic donor site for the Minus strand."
+    mock_get_sequence.assert_called_once_with(splicing_prediction, 80, 129, strand_aware=False)
+    mock_reverse_complement.assert_not_called()
+    assert [call.args[0] for call in mock_score5.call_args_list] == [
+        window[offset : offset + 9] for offset in range(41)
+    ]
+    assert result == []
 
 
-@patch.object(SplicingPrediction, "get_sequence", return_value="ACGTGTACG")
 @patch("src.utils.maxent.score5", return_value=0.8)
-def test_find_cryptic_donor_sites_below_threshold(
-    mock_score5, mock_get_sequence, splicing_prediction
-):
+def test_find_cryptic_donor_sites_below_threshold(mock_score5, splicing_prediction):
     """Test when maxent score is below the threshold."""
     refseq = "ACGTGTACG"
     pos = 100
     refscore = 3.0
 
-    result = splicing_prediction._find_cryptic_donor_sites(pos, refseq, refscore)
+    result = splicing_prediction._find_cryptic_donor_sites(pos, "ACGTGTACG", refseq, refscore)
 
-    mock_get_sequence.assert_called_once_with(pos, pos + 9)
     mock_score5.assert_called_once_with("ACGTGTACG", matrix=splicing_prediction.matrix5)
 
     assert result == [], "Should return an empty list when the maxent score is below the threshold."
 
 
-@patch.object(SplicingPrediction, "get_sequence", return_value="ACGTACTAC")
 @patch("src.utils.maxent.score5", return_value=4.5)
-def test_find_cryptic_donor_sites_no_gt_in_splice_context(
-    mock_score5, mock_get_sequence, splicing_prediction
-):
+def test_find_cryptic_donor_sites_no_gt_in_splice_context(mock_score5, splicing_prediction):
     """Test when the splice context does not contain 'GT'."""
     refseq = "ACGAAATAC"
     pos = 100
     refscore = 3.0
 
-    result = splicing_prediction._find_cryptic_donor_sites(pos, refseq, refscore)
+    result = splicing_prediction._find_cryptic_donor_sites(pos, "ACGTACTAC", refseq, refscore)
 
-    mock_get_sequence.assert_called_once_with(pos, pos + 9)
     mock_score5.assert_called_once_with("ACGTACTAC", matrix=splicing_prediction.matrix5)
 
     assert (
@@ -520,19 +688,17 @@ def test_find_cryptic_donor_sites_no_gt_in_splice_context(
     ), "Should return an empty list when the splice context does not contain 'GT'."
 
 
-@patch.object(SplicingPrediction, "get_sequence", return_value="ACGTACGTAGTACGTACGTAGTAC")
 @patch("src.utils.maxent.score3", return_value=4.5)
-def test_find_cryptic_acceptor_sites_plus_strand(
-    mock_score3, mock_get_sequence, splicing_prediction
-):
-    """Test finding cryptic acceptor sites on the Plus strand with a valid context."""
+def test_find_cryptic_acceptor_sites(mock_score3, splicing_prediction):
+    """Test finding cryptic acceptor sites with a valid context."""
     refseq = "ACGTACGTAGTACGTACGTAGTAC"
     pos = 100
     refscore = 3.0
 
-    result = splicing_prediction._find_cryptic_acceptor_sites(pos, refseq, refscore)
+    result = splicing_prediction._find_cryptic_acceptor_sites(
+        pos, "ACGTACGTAGTACGTACGTAGTAC", refseq, refscore
+    )
 
-    mock_get_sequence.assert_called_once_with(pos, pos + 23)
     mock_score3.assert_called_once_with(
         "ACGTACGTAGTACGTACGTAGTAC", matrix=splicing_prediction.matrix3
     )
@@ -542,44 +708,17 @@ def test_find_cryptic_acceptor_sites_plus_strand(
     ], "Should return the correct cryptic acceptor site."
 
 
-@patch.object(SplicingPrediction, "get_sequence", return_value="ACGTACGTAGTACGTACGTAGTAC")
-@patch("src.utils.maxent.score3", return_value=4.5)
-@patch.object(SplicingPrediction, "reverse_complement", return_value="GTACGTACGTACGTACTACGTACG")
-def test_find_cryptic_acceptor_sites_minus_strand(
-    mock_reverse_complement, mock_score3, mock_get_sequence, splicing_prediction
-):
-    """Test finding cryptic acceptor sites on the Minus strand with a valid context."""
-    splicing_prediction.strand = GenomicStrand.Minus
-    refseq = "GTACGTACGTACGTACTACGTACG"
-    pos = 100
-    refscore = 3.0
-
-    result = splicing_prediction._find_cryptic_acceptor_sites(pos, refseq, refscore)
-
-    mock_get_sequence.assert_called_once_with(pos, pos + 23)
-    mock_reverse_complement.assert_called_once_with("ACGTACGTAGTACGTACGTAGTAC")
-    mock_score3.assert_called_once_with(
-        "GTACGTACGTACGTACTACGTACG", matrix=splicing_prediction.matrix3
-    )
-
-    assert result == [
-        (pos, "GTACGTACGTACGTACTACGTACG", 4.5)
-    ], "Should return the correct cryptic acceptor site for the Minus strand."
-
-
-@patch.object(SplicingPrediction, "get_sequence", return_value="ACGTACGTAGTACGTACGTAGTAC")
 @patch("src.utils.maxent.score3", return_value=0.8)
-def test_find_cryptic_acceptor_sites_below_threshold(
-    mock_score3, mock_get_sequence, splicing_prediction
-):
+def test_find_cryptic_acceptor_sites_below_threshold(mock_score3, splicing_prediction):
     """Test when maxent score is below the threshold."""
     refseq = "ACGTACGTAGTACGTACGTAGTAC"
     pos = 100
     refscore = 3.0
 
-    result = splicing_prediction._find_cryptic_acceptor_sites(pos, refseq, refscore)
+    result = splicing_prediction._find_cryptic_acceptor_sites(
+        pos, "ACGTACGTAGTACGTACGTAGTAC", refseq, refscore
+    )
 
-    mock_get_sequence.assert_called_once_with(pos, pos + 23)
     mock_score3.assert_called_once_with(
         "ACGTACGTAGTACGTACGTAGTAC", matrix=splicing_prediction.matrix3
     )
@@ -587,19 +726,17 @@ def test_find_cryptic_acceptor_sites_below_threshold(
     assert result == [], "Should return an empty list when the maxent score is below the threshold."
 
 
-@patch.object(SplicingPrediction, "get_sequence", return_value="ACGTACGTAGTACGTACGTACTAC")
 @patch("src.utils.maxent.score3", return_value=4.5)
-def test_find_cryptic_acceptor_sites_no_ag_in_splice_context(
-    mock_score3, mock_get_sequence, splicing_prediction
-):
+def test_find_cryptic_acceptor_sites_no_ag_in_splice_context(mock_score3, splicing_prediction):
     """Test when the splice context does not contain 'AG'."""
     refseq = "ACGTACGTAGTACGTACGAAAAAC"
     pos = 100
     refscore = 3.0
 
-    result = splicing_prediction._find_cryptic_acceptor_sites(pos, refseq, refscore)
+    result = splicing_prediction._find_cryptic_acceptor_sites(
+        pos, "ACGTACGTAGTACGTACGTACTAC", refseq, refscore
+    )
 
-    mock_get_sequence.assert_called_once_with(pos, pos + 23)
     mock_score3.assert_called_once_with(
         "ACGTACGTAGTACGTACGTACTAC", matrix=splicing_prediction.matrix3
     )